@@ -1,20 +1,30 @@
 from flask import Flask, jsonify
 from flask_cors import CORS
-from flask_sqlalchemy import SQLAlchemy
 from flask_jwt_extended import JWTManager
-from datetime import timedelta
 import logging
-import os
-from apscheduler.schedulers.background import BackgroundScheduler
-from datetime import datetime, timedelta
 
+from config import Config
 from database import db
+from services.json_provider import FastJSONProvider
+from services.http_policy import init_http_policy
+from services.admission import init_admission_control
+from services.idempotency import init_idempotency
+from services.invalidation import init_invalidation_bus
+from services.chatbot_cache import init_chatbot_cache
+from services.user_cache import init_user_cache
+from services.identity import init_identity, is_revoked
+from services.calendar_feed import init_calendar_feed
+from services.faq_index import init_faq_kb
+from services.notifications import init_notifications
+from services.rollups import init_rollups
+from services import metrics
 from routes.auth_routes import auth_bp
 from routes.appointment_routes import appointment_bp
 from routes.chatbot_routes import chatbot_bp
 from routes.doctor_routes import doctor_bp
-
-app = Flask(__name__)
+from routes.admin_routes import admin_bp, admin_required
+from routes.bootstrap_routes import bootstrap_bp
+from routes.calendar_routes import calendar_bp
 
 # Setup logging
 logging.basicConfig(
@@ -27,117 +37,125 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-# Configure CORS
-CORS(app, resources={r"/api/*": {
-    "origins": [
-        "http://localhost:3000",           # your local React
-        "https://wellnesscare-1.onrender.com"  # ← change to your actual frontend URL after deploy
-    ],
-    "methods": ["GET", "POST", "PUT", "DELETE", "OPTIONS"],
-    "allow_headers": ["Content-Type", "Authorization"],
-    "supports_credentials": True
-}})
-
-# Configurations
-app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'your-secret-key-change-in-production')
-app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv("DATABASE_URL")
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-app.config['JWT_SECRET_KEY'] = os.getenv('JWT_SECRET_KEY', 'your-jwt-secret-key-change-in-production')
-app.config['JWT_ACCESS_TOKEN_EXPIRES'] = timedelta(days=1)
-app.config['GOOGLE_CLIENT_ID'] = os.getenv('GOOGLE_CLIENT_ID')
-app.config['GOOGLE_CLIENT_SECRET'] = os.getenv('GOOGLE_CLIENT_SECRET')
-
-# Initialize extensions
-db.init_app(app)
-jwt = JWTManager(app)
-
-# Custom JWT error handlers
-@jwt.invalid_token_loader
-def invalid_token_callback(error):
-    logger.error("JWT Invalid Token Error: %s", str(error))
-    return jsonify({"msg": "Invalid token. Please log in again."}), 401
-
-@jwt.expired_token_loader
-def expired_token_callback(jwt_header, jwt_payload):
-    logger.error("JWT Expired Token Error")
-    return jsonify({"msg": "Token has expired. Please log in again."}), 401
-
-@jwt.unauthorized_loader
-def unauthorized_callback(error):
-    logger.error("JWT Unauthorized Error: %s", str(error))
-    return jsonify({"msg": "Missing or invalid token. Please log in again."}), 401
-
-# Register blueprints
-app.register_blueprint(auth_bp)
-app.register_blueprint(appointment_bp)
-app.register_blueprint(chatbot_bp)
-app.register_blueprint(doctor_bp)
-
-# Create tables and sample data
-def create_sample_data():
-    from models.doctor import Doctor
-    from models.user import User
-    
-    if Doctor.query.first() is None:
-        doctors = [
-            Doctor(name="Dr. Rajesh Kumar", specialization="Cardiologist", availability="Mon-Fri 9AM-5PM", zego_user_id="doctor_rajesh"),
-            Doctor(name="Dr. Priya Sharma", specialization="Endocrinologist", availability="Tue-Sat 10AM-6PM", zego_user_id="doctor_priya"),
-            Doctor(name="Dr. Amit Patel", specialization="Diabetologist", availability="Mon-Wed-Fri 2PM-8PM", zego_user_id="doctor_amit"),
-            Doctor(name="Dr. Sunita Gupta", specialization="General Physician", availability="Daily 9AM-1PM", zego_user_id="doctor_sunita"),
-        ]
-        
-        for doctor in doctors:
-            db.session.add(doctor)
-        
-        db.session.commit()
-        logger.info("Sample doctors created!")
-
-# Function to clean up expired appointments
-def cleanup_expired_appointments():
-    with app.app_context():
-        try:
-            from models.appointment import Appointment
-            current_time = datetime.now()
-            expired_appointments = Appointment.query.filter(
-                Appointment.status == 'Scheduled',
-                db.func.datetime(Appointment.time) < db.func.datetime(current_time - timedelta(minutes=30))
-            ).all()
-            
-            for appointment in expired_appointments:
-                logger.info(f"Deleting expired appointment ID {appointment.id}, scheduled at {appointment.time}")
-                db.session.delete(appointment)
-            
-            db.session.commit()
-            logger.info(f"Deleted {len(expired_appointments)} expired appointments")
-        except Exception as e:
-            db.session.rollback()
-            logger.error(f"Failed to clean up expired appointments: {str(e)}")
-
-with app.app_context():
-    from models import user, doctor, appointment, profile, chat_message, reminder
-    try:
-        db.create_all()
-        logger.info("Database tables created successfully")
-    except Exception as e:
-        logger.error("Failed to create database tables: %s", str(e))
-        raise
-    create_sample_data()
-
-# Initialize scheduler for periodic cleanup
-scheduler = BackgroundScheduler()
-scheduler.add_job(cleanup_expired_appointments, 'interval', hours=1)
-scheduler.start()
-
-@app.route('/api/health', methods=['GET'])
-def health_check():
-    return {"status": "API is working!"}, 200
-
-@app.route('/api/test-doctor', methods=['GET'])
-def test_doctor():
-    return {"status": "Doctor routes are accessible!"}, 200
+def create_app(config=None):
+    """
+    Application factory. Builds and configures the app without touching the
+    database; schema and sample data are managed with `flask init-db`/`flask seed`
+    and periodic jobs run in their own process via `flask run-jobs`.
+
+    `config` may be a config class/object or a mapping of overrides.
+    """
+    app = Flask(__name__)
+    app.config.from_object(Config)
+    if config is not None:
+        if isinstance(config, dict):
+            app.config.update(config)
+        else:
+            app.config.from_object(config)
+
+    app.json = FastJSONProvider(app)
+
+    if app.config.get('PROXY_FIX_HOPS'):
+        # Client addresses (used for rate limiting) come from the trusted proxy
+        from werkzeug.middleware.proxy_fix import ProxyFix
+        hops = app.config['PROXY_FIX_HOPS']
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=hops, x_proto=hops)
+
+    # Configure CORS
+    CORS(app, resources={r"/api/*": {
+        "origins": [
+            "http://localhost:3000",           # your local React
+            "https://wellnesscare-1.onrender.com"  # ← change to your actual frontend URL after deploy
+        ],
+        "methods": ["GET", "POST", "PUT", "DELETE", "OPTIONS"],
+        "allow_headers": ["Content-Type", "Authorization", "Idempotency-Key", "X-Admin-Key"],
+        "supports_credentials": True
+    }})
+
+    # Initialize extensions
+    db.init_app(app)
+    jwt = JWTManager(app)
+
+    # Custom JWT error handlers
+    @jwt.invalid_token_loader
+    def invalid_token_callback(error):
+        logger.error("JWT Invalid Token Error: %s", str(error))
+        return jsonify({"msg": "Invalid token. Please log in again."}), 401
+
+    @jwt.expired_token_loader
+    def expired_token_callback(jwt_header, jwt_payload):
+        logger.error("JWT Expired Token Error")
+        return jsonify({"msg": "Token has expired. Please log in again."}), 401
+
+    @jwt.unauthorized_loader
+    def unauthorized_callback(error):
+        logger.error("JWT Unauthorized Error: %s", str(error))
+        return jsonify({"msg": "Missing or invalid token. Please log in again."}), 401
+
+    @jwt.token_in_blocklist_loader
+    def check_if_token_revoked(jwt_header, jwt_payload):
+        return is_revoked(jwt_payload)
+
+    @jwt.revoked_token_loader
+    def revoked_token_callback(jwt_header, jwt_payload):
+        logger.error("JWT Revoked Token Error")
+        return jsonify({"msg": "Token has been revoked. Please log in again."}), 401
+
+    init_admission_control(app)
+    init_idempotency(app)
+    init_invalidation_bus(app)
+    init_chatbot_cache(app)
+    init_user_cache(app)
+    init_identity(app)
+    init_calendar_feed(app)
+    init_faq_kb(app)
+    init_notifications(app)
+    init_rollups(app)
+
+    # Register blueprints
+    app.register_blueprint(auth_bp)
+    app.register_blueprint(appointment_bp)
+    app.register_blueprint(chatbot_bp)
+    app.register_blueprint(doctor_bp)
+    app.register_blueprint(admin_bp)
+    app.register_blueprint(bootstrap_bp)
+    app.register_blueprint(calendar_bp)
+
+    @app.route('/api/health', methods=['GET'])
+    def health_check():
+        return {"status": "API is working!"}, 200
+
+    @app.route('/api/metrics', methods=['GET'])
+    @admin_required
+    def metrics_snapshot():
+        return jsonify(metrics.snapshot()), 200
+
+    @app.route('/api/test-doctor', methods=['GET'])
+    def test_doctor():
+        return {"status": "Doctor routes are accessible!"}, 200
+
+    init_http_policy(app)
+
+    from commands import register_commands
+    register_commands(app)
+
+    return app
+
+app = create_app()
 
 if __name__ == '__main__':
+    # Local development convenience: bootstrap the database and run the
+    # maintenance jobs inside the dev server process.
+    from commands import init_db, create_sample_data
+    from services.jobs import create_scheduler
+
+    with app.app_context():
+        init_db()
+        create_sample_data()
+
+    scheduler = create_scheduler(app)
+    scheduler.start()
     try:
         app.run(debug=True, port=5000)
     finally:
-        scheduler.shutdown()
\ No newline at end of file
+        scheduler.shutdown()
@@ -0,0 +1,42 @@
+# asgi.py
+"""
+ASGI entry point: POST /api/chatbot is served asynchronously
+(services/chatbot_async.py); every other request goes to the Flask app
+through asgiref's WSGI adapter.
+
+    uvicorn asgi:application --port 5000
+    gunicorn asgi:application -k uvicorn.workers.UvicornWorker
+
+Requires `pip install asgiref uvicorn` plus aiosqlite or asyncpg for the
+configured database. Run one event loop per process: chatbot conversation
+state lives in process memory, as with the WSGI workers.
+"""
+import logging
+
+from asgiref.wsgi import WsgiToAsgi
+
+from app import app
+from services.chatbot_async import AsyncChatbot
+
+logger = logging.getLogger(__name__)
+
+chatbot = AsyncChatbot(app)
+flask_application = WsgiToAsgi(app)
+
+async def application(scope, receive, send):
+    if scope['type'] == 'lifespan':
+        await _lifespan(receive, send)
+    elif scope['type'] == 'http' and scope['path'] == '/api/chatbot' and scope['method'] == 'POST':
+        await chatbot(scope, receive, send)
+    else:
+        await flask_application(scope, receive, send)
+
+async def _lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            await chatbot.aclose()
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
@@ -0,0 +1,173 @@
+"""
+Concurrent chatbot conversations per worker: sync Flask view vs asgi.py.
+
+Each of --conversations clients sends --turns chatbot messages back to back
+(greetings, FAQ and doctor-directory questions from logged-in patients).
+The sync run pushes them through one gthread-style worker of --threads
+threads; the async run drives `asgi.application` on a single event loop.
+Reports throughput and per-turn latency (p50/p99) for each run.
+
+--db-latency-ms adds that much wait at the start of every database
+transaction on both paths, emulating the round trip to a networked database.
+(SQLite serializes writers, so latency inside a write transaction would only
+measure lock contention.)
+
+    python -m benchmarks.bench_async_chatbot --conversations 8,32,128 --db-latency-ms 5
+"""
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+MESSAGES = ['hello', 'diabetes symptoms', 'who are the doctors', 'heart care tips', 'hi there']
+
+def percentile(values, p):
+    values = sorted(values)
+    return round(values[int(p * (len(values) - 1))], 1) if values else None
+
+def saved_messages(app):
+    from models.chat_message import ChatMessage
+    with app.app_context():
+        return ChatMessage.query.count()
+
+def summarize(mode, conversations, latencies, elapsed, statuses, saved):
+    return {
+        "mode": mode,
+        "conversations": conversations,
+        "turns": len(latencies),
+        "throughput_per_s": round(len(latencies) / elapsed, 1),
+        "p50_ms": percentile(latencies, 0.5),
+        "p99_ms": percentile(latencies, 0.99),
+        "statuses": sorted(set(statuses)),
+        "messages_saved": saved,
+    }
+
+def run_sync(app, tokens, turns, threads):
+    client = app.test_client()
+    latencies, statuses = [], []
+
+    def turn(token, i):
+        response = client.post('/api/chatbot', headers={'Authorization': f'Bearer {token}'},
+                               json={'message': MESSAGES[i % len(MESSAGES)]})
+        return response.status_code
+
+    def conversation(token, pool):
+        # Each turn queues for a worker thread, as requests do in a gthread worker
+        for i in range(turns):
+            start = time.perf_counter()
+            status = pool.submit(turn, token, i).result()
+            latencies.append((time.perf_counter() - start) * 1000)
+            statuses.append(status)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool, \
+            ThreadPoolExecutor(max_workers=len(tokens)) as clients:
+        list(clients.map(lambda token: conversation(token, pool), tokens))
+    return latencies, time.perf_counter() - start, statuses
+
+async def run_async(application, tokens, turns):
+    latencies, statuses = [], []
+
+    async def turn(token, i):
+        body = json.dumps({'message': MESSAGES[i % len(MESSAGES)]}).encode()
+        scope = {
+            'type': 'http', 'http_version': '1.1', 'method': 'POST', 'scheme': 'http',
+            'path': '/api/chatbot', 'raw_path': b'/api/chatbot', 'query_string': b'', 'root_path': '',
+            'headers': [(b'content-type', b'application/json'), (b'content-length', str(len(body)).encode()),
+                        (b'authorization', f'Bearer {token}'.encode())],
+            'client': ('127.0.0.1', 50000), 'server': ('localhost', 5000),
+        }
+        sent = []
+
+        async def receive():
+            return {'type': 'http.request', 'body': body, 'more_body': False}
+
+        async def send(message):
+            sent.append(message)
+
+        start = time.perf_counter()
+        await application(scope, receive, send)
+        latencies.append((time.perf_counter() - start) * 1000)
+        statuses.append(sent[0]['status'])
+
+    async def conversation(token):
+        for i in range(turns):
+            await turn(token, i)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(conversation(token) for token in tokens))
+    return latencies, time.perf_counter() - start, statuses
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--conversations', default='8,32,128', help='Comma-separated concurrency levels')
+    parser.add_argument('--turns', type=int, default=20)
+    parser.add_argument('--threads', type=int, default=4, help='Threads of the sync worker (GUNICORN_THREADS)')
+    parser.add_argument('--db-latency-ms', type=float, default=5)
+    args = parser.parse_args()
+    levels = [int(n) for n in args.conversations.split(',')]
+
+    scratch = tempfile.NamedTemporaryFile(suffix='.db', delete=False).name
+    os.environ['DATABASE_URL'] = f'sqlite:///{scratch}'
+    os.environ['ADMISSION_ENABLED'] = 'false'
+    os.environ['NOTIFY_ENABLED'] = 'false'
+    import logging
+    logging.disable(logging.CRITICAL)
+
+    import asgi
+    from flask_jwt_extended import create_access_token
+    from sqlalchemy import event
+    from commands import init_db, create_sample_data
+    from database import db
+    from models.user import User
+    from services.datagen import generate
+    from services.identity import patient_claims
+
+    app = asgi.app
+    delay = args.db_latency_ms / 1000
+
+    def on_statement(statement):
+        if statement.startswith('BEGIN'):
+            time.sleep(delay)
+
+    with app.app_context():
+        init_db()
+        create_sample_data()
+        generate(users=max(levels), doctors=0, appointments=0, reminders=0, messages=0)
+        users = User.query.order_by(User.id).limit(max(levels)).all()
+        tokens = [create_access_token(identity=str(u.id), additional_claims=patient_claims(u)) for u in users]
+        if delay:
+            event.listen(db.engine, 'connect', lambda conn, record: conn.set_trace_callback(on_statement))
+            db.engine.dispose()
+
+    engine = asgi.chatbot._get_engine()
+    if delay and engine is not None:
+        event.listen(engine.sync_engine, 'connect', lambda conn, record: conn.run_async(
+            lambda driver_connection: driver_connection.set_trace_callback(on_statement)))
+
+    async def run_all_async():
+        results = []
+        for n in levels:
+            before = saved_messages(app)
+            latencies, elapsed, statuses = await run_async(asgi.application, tokens[:n], args.turns)
+            results.append(summarize('asgi', n, latencies, elapsed, statuses, saved_messages(app) - before))
+        await asgi.chatbot.aclose()
+        return results
+
+    results = []
+    for n in levels:
+        before = saved_messages(app)
+        latencies, elapsed, statuses = run_sync(app, tokens[:n], args.turns, args.threads)
+        results.append(summarize(f'sync x{args.threads} threads', n, latencies, elapsed, statuses,
+                                 saved_messages(app) - before))
+    results += asyncio.run(run_all_async())
+
+    for r in results:
+        print(json.dumps(r))
+    os.remove(scratch)
+
+if __name__ == '__main__':
+    main()
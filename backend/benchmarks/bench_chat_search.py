@@ -0,0 +1,92 @@
+"""
+Chat transcript search benchmark.
+
+Loads --messages synthetic chat messages (services.datagen) into a scratch
+database, builds the full-text index and reports index build time and search
+latency (p50/p99) for common and rare terms through search_messages.
+
+    python -m benchmarks.bench_chat_search --messages 1000000
+    DATABASE_URL=postgresql://... python -m benchmarks.bench_chat_search
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import tempfile
+import time
+
+QUERIES = {
+    'common': ['diabetes', 'appointment', 'blood sugar', 'heart care'],
+    'rare': ['metformin', 'levothyroxine dose', 'atorvast*'],
+}
+RARE_TEXTS = [
+    'I missed my metformin dose this morning',
+    'Is levothyroxine dose timing important?',
+    'Started atorvastatin last week and feel tired',
+]
+
+def timed(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - t0) * 1000)
+    timings.sort()
+    return {
+        "p50_ms": round(statistics.median(timings), 3),
+        "p99_ms": round(timings[int(0.99 * (len(timings) - 1))], 3),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--messages', type=int, default=200000)
+    parser.add_argument('--users', type=int, default=2000)
+    parser.add_argument('--rare-ratio', type=float, default=0.001, help='Share of messages with rare terms')
+    parser.add_argument('--repeat', type=int, default=50)
+    parser.add_argument('--per-page', type=int, default=20)
+    args = parser.parse_args()
+
+    scratch = None
+    if not os.environ.get('DATABASE_URL'):
+        scratch = tempfile.NamedTemporaryFile(suffix='.db', delete=False).name
+        os.environ['DATABASE_URL'] = f'sqlite:///{scratch}'
+
+    from app import create_app
+    from commands import init_db
+    from database import db
+    from models.chat_message import ChatMessage
+    from services.chat_search import install_search_index, search_messages
+    from services.datagen import generate
+
+    app = create_app({'ADMISSION_ENABLED': False})
+    with app.app_context():
+        init_db()
+        t0 = time.perf_counter()
+        generate(users=args.users, doctors=10, appointments=0, reminders=0, messages=args.messages)
+        load_s = time.perf_counter() - t0
+
+        rng = random.Random(3)
+        rare = int(args.messages * args.rare_ratio)
+        db.session.add_all(ChatMessage(user_id=1, sender='user', text=rng.choice(RARE_TEXTS)) for _ in range(rare))
+        db.session.commit()
+
+        t0 = time.perf_counter()
+        install_search_index(rebuild=True)
+        build_s = time.perf_counter() - t0
+
+        report = {"dialect": db.engine.dialect.name, "messages": args.messages + rare,
+                  "load_s": round(load_s, 1), "index_build_s": round(build_s, 1), "queries": {}}
+        for kind, queries in QUERIES.items():
+            for q in queries:
+                search_messages(q, per_page=args.per_page)  # warm up
+                stats = timed(lambda: search_messages(q, per_page=args.per_page), args.repeat)
+                deep = timed(lambda: search_messages(q, page=50, per_page=args.per_page), max(args.repeat // 5, 1))
+                report["queries"][q] = {"kind": kind, "first_page": stats, "page_50": deep}
+
+    print(json.dumps(report, indent=2))
+    if scratch:
+        os.remove(scratch)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+"""
+Response compression benchmark.
+
+Serializes appointment-list and chat-history payloads the way the API does
+and reports bytes on the wire and CPU cost per response for identity, gzip
+and (if installed) brotli at a few levels.
+
+    python -m benchmarks.bench_compression --rows 500
+"""
+import argparse
+import gzip
+import json
+import time
+
+from flask import Flask
+
+from benchmarks.bench_json import appointment_payload, chat_history_payload
+from services.http_policy import brotli
+from services.json_provider import FastJSONProvider
+
+def codecs():
+    yield 'identity', lambda data: data
+    for level in (1, 6, 9):
+        yield f'gzip-{level}', lambda data, level=level: gzip.compress(data, compresslevel=level, mtime=0)
+    if brotli is not None:
+        for quality in (1, 4, 11):
+            yield f'br-{quality}', lambda data, quality=quality: brotli.compress(data, quality=quality)
+
+def measure(compress, data, repeat):
+    compress(data)  # warm up
+    start = time.process_time()
+    for _ in range(repeat):
+        out = compress(data)
+    return len(out), (time.process_time() - start) / repeat * 1e6
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    app = Flask(__name__)
+    provider = FastJSONProvider(app)
+    payloads = {
+        "appointments": provider.dumps_bytes(appointment_payload(args.rows)),
+        "chat_history": provider.dumps_bytes(chat_history_payload(args.rows)),
+    }
+    report = {}
+    for name, data in payloads.items():
+        report[name] = {}
+        for codec, compress in codecs():
+            size, cpu_us = measure(compress, data, args.repeat)
+            report[name][codec] = {
+                "bytes": size,
+                "ratio": round(size / len(data), 3),
+                "cpu_us": round(cpu_us, 1),
+            }
+    print(json.dumps({"rows": args.rows, "results": report}, indent=2))
+
+if __name__ == "__main__":
+    main()
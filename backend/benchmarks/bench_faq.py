@@ -0,0 +1,75 @@
+"""
+FAQ retrieval benchmark.
+
+Builds a synthetic corpus of --faqs entries, indexes it with FAQIndex and
+reports build time and per-message match latency (p50/p99).
+
+    python -m benchmarks.bench_faq --faqs 10000 --queries 2000
+"""
+import argparse
+import json
+import random
+import statistics
+import time
+
+from services.faq_index import FAQIndex
+
+CONDITIONS = [
+    'diabetes', 'hypertension', 'asthma', 'migraine', 'arthritis', 'thyroid', 'anemia', 'eczema',
+    'psoriasis', 'bronchitis', 'pneumonia', 'influenza', 'gastritis', 'ulcer', 'kidney stone',
+    'cholesterol', 'obesity', 'insomnia', 'depression', 'anxiety', 'allergy', 'sinusitis',
+    'osteoporosis', 'glaucoma', 'cataract', 'vertigo', 'dermatitis', 'hepatitis', 'tuberculosis',
+]
+ASPECTS = [
+    'symptoms', 'causes', 'treatment', 'diet', 'exercise', 'medication', 'side effects', 'diagnosis',
+    'prevention', 'risk factors', 'complications', 'tests', 'recovery', 'in children', 'in pregnancy',
+    'home remedies', 'when to see a doctor', 'long term outlook',
+]
+PHRASES = ['what is', 'what are the', 'how to manage', 'tell me about', 'explain', 'common']
+
+def make_corpus(n, rng):
+    corpus = []
+    for i in range(n):
+        condition, aspect = rng.choice(CONDITIONS), rng.choice(ASPECTS)
+        corpus.append({
+            "category": condition,
+            "question": f"{rng.choice(PHRASES)} {condition} {aspect} {i}",
+            "keywords": rng.sample(ASPECTS, 2) + [f"topic{i % 500}"],
+            "answer": f"Answer {i} about {condition} {aspect}.",
+        })
+    return corpus
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--faqs', type=int, default=10000)
+    parser.add_argument('--queries', type=int, default=2000)
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    corpus = make_corpus(args.faqs, rng)
+    start = time.perf_counter()
+    index = FAQIndex(corpus)
+    build_ms = (time.perf_counter() - start) * 1000
+
+    queries = [f"can you {rng.choice(PHRASES)} {rng.choice(CONDITIONS)} {rng.choice(ASPECTS)} please"
+               for _ in range(args.queries)]
+    for q in queries[:50]:
+        index.search(q)  # warm up
+    timings = []
+    for q in queries:
+        t0 = time.perf_counter()
+        index.search(q, k=3, threshold=0.35)
+        timings.append((time.perf_counter() - t0) * 1000)
+    timings.sort()
+    print(json.dumps({
+        "faqs": args.faqs,
+        "vocabulary": len(index.vocab),
+        "build_ms": round(build_ms, 1),
+        "match_p50_ms": round(statistics.median(timings), 4),
+        "match_p99_ms": round(timings[int(0.99 * (len(timings) - 1))], 4),
+        "match_mean_ms": round(statistics.fmean(timings), 4),
+    }, indent=2))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+"""
+JSON serialization benchmark.
+
+Serializes large appointment-list and chat-history payloads through Flask's
+default provider and through FastJSONProvider with each available backend,
+and reports CPU time per response.
+
+    python -m benchmarks.bench_json --rows 2000 --repeat 200
+"""
+import argparse
+import json
+import time
+from datetime import datetime, timedelta
+
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+
+from services.json_provider import FastJSONProvider, orjson
+
+def appointment_payload(rows):
+    start = datetime(2025, 6, 8, 9, 0)
+    return [{
+        "id": i,
+        "doctor_name": "Dr. Priya Sharma",
+        "doctor_id": i % 40,
+        "time": start + timedelta(minutes=30 * i),
+        "status": "Scheduled" if i % 3 else "Completed",
+        "reason": "Follow-up consultation for blood sugar management",
+    } for i in range(rows)]
+
+def chat_history_payload(rows):
+    return {"history": [{
+        "sender": "user" if i % 2 == 0 else "bot",
+        "text": "Common symptoms include increased thirst, frequent urination, fatigue, and blurred vision.",
+    } for i in range(rows)]}
+
+def make_provider(kind):
+    app = Flask(__name__)
+    if kind == 'flask-default':
+        return app, DefaultJSONProvider(app)
+    app.config['JSON_BACKEND'] = kind
+    return app, FastJSONProvider(app)
+
+def bench(kind, payload, repeat):
+    app, provider = make_provider(kind)
+    with app.app_context():
+        provider.response(payload)  # warm up
+        start = time.process_time()
+        for _ in range(repeat):
+            response = provider.response(payload)
+        elapsed = time.process_time() - start
+    return elapsed / repeat * 1e6, len(response.get_data())
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=100)
+    args = parser.parse_args()
+
+    kinds = ['flask-default', 'stdlib'] + (['orjson'] if orjson is not None else [])
+    payloads = {
+        "appointments": appointment_payload(args.rows),
+        "chat_history": chat_history_payload(args.rows),
+    }
+    report = {}
+    for name, payload in payloads.items():
+        results = {kind: bench(kind, payload, args.repeat) for kind in kinds}
+        baseline_us = results['flask-default'][0]
+        report[name] = {
+            kind: {
+                "cpu_us_per_response": round(us, 1),
+                "bytes": size,
+                "cpu_saved_us": round(baseline_us - us, 1),
+                "speedup": round(baseline_us / us, 2),
+            } for kind, (us, size) in results.items()
+        }
+    print(json.dumps({"rows": args.rows, "results": report}, indent=2))
+
+if __name__ == "__main__":
+    main()
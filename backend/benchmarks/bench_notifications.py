@@ -0,0 +1,110 @@
+"""
+Notification pipeline benchmark.
+
+Pushes --events appointment events through the notifier into an in-memory
+sink that simulates --sink-latency-ms per batch (and fails --failure-rate of
+batches to exercise retries), then reports throughput, batch sizes and
+enqueue-to-delivery lag (p50/p99).
+
+    python -m benchmarks.bench_notifications --events 20000 --workers 4 --sink-latency-ms 20
+"""
+import argparse
+import json
+import os
+import random
+import tempfile
+import threading
+import time
+
+class BenchSink:
+    def __init__(self, latency, failure_rate, seed):
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.delivered = 0
+        self.batches = []
+        self.lags = []
+
+    def send_batch(self, messages):
+        time.sleep(self.latency)
+        with self.lock:
+            if self.rng.random() < self.failure_rate:
+                raise ConnectionError("simulated sink failure")
+            now = time.time()
+            self.delivered += len(messages)
+            self.batches.append(len(messages))
+            self.lags.extend((now - m['enqueued_at']) * 1000 for m in messages)
+
+def percentile(values, p):
+    values = sorted(values)
+    return round(values[int(p * (len(values) - 1))], 1) if values else None
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--events', type=int, default=10000)
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--batch-size', type=int, default=50)
+    parser.add_argument('--batch-wait-ms', type=int, default=200)
+    parser.add_argument('--sink-latency-ms', type=float, default=10)
+    parser.add_argument('--failure-rate', type=float, default=0.0)
+    parser.add_argument('--rate', type=float, default=0, help='Events per second to offer (0 = as fast as possible)')
+    args = parser.parse_args()
+
+    scratch = tempfile.NamedTemporaryFile(suffix='.db', delete=False).name
+    os.environ.setdefault('DATABASE_URL', f'sqlite:///{scratch}')
+    from app import create_app
+    from commands import init_db
+    from services import notifications
+    from services.datagen import generate
+
+    sink = BenchSink(args.sink_latency_ms / 1000, args.failure_rate, seed=5)
+    render = notifications.render
+
+    def render_with_timestamps(events):
+        messages = render(events)
+        stamps = {e.appointment_id: e.enqueued_at for e in events}
+        for m in messages:
+            m['enqueued_at'] = stamps[m['appointment_id']]
+        return messages
+
+    notifications.render = render_with_timestamps
+    notifications.register_sink('bench', lambda config: sink)
+    app = create_app({'SQLALCHEMY_DATABASE_URI': f'sqlite:///{scratch}', 'ADMISSION_ENABLED': False,
+                      'NOTIFY_SINKS': 'bench', 'NOTIFY_WORKERS': args.workers,
+                      'NOTIFY_BATCH_SIZE': args.batch_size, 'NOTIFY_BATCH_WAIT_MS': args.batch_wait_ms,
+                      'NOTIFY_RETRY_BASE_SECONDS': 0.05, 'NOTIFY_QUEUE_SIZE': args.events + 1})
+    with app.app_context():
+        init_db()
+        generate(users=args.users, doctors=20, appointments=0, reminders=0, messages=0)
+
+    notifier = app.extensions['notifications']
+    rng = random.Random(1)
+    start = time.perf_counter()
+    for i in range(args.events):
+        notifier.enqueue(notifications.NotificationEvent(
+            rng.choice(['booked', 'cancelled', 'rescheduled', 'completed']), i + 1,
+            rng.randint(1, args.users), rng.randint(1, 20), '2030-01-01 10:00', time.time()
+        ))
+        if args.rate:
+            time.sleep(1 / args.rate)
+    enqueue_s = time.perf_counter() - start
+    notifier.flush(timeout=600)
+    total_s = time.perf_counter() - start
+    notifier.shutdown()
+
+    print(json.dumps({
+        "events": args.events,
+        "delivered": sink.delivered,
+        "enqueue_us_per_event": round(enqueue_s / args.events * 1e6, 2),
+        "throughput_per_s": round(sink.delivered / total_s, 1),
+        "batches": len(sink.batches),
+        "mean_batch": round(sum(sink.batches) / max(len(sink.batches), 1), 1),
+        "lag_p50_ms": percentile(sink.lags, 0.5),
+        "lag_p99_ms": percentile(sink.lags, 0.99),
+    }, indent=2))
+    os.remove(scratch)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,313 @@
+"""
+Route-level microbenchmarks with SQL query budgets.
+
+Runs every blueprint's endpoints through the Flask test client against a
+seeded SQLite database, recording time per call and the number of SQL
+statements executed. Fails (exit status 1) when an endpoint exceeds its
+declared query budget or the query count recorded in route_baseline.json.
+Commits that change an endpoint's query count refresh the file with
+--update-baseline.
+
+    python -m benchmarks.bench_routes --patients 200 --appointments-per-patient 20
+    python -m benchmarks.bench_routes --update-baseline
+    python -m benchmarks.bench_routes --only appointment_bp
+
+Query budgets are per call and must not depend on data size: a loop that
+issues one query per row shows up as a budget failure at any scale.
+
+Wall-clock times depend on the machine, so comparing them is opt-in and only
+against a run on the same machine: the first run with --timings records
+median times to that file, later runs fail when a median regresses past
+--tolerance (--update-timings re-records).
+
+    python -m benchmarks.bench_routes --timings /tmp/route_timings.json
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Callable
+
+from sqlalchemy import event
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'route_baseline.json')
+
+@dataclass
+class RouteCase:
+    blueprint: str
+    name: str
+    query_budget: int
+    build: Callable  # (ctx, iteration) -> kwargs for test_client.open
+
+def future_slot(i):
+    start = datetime.now().replace(second=0, microsecond=0) + timedelta(days=400)
+    return (start + timedelta(minutes=15 * i)).strftime('%Y-%m-%d %H:%M')
+
+CASES = [
+    # auth_bp
+    RouteCase('auth_bp', 'POST /api/auth/login', 3, lambda c, i: dict(
+        method='POST', path='/api/auth/login', json={'email': c.email, 'password': c.password})),
+    RouteCase('auth_bp', 'GET /api/auth/me', 0, lambda c, i: dict(
+        method='GET', path='/api/auth/me', headers=c.patient_auth)),
+    RouteCase('auth_bp', 'POST /api/auth/logout', 1, lambda c, i: dict(
+        method='POST', path='/api/auth/logout', headers=c.patient_auth)),
+    # appointment_bp
+    RouteCase('appointment_bp', 'GET /api/doctors', 1, lambda c, i: dict(
+        method='GET', path='/api/doctors')),
+    RouteCase('appointment_bp', 'GET /api/doctors/<id>', 1, lambda c, i: dict(
+        method='GET', path=f'/api/doctors/{c.doctor_id}')),
+    RouteCase('appointment_bp', 'GET /api/appointments/my', 1, lambda c, i: dict(
+        method='GET', path='/api/appointments/my', headers=c.patient_auth)),
+    RouteCase('appointment_bp', 'GET /api/appointments/history', 2, lambda c, i: dict(
+        method='GET', path='/api/appointments/history', headers=c.patient_auth)),
+    RouteCase('appointment_bp', 'POST /api/appointments/book', 6, lambda c, i: dict(
+        method='POST', path='/api/appointments/book', headers=c.patient_auth,
+        json={'doctor_id': c.doctor_id, 'time': future_slot(i), 'reason': 'Benchmark booking'})),
+    RouteCase('appointment_bp', 'PUT /api/appointments/<id>', 5, lambda c, i: dict(
+        method='PUT', path=f'/api/appointments/{c.next_appointment()}', headers=c.patient_auth,
+        json={'time': future_slot(100000 + i)})),
+    RouteCase('appointment_bp', 'DELETE /api/appointments/<id>', 3, lambda c, i: dict(
+        method='DELETE', path=f'/api/appointments/{c.next_appointment()}', headers=c.patient_auth)),
+    RouteCase('appointment_bp', 'POST /api/reminders', 2, lambda c, i: dict(
+        method='POST', path='/api/reminders', headers=c.patient_auth,
+        json={'medication': 'Metformin', 'time': '08:00'})),
+    RouteCase('appointment_bp', 'GET /api/reminders/my', 1, lambda c, i: dict(
+        method='GET', path='/api/reminders/my', headers=c.patient_auth)),
+    # chatbot_bp
+    RouteCase('chatbot_bp', 'POST /api/chatbot (anonymous FAQ)', 0, lambda c, i: dict(
+        method='POST', path='/api/chatbot', json={'message': 'diabetes symptoms'})),
+    RouteCase('chatbot_bp', 'POST /api/chatbot (patient FAQ)', 2, lambda c, i: dict(
+        method='POST', path='/api/chatbot', headers=c.patient_auth, json={'message': 'diabetes symptoms'})),
+    RouteCase('chatbot_bp', 'GET /api/chatbot/history', 2, lambda c, i: dict(
+        method='GET', path='/api/chatbot/history', headers=c.patient_auth)),
+    # doctor_bp
+    RouteCase('doctor_bp', 'POST /api/doctor/login', 1, lambda c, i: dict(
+        method='POST', path='/api/doctor/login',
+        json={'email': 'doctor_rajesh@clinic.com', 'password': 'doctor123'})),
+    RouteCase('doctor_bp', 'GET /api/doctor/me', 1, lambda c, i: dict(
+        method='GET', path='/api/doctor/me', headers=c.doctor_auth)),
+    RouteCase('doctor_bp', 'GET /api/doctor/appointments', 1, lambda c, i: dict(
+        method='GET', path='/api/doctor/appointments', headers=c.doctor_auth)),
+    RouteCase('doctor_bp', 'GET /api/doctor/appointments/history', 2, lambda c, i: dict(
+        method='GET', path='/api/doctor/appointments/history', headers=c.doctor_auth)),
+    RouteCase('doctor_bp', 'PUT /api/doctor/appointments/<id>/complete', 3, lambda c, i: dict(
+        method='PUT', path=f'/api/doctor/appointments/{c.next_doctor_appointment()}/complete',
+        headers=c.doctor_auth)),
+    # bootstrap_bp
+    RouteCase('bootstrap_bp', 'GET /api/bootstrap', 4, lambda c, i: dict(
+        method='GET', path='/api/bootstrap', headers=c.patient_auth)),
+    RouteCase('bootstrap_bp', 'GET /api/bootstrap?fields=appointments.id,...', 1, lambda c, i: dict(
+        method='GET', path='/api/bootstrap?fields=appointments.id,appointments.time,appointments.status',
+        headers=c.patient_auth)),
+    RouteCase('bootstrap_bp', 'GET /api/bootstrap?fields=appointments,reminders', 2, lambda c, i: dict(
+        method='GET', path=c.uncached('/api/bootstrap?fields=appointments,reminders'), headers=c.patient_auth)),
+    # The dashboard poll once the list responses are cached
+    RouteCase('bootstrap_bp', 'GET /api/bootstrap?fields=appointments,reminders (cached)', 0, lambda c, i: dict(
+        method='GET', path=c.warm('/api/bootstrap?fields=appointments,reminders', c.patient_auth),
+        headers=c.patient_auth)),
+    RouteCase('bootstrap_bp', 'GET /api/doctor/bootstrap', 2, lambda c, i: dict(
+        method='GET', path='/api/doctor/bootstrap', headers=c.doctor_auth)),
+    # calendar_bp
+    RouteCase('calendar_bp', 'GET /api/calendar/feed-url', 0, lambda c, i: dict(
+        method='GET', path='/api/calendar/feed-url', headers=c.patient_auth)),
+    RouteCase('calendar_bp', 'GET /api/calendar/<token>.ics', 2, lambda c, i: dict(
+        method='GET', path=c.patient_feed)),
+    RouteCase('calendar_bp', 'GET /api/calendar/<token>.ics (If-None-Match)', 0, lambda c, i: dict(
+        method='GET', path=c.patient_feed, headers={'If-None-Match': c.feed_etag(c.patient_feed)})),
+    RouteCase('calendar_bp', 'GET /api/calendar/<token>.ics (doctor)', 1, lambda c, i: dict(
+        method='GET', path=c.doctor_feed)),
+]
+
+class Context:
+    """Seeded ids and tokens shared by the cases."""
+
+    def __init__(self, app, patients, appointments_per_patient, reminders_per_patient, messages_per_patient):
+        from flask_jwt_extended import create_access_token
+        from commands import init_db, create_sample_data
+        from database import db
+        from models.appointment import Appointment
+        from models.chat_message import ChatMessage
+        from models.doctor import Doctor
+        from models.reminder import Reminder
+        from models.user import User
+        from services.calendar_feed import feed_token
+        from services.identity import doctor_claims, patient_claims, principals
+
+        self.app = app
+        self.password = 'benchmark123'
+        with app.app_context():
+            init_db()
+            create_sample_data()
+            doctors = Doctor.query.all()
+            probe = User(email='probe@example.com')
+            probe.set_password(self.password)
+            password_hash = probe.password_hash
+
+            db.session.bulk_insert_mappings(User, [
+                {'email': f'patient{n}@example.com', 'password_hash': password_hash} for n in range(patients)
+            ])
+            db.session.commit()
+            user_ids = [u.id for u in User.query.with_entities(User.id).all()]
+            base = datetime.now() + timedelta(days=1)
+            rows, reminders, messages = [], [], []
+            for user_id in user_ids:
+                for k in range(appointments_per_patient):
+                    doctor = doctors[(user_id + k) % len(doctors)]
+                    rows.append({'user_id': user_id, 'doctor_id': doctor.id, 'status': 'Scheduled',
+                                 'time': base + timedelta(minutes=30 * (user_id * appointments_per_patient + k)),
+                                 'reason': 'Seeded appointment'})
+                reminders += [{'user_id': user_id, 'medication': f'Medication {k}', 'time': '08:00'}
+                              for k in range(reminders_per_patient)]
+                messages += [{'user_id': user_id, 'sender': 'user' if k % 2 == 0 else 'bot', 'text': 'Seeded message'}
+                             for k in range(messages_per_patient)]
+            db.session.bulk_insert_mappings(Appointment, rows)
+            db.session.bulk_insert_mappings(Reminder, reminders)
+            db.session.bulk_insert_mappings(ChatMessage, messages)
+            db.session.commit()
+
+            self.email = 'patient0@example.com'
+            self.user_id = user_ids[0]
+            self.doctor_id = doctors[0].id
+            # Same claims as the login endpoints issue
+            patient_token = create_access_token(identity=str(self.user_id),
+                                                additional_claims=patient_claims(db.session.get(User, self.user_id)))
+            doctor_token = create_access_token(identity=f"doctor_{self.doctor_id}",
+                                               additional_claims=doctor_claims(principals.doctor(self.doctor_id),
+                                                                               'doctor_rajesh@clinic.com'))
+            # Steady state: the revocation check's principal lookup is cached per worker
+            principals.user(self.user_id)
+            self.patient_auth = {'Authorization': f'Bearer {patient_token}'}
+            self.doctor_auth = {'Authorization': f'Bearer {doctor_token}'}
+            self.patient_feed = f"/api/calendar/{feed_token('user', self.user_id)}.ics"
+            self.doctor_feed = f"/api/calendar/{feed_token('doctor', self.doctor_id)}.ics"
+            self._appointments = iter(a.id for a in Appointment.query.filter_by(user_id=self.user_id).all())
+            self._doctor_appointments = iter(a.id for a in Appointment.query.filter(
+                Appointment.doctor_id == self.doctor_id, Appointment.user_id != self.user_id).all())
+
+    def next_appointment(self):
+        return next(self._appointments)
+
+    def next_doctor_appointment(self):
+        return next(self._doctor_appointments)
+
+    def uncached(self, path):
+        from services.user_cache import response_cache
+        response_cache.clear()
+        return path
+
+    def warm(self, path, headers):
+        self.app.test_client().get(path, headers=headers)
+        return path
+
+    def feed_etag(self, path):
+        # What a calendar client that already polled the feed would send back
+        return self.app.test_client().get(path).headers['ETag']
+
+class QueryCounter:
+    def __init__(self, engine):
+        self.count = 0
+        event.listen(engine, 'before_cursor_execute', self._on_execute)
+
+    def _on_execute(self, *args):
+        self.count += 1
+
+def run_case(client, counter, ctx, case, calls):
+    timings, queries, statuses = [], [], set()
+    for i in range(calls):
+        kwargs = case.build(ctx, i)
+        counter.count = 0
+        start = time.perf_counter()
+        response = client.open(**kwargs)
+        timings.append(time.perf_counter() - start)
+        queries.append(counter.count)
+        statuses.add(response.status_code)
+    return {
+        "median_ms": round(statistics.median(timings) * 1000, 3),
+        "max_queries": max(queries),
+        "query_budget": case.query_budget,
+        "statuses": sorted(statuses),
+    }
+
+def load_json(path):
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+def write_json(path, data):
+    with open(path, 'w') as f:
+        json.dump(data, f, indent=2, sort_keys=True)
+        f.write('\n')
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--patients', type=int, default=100)
+    parser.add_argument('--appointments-per-patient', type=int, default=20)
+    parser.add_argument('--reminders-per-patient', type=int, default=5)
+    parser.add_argument('--messages-per-patient', type=int, default=40)
+    parser.add_argument('--calls', type=int, default=10, help='calls per endpoint')
+    parser.add_argument('--only', nargs='*', help='blueprints to run, e.g. auth_bp doctor_bp')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help='recorded query counts')
+    parser.add_argument('--update-baseline', action='store_true', help='rewrite the recorded query counts')
+    parser.add_argument('--timings', help='median times from an earlier run on this machine; recorded if missing')
+    parser.add_argument('--update-timings', action='store_true', help='re-record the --timings file')
+    parser.add_argument('--tolerance', type=float, default=0.5, help='allowed median time regression fraction')
+    args = parser.parse_args()
+
+    if args.appointments_per_patient < args.calls * 2:
+        parser.error('--appointments-per-patient must be at least 2 x --calls (cases consume appointments)')
+
+    import logging
+    logging.disable(logging.CRITICAL)
+    path = os.path.join(tempfile.mkdtemp(), 'bench_routes.db')
+    os.environ.setdefault('DATABASE_URL', f'sqlite:///{path}')
+    from app import create_app
+    from database import db
+
+    app = create_app({'SQLALCHEMY_DATABASE_URI': f'sqlite:///{path}', 'TESTING': True,
+                      'ADMISSION_ENABLED': False,
+                      # Worker threads would add their queries to whichever route runs next
+                      'NOTIFY_ENABLED': False})
+    ctx = Context(app, args.patients, args.appointments_per_patient, args.reminders_per_patient,
+                  args.messages_per_patient)
+
+    with app.app_context():
+        counter = QueryCounter(db.engine)
+    client = app.test_client()
+    cases = [c for c in CASES if not args.only or c.blueprint in args.only]
+    results = {case.name: run_case(client, counter, ctx, case, args.calls) for case in cases}
+
+    baseline = load_json(args.baseline)
+    timings = load_json(args.timings) if args.timings and not args.update_timings else {}
+
+    failures = []
+    print(f"{'endpoint':<60} {'median ms':>10} {'queries':>8} {'budget':>7}  statuses")
+    for name, r in results.items():
+        print(f"{name:<60} {r['median_ms']:>10.3f} {r['max_queries']:>8} {r['query_budget']:>7}  {r['statuses']}")
+        if r['max_queries'] > r['query_budget']:
+            failures.append(f"{name}: {r['max_queries']} queries exceeds budget of {r['query_budget']}")
+        recorded = baseline.get(name)
+        if recorded and not args.update_baseline and r['max_queries'] > recorded['max_queries']:
+            failures.append(f"{name}: {r['max_queries']} queries, recorded {recorded['max_queries']}")
+        before = timings.get(name)
+        if before and r['median_ms'] > before['median_ms'] * (1 + args.tolerance):
+            failures.append(f"{name}: median {before['median_ms']} -> {r['median_ms']} ms")
+
+    if args.update_baseline:
+        write_json(args.baseline, {name: {"max_queries": r["max_queries"]} for name, r in results.items()})
+        print(f"Query counts written to {args.baseline}")
+    if args.timings and (args.update_timings or not os.path.exists(args.timings)):
+        write_json(args.timings, {name: {"median_ms": r["median_ms"]} for name, r in results.items()})
+        print(f"Timings written to {args.timings}")
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    sys.exit(1 if failures else 0)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+"""
+Worker cold-start benchmark.
+
+Measures, in fresh interpreters, how long it takes to import the application
+module (which builds the app through `create_app`) and, for comparison, how
+long the old import-time bootstrap (create tables + seed) adds on top.
+
+    python -m benchmarks.bench_startup --runs 10
+    DATABASE_URL=postgresql://... python -m benchmarks.bench_startup
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+IMPORT_SNIPPET = """
+import time, json
+t0 = time.perf_counter()
+import app
+t1 = time.perf_counter()
+result = {"import_ms": (t1 - t0) * 1000}
+if BOOTSTRAP:
+    from commands import init_db, create_sample_data
+    with app.app.app_context():
+        init_db()
+        create_sample_data()
+    result["bootstrap_ms"] = (time.perf_counter() - t1) * 1000
+print(json.dumps(result))
+"""
+
+def run_once(env, bootstrap):
+    code = f"BOOTSTRAP = {bootstrap!r}\n" + IMPORT_SNIPPET
+    out = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True, check=True
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+def summarize(samples):
+    return {
+        "min_ms": round(min(samples), 2),
+        "median_ms": round(statistics.median(samples), 2),
+        "max_ms": round(max(samples), 2),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    tmpdir = None
+    if not env.get("DATABASE_URL"):
+        tmpdir = tempfile.mkdtemp()
+        env["DATABASE_URL"] = f"sqlite:///{os.path.join(tmpdir, 'bench_startup.db')}"
+
+    imports = [run_once(env, False)["import_ms"] for _ in range(args.runs)]
+    bootstraps = [run_once(env, True) for _ in range(args.runs)]
+
+    report = {
+        "worker_import": summarize(imports),
+        "import_plus_bootstrap": summarize([b["import_ms"] + b["bootstrap_ms"] for b in bootstraps]),
+        "bootstrap_only": summarize([b["bootstrap_ms"] for b in bootstraps]),
+    }
+    print(json.dumps(report, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Regression check for the chatbot's multi-step flows.
+
+Drives booking, reminder and onboarding conversations through
+`get_bot_response` with replies that look like FAQ material (doctor IDs,
+"Insulin", ages, "type 2 diabetes") and fails (exit status 1) if any step is
+answered with an FAQ instead of advancing the flow. The final step of the
+booking and reminder flows calls the running API over HTTP; without a server
+on localhost:5000 it reports an error, which is still the flow finishing.
+
+    python -m benchmarks.check_chatbot_flows
+"""
+import os
+import sys
+import tempfile
+
+# (reply, expected start of the bot's answer) per step
+FLOWS = {
+    'booking': [
+        ('book appointment', "Let’s book an appointment"),
+        ('1', "Selected "),
+        (None, "Great! I’m holding this slot"),  # a future time, filled in below
+        ('insulin review for type 2 diabetes', ("Appointment booked", "Failed to book", "Error booking")),
+    ],
+    'reminder': [
+        ('set reminder', "Let’s set a medication reminder"),
+        ('Insulin', "Got it, insulin"),
+        ('08:00', ("Reminder set", "Failed to set reminder", "Error setting reminder")),
+    ],
+    'onboarding': [
+        ('onboard', "Let’s set up your profile"),
+        ('Diabetes Heart', "Thanks! How old are you?"),
+        ('2', "Got it. Please share any relevant medical history"),
+        ('type 1 diabetes, insulin', "Onboarding complete!"),
+    ],
+}
+
+def main():
+    scratch = tempfile.NamedTemporaryFile(suffix='.db', delete=False).name
+    os.environ['DATABASE_URL'] = f'sqlite:///{scratch}'
+    os.environ['ADMISSION_ENABLED'] = 'false'
+    os.environ['NOTIFY_ENABLED'] = 'false'
+    import logging
+    logging.disable(logging.CRITICAL)
+
+    from datetime import datetime, timedelta
+    from app import app
+    from commands import init_db, create_sample_data
+    from database import db
+    from models.user import User
+    from services.chatbot_engine import get_bot_response
+
+    slot = (datetime.now() + timedelta(days=30)).replace(hour=10, minute=0).strftime('%Y-%m-%d %H:%M')
+    failures = []
+    with app.app_context():
+        init_db()
+        create_sample_data()
+        for name, steps in FLOWS.items():
+            user = User(email=f'{name}@example.com')
+            user.set_password('flowcheck123')
+            db.session.add(user)
+            db.session.commit()
+            with app.test_request_context():
+                for reply, expected in steps:
+                    reply = reply or slot
+                    answer = get_bot_response(reply, str(user.id))
+                    ok = answer.startswith(expected)
+                    print(f"{'ok  ' if ok else 'FAIL'} {name}: {reply!r} -> {answer.splitlines()[0][:70]!r}")
+                    if not ok:
+                        failures.append(f"{name}: {reply!r} answered {answer.splitlines()[0]!r}")
+                        break
+
+    os.remove(scratch)
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    sys.exit(1 if failures else 0)
+
+if __name__ == '__main__':
+    main()
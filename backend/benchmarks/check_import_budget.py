@@ -0,0 +1,101 @@
+"""
+Import-time and memory budget check for backend startup.
+
+Imports the application in a fresh interpreter under `python -X importtime`
+and fails (exit status 1) if the import takes longer than the budget, if the
+process RSS grows more than allowed, or if any of the lazily-loaded SDKs were
+pulled in at startup.
+
+    python -m benchmarks.check_import_budget
+    python -m benchmarks.check_import_budget --max-import-ms 800 --max-rss-mb 80
+
+Budgets can also be set with IMPORT_BUDGET_MS and IMPORT_BUDGET_RSS_MB.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# SDKs that must only be imported on first use
+LAZY_MODULES = ['google.oauth2', 'google.auth.transport', 'agora_token_builder', 'numpy', 'scipy']
+
+PROBE = """
+import json, resource, sys
+before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+import app
+after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(json.dumps({"rss_before_kb": before, "rss_after_kb": after, "modules": sorted(sys.modules)}))
+"""
+
+def parse_importtime(stderr):
+    """Return {module: (self_us, cumulative_us)} from -X importtime output."""
+    timings = {}
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        try:
+            self_us, cumulative_us, name = line[len('import time:'):].split('|')
+            timings[name.strip()] = (int(self_us), int(cumulative_us))
+        except ValueError:
+            continue
+    return timings
+
+def measure(env):
+    out = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', PROBE],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True, check=True
+    )
+    probe = json.loads(out.stdout.strip().splitlines()[-1])
+    timings = parse_importtime(out.stderr)
+    # The app module's cumulative time covers everything it pulls in
+    import_us = timings.get('app', (0, sum(t[0] for t in timings.values())))[1]
+    # ru_maxrss is reported in kilobytes on Linux
+    rss_growth_mb = (probe['rss_after_kb'] - probe['rss_before_kb']) / 1024
+    slowest = sorted(timings.items(), key=lambda kv: kv[1][0], reverse=True)[:10]
+    return {
+        'import_ms': import_us / 1000,
+        'rss_growth_mb': rss_growth_mb,
+        'modules': probe['modules'],
+        'slowest_self_ms': [(name, self_us / 1000) for name, (self_us, _) in slowest],
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--max-import-ms', type=float, default=float(os.getenv('IMPORT_BUDGET_MS', '1500')))
+    parser.add_argument('--max-rss-mb', type=float, default=float(os.getenv('IMPORT_BUDGET_RSS_MB', '120')))
+    parser.add_argument('--runs', type=int, default=3, help='best of N runs is compared to the budget')
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    if not env.get('DATABASE_URL'):
+        env['DATABASE_URL'] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'import_budget.db')}"
+
+    runs = [measure(env) for _ in range(args.runs)]
+    best = min(runs, key=lambda r: r['import_ms'])
+    rss_growth_mb = min(r['rss_growth_mb'] for r in runs)
+    eager = [m for m in LAZY_MODULES if m in best['modules']]
+
+    print(f"import time: {best['import_ms']:.1f} ms (budget {args.max_import_ms:.0f} ms)")
+    print(f"RSS growth:  {rss_growth_mb:.1f} MB (budget {args.max_rss_mb:.0f} MB)")
+    print("slowest modules (self time):")
+    for name, ms in best['slowest_self_ms']:
+        print(f"  {ms:8.1f} ms  {name}")
+
+    failures = []
+    if best['import_ms'] > args.max_import_ms:
+        failures.append(f"import time {best['import_ms']:.1f} ms exceeds {args.max_import_ms:.0f} ms")
+    if rss_growth_mb > args.max_rss_mb:
+        failures.append(f"RSS growth {rss_growth_mb:.1f} MB exceeds {args.max_rss_mb:.0f} MB")
+    if eager:
+        failures.append(f"lazily-loaded SDKs imported at startup: {', '.join(eager)}")
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    sys.exit(1 if failures else 0)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,154 @@
+"""
+Compare gunicorn worker models on the API's endpoint mix.
+
+For each worker class, starts gunicorn with gunicorn.conf.py against a
+seeded SQLite database, drives it with concurrent clients for a fixed
+duration and reports throughput, latency percentiles and errors.
+
+    python -m benchmarks.load_worker_models --clients 32 --duration 15
+    python -m benchmarks.load_worker_models --worker-classes gthread gevent
+"""
+import argparse
+import itertools
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+
+import requests
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# (weight, method, path, needs_auth, json body)
+ENDPOINT_MIX = [
+    (4, 'GET', '/api/doctors', False, None),
+    (2, 'GET', '/api/doctors/1', False, None),
+    (4, 'GET', '/api/appointments/my', True, None),
+    (3, 'GET', '/api/reminders/my', True, None),
+    (2, 'GET', '/api/auth/me', True, None),
+    (2, 'POST', '/api/chatbot', False, {"message": "tell me about diabetes symptoms"}),
+    (1, 'GET', '/api/health', False, None),
+]
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+def prepare_database(path=None):
+    """Create and seed the schema in a SQLite file, or in DATABASE_URL if no path is given."""
+    env = dict(os.environ)
+    if path:
+        env['DATABASE_URL'] = f"sqlite:///{path}"
+    for command in ('init-db', 'seed'):
+        subprocess.run([sys.executable, '-m', 'flask', '--app', 'app', command],
+                       cwd=BACKEND_DIR, env=env, check=True, capture_output=True)
+    return env
+
+def start_server(env, worker_class, workers, threads, port):
+    env = dict(env, GUNICORN_WORKER_CLASS=worker_class, WEB_CONCURRENCY=str(workers),
+               GUNICORN_THREADS=str(threads), GUNICORN_BIND=f"127.0.0.1:{port}",
+               GUNICORN_ACCESS_LOG='/dev/null', GUNICORN_MAX_REQUESTS='0')
+    # Every simulated client shares one IP; set ADMISSION_ENABLED=true to load-test the limiter itself
+    env.setdefault('ADMISSION_ENABLED', 'false')
+    proc = subprocess.Popen([sys.executable, '-m', 'gunicorn', 'app:app'], cwd=BACKEND_DIR, env=env,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    base = f"http://127.0.0.1:{port}"
+    for _ in range(100):
+        try:
+            if requests.get(f"{base}/api/health", timeout=1).ok:
+                return proc, base
+        except requests.RequestException:
+            pass
+        time.sleep(0.2)
+    proc.terminate()
+    raise RuntimeError(f"gunicorn ({worker_class}) did not become ready")
+
+def register(base):
+    email = f"load-{uuid.uuid4().hex[:8]}@example.com"
+    r = requests.post(f"{base}/api/auth/register", json={"email": email, "password": "secret123"}, timeout=10)
+    r.raise_for_status()
+    return r.json()['token']
+
+def drive(base, token, clients, duration):
+    schedule = list(itertools.chain.from_iterable([entry] * entry[0] for entry in ENDPOINT_MIX))
+    latencies, errors = [], [0]
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+
+    def client(offset):
+        session = requests.Session()
+        local, local_errors = [], 0
+        for i in itertools.count(offset):
+            if time.perf_counter() >= deadline:
+                break
+            _, method, path, needs_auth, body = schedule[i % len(schedule)]
+            headers = {'Authorization': f'Bearer {token}'} if needs_auth else {}
+            start = time.perf_counter()
+            try:
+                r = session.request(method, base + path, json=body, headers=headers, timeout=30)
+                if r.status_code >= 500:
+                    local_errors += 1
+            except requests.RequestException:
+                local_errors += 1
+            local.append(time.perf_counter() - start)
+        with lock:
+            latencies.extend(local)
+            errors[0] += local_errors
+
+    threads = [threading.Thread(target=client, args=(n,)) for n in range(clients)]
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    pct = lambda p: latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1000
+    return {
+        "requests": len(latencies),
+        "throughput_rps": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(pct(0.50), 2),
+        "p95_ms": round(pct(0.95), 2),
+        "p99_ms": round(pct(0.99), 2),
+        "mean_ms": round(statistics.fmean(latencies) * 1000, 2) if latencies else None,
+        "errors": errors[0],
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--worker-classes', nargs='+', default=['sync', 'gthread', 'gevent'])
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--threads', type=int, default=4)
+    parser.add_argument('--clients', type=int, default=16)
+    parser.add_argument('--duration', type=float, default=10)
+    args = parser.parse_args()
+
+    env = prepare_database(os.path.join(tempfile.mkdtemp(), 'load.db'))
+    report = {}
+    for worker_class in args.worker_classes:
+        if worker_class == 'gevent':
+            try:
+                import gevent  # noqa: F401
+            except ImportError:
+                report[worker_class] = {"skipped": "gevent not installed"}
+                continue
+        proc, base = start_server(env, worker_class, args.workers, args.threads, free_port())
+        try:
+            token = register(base)
+            report[worker_class] = drive(base, token, args.clients, args.duration)
+        finally:
+            proc.terminate()
+            proc.wait(timeout=60)
+    print(json.dumps({"workers": args.workers, "threads": args.threads, "clients": args.clients,
+                      "results": report}, indent=2))
+
+if __name__ == '__main__':
+    main()
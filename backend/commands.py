@@ -0,0 +1,241 @@
+# commands.py
+import click
+import logging
+
+from database import db
+
+logger = logging.getLogger(__name__)
+
+def init_db():
+    """Create all tables. Safe to run repeatedly."""
+    from models import user, doctor, appointment, appointment_archive, appointment_daily_stat, profile, chat_message, chat_session, chat_segment, reminder, slot_hold, idempotency_key
+    from services.chat_search import install_search_index
+    try:
+        db.create_all()
+        # create_all skips existing tables, so add columns and indexes declared after they were created
+        added = add_missing_columns()
+        if ('appointment_archive', 'original_id') in added:
+            upgrade_appointment_archive()
+        for table in db.metadata.sorted_tables:
+            for index in table.indexes:
+                index.create(db.engine, checkfirst=True)
+        logger.info("Database tables created successfully")
+        install_search_index()
+    except Exception as e:
+        logger.error("Failed to create database tables: %s", str(e))
+        raise
+
+def add_missing_columns():
+    """ALTER TABLE ... ADD COLUMN for model columns missing from existing tables.
+
+    Only for columns that are nullable or have a server default, which is how
+    columns are added to existing models. Returns the (table, column) pairs added.
+    """
+    from sqlalchemy import inspect
+    from sqlalchemy.schema import CreateColumn
+
+    inspector = inspect(db.engine)
+    added = []
+    with db.engine.begin() as conn:
+        for table in db.metadata.sorted_tables:
+            existing = {c['name'] for c in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing:
+                    continue
+                if not column.nullable and column.server_default is None:
+                    raise RuntimeError(f"Cannot add NOT NULL column {table.name}.{column.name} without a server default")
+                ddl = CreateColumn(column).compile(dialect=db.engine.dialect)
+                conn.exec_driver_sql(f'ALTER TABLE "{table.name}" ADD COLUMN {ddl}')
+                logger.info("Added column %s.%s", table.name, column.name)
+                added.append((table.name, column.name))
+    return added
+
+def upgrade_appointment_archive():
+    """Archive tables created before original_id used the appointment id as primary key."""
+    from sqlalchemy import text
+
+    with db.engine.begin() as conn:
+        conn.execute(text("UPDATE appointment_archive SET original_id = id WHERE original_id IS NULL"))
+        if db.engine.dialect.name == 'postgresql':
+            # The key had no sequence; start one past the ids already used
+            conn.execute(text("CREATE SEQUENCE IF NOT EXISTS appointment_archive_id_seq OWNED BY appointment_archive.id"))
+            conn.execute(text(
+                "SELECT setval('appointment_archive_id_seq', (SELECT coalesce(max(id), 0) + 1 FROM appointment_archive), false)"
+            ))
+            conn.execute(text("ALTER TABLE appointment_archive ALTER COLUMN id SET DEFAULT nextval('appointment_archive_id_seq')"))
+    logger.info("Upgraded appointment_archive to its own primary key")
+
+def create_sample_data():
+    from models.doctor import Doctor
+    
+    if Doctor.query.first() is None:
+        doctors = [
+            Doctor(name="Dr. Rajesh Kumar", specialization="Cardiologist", availability="Mon-Fri 9AM-5PM", zego_user_id="doctor_rajesh"),
+            Doctor(name="Dr. Priya Sharma", specialization="Endocrinologist", availability="Tue-Sat 10AM-6PM", zego_user_id="doctor_priya"),
+            Doctor(name="Dr. Amit Patel", specialization="Diabetologist", availability="Mon-Wed-Fri 2PM-8PM", zego_user_id="doctor_amit"),
+            Doctor(name="Dr. Sunita Gupta", specialization="General Physician", availability="Daily 9AM-1PM", zego_user_id="doctor_sunita"),
+        ]
+        
+        for doctor in doctors:
+            db.session.add(doctor)
+        
+        db.session.commit()
+        logger.info("Sample doctors created!")
+
+def register_commands(app):
+    """Attach the management commands to `flask --app app <command>`."""
+
+    @app.cli.command('init-db')
+    def init_db_command():
+        """Create database tables."""
+        init_db()
+        click.echo("Database tables created")
+
+    @app.cli.command('rebuild-search-index')
+    def rebuild_search_index_command():
+        """Create the chat full-text index and re-index existing messages."""
+        from services.chat_search import install_search_index
+
+        if install_search_index(rebuild=True):
+            click.echo("Chat search index rebuilt")
+        else:
+            click.echo("No full-text index available for this database")
+
+    @app.cli.command('seed')
+    def seed_command():
+        """Insert the sample doctors if the directory is empty."""
+        create_sample_data()
+        click.echo("Sample data ready")
+
+    @app.cli.command('gen-data')
+    @click.option('--users', default=1000, show_default=True)
+    @click.option('--doctors', default=50, show_default=True)
+    @click.option('--appointments', default=10000, show_default=True)
+    @click.option('--reminders', default=2000, show_default=True)
+    @click.option('--messages', default=20000, show_default=True)
+    @click.option('--profile-ratio', default=0.6, show_default=True, help='Share of users with a profile')
+    @click.option('--seed', default=42, show_default=True)
+    @click.option('--anchor', type=click.DateTime(formats=['%Y-%m-%d']), default=None,
+                  help='Date treated as "today" (defaults to the current date)')
+    @click.option('--chunk-size', default=50000, show_default=True)
+    def gen_data_command(users, doctors, appointments, reminders, messages, profile_ratio, seed, anchor, chunk_size):
+        """Bulk-load a deterministic synthetic dataset for scale testing."""
+        import time
+        from services.datagen import generate
+
+        start = time.perf_counter()
+        written = generate(users=users, doctors=doctors, appointments=appointments, reminders=reminders,
+                           messages=messages, profile_ratio=profile_ratio, seed=seed, anchor=anchor,
+                           chunk_size=chunk_size)
+        if app.config.get('ROLLUPS_ENABLED', True) and written.get('appointment'):
+            # Bulk writes skip the flush hook that maintains the daily rollups
+            from services.rollups import backfill
+            click.echo(f"Rollups: {backfill()} rows recomputed")
+        elapsed = time.perf_counter() - start
+        for table, count in written.items():
+            click.echo(f"{table:<14} {count:>10}")
+        click.echo(f"Done in {elapsed:.1f}s")
+
+    @app.cli.command('archive-appointments')
+    @click.option('--max-age-days', type=int, default=None, help='Defaults to ARCHIVE_AFTER_DAYS')
+    @click.option('--batch-size', type=int, default=None, help='Defaults to ARCHIVE_BATCH_SIZE')
+    @click.option('--max-batches', type=int, default=None, help='Stop after this many batches')
+    def archive_appointments_command(max_age_days, batch_size, max_batches):
+        """Move old completed and cancelled appointments into the archive table."""
+        from services.archival import archive_appointments
+
+        moved = archive_appointments(
+            max_age_days=max_age_days if max_age_days is not None else app.config['ARCHIVE_AFTER_DAYS'],
+            batch_size=batch_size or app.config['ARCHIVE_BATCH_SIZE'],
+            max_batches=max_batches
+        )
+        click.echo(f"Archived {moved} appointments")
+
+    @app.cli.command('chat-retention')
+    def chat_retention_command():
+        """Apply chat history retention, compaction and per-user caps now."""
+        from services.chat_retention import enforce_retention
+        from services.jobs import chat_retention_settings
+
+        counts = enforce_retention(**chat_retention_settings(app.config))
+        for step, count in counts.items():
+            click.echo(f"{step:<12} {count:>10}")
+
+    @app.cli.command('export')
+    @click.argument('kind', type=click.Choice(['appointments', 'reminders', 'chat_messages']))
+    @click.option('--format', 'fmt', type=click.Choice(['ndjson', 'csv']), default='ndjson', show_default=True)
+    @click.option('--from', 'start', type=click.DateTime(formats=['%Y-%m-%d']), default=None)
+    @click.option('--to', 'end', type=click.DateTime(formats=['%Y-%m-%d']), default=None, help='Inclusive')
+    @click.option('--doctor-id', type=int, default=None, help='Appointments only')
+    @click.option('--include-archived', is_flag=True, help='Also export archived appointments')
+    @click.option('--output', '-o', type=click.File('wb'), default='-', help='File to write (default stdout)')
+    def export_command(kind, fmt, start, end, doctor_id, include_archived, output):
+        """Stream a bulk export of appointments, reminders or chat messages."""
+        from services.export import export
+
+        if doctor_id is not None and kind != 'appointments':
+            raise click.UsageError("--doctor-id only applies to appointments")
+        for chunk in export(kind, fmt, start=start, end=end, doctor_id=doctor_id,
+                            include_archived=include_archived, chunk_rows=app.config['EXPORT_CHUNK_ROWS']):
+            output.write(chunk)
+
+    @app.cli.command('backfill-rollups')
+    @click.option('--from', 'start', type=click.DateTime(formats=['%Y-%m-%d']), default=None)
+    @click.option('--to', 'end', type=click.DateTime(formats=['%Y-%m-%d']), default=None, help='Inclusive')
+    def backfill_rollups_command(start, end):
+        """Recompute daily appointment rollups from the raw tables."""
+        from services.rollups import backfill
+
+        written = backfill(start.date() if start else None, end.date() if end else None)
+        click.echo(f"Wrote {written} rollup rows")
+
+    @app.cli.command('check-rollups')
+    @click.option('--from', 'start', type=click.DateTime(formats=['%Y-%m-%d']), default=None)
+    @click.option('--to', 'end', type=click.DateTime(formats=['%Y-%m-%d']), default=None, help='Inclusive')
+    @click.option('--fix', is_flag=True, help='Backfill the days that differ')
+    def check_rollups_command(start, end, fix):
+        """Compare daily appointment rollups with the raw tables."""
+        from services.rollups import backfill, check
+
+        mismatches = check(start.date() if start else None, end.date() if end else None)
+        for day, doctor_id, status, stored, actual in mismatches:
+            click.echo(f"{day} doctor={doctor_id} {status}: rollup {stored}, actual {actual}")
+        if not mismatches:
+            click.echo("Rollups match the appointment tables")
+            return
+        if fix:
+            for day in sorted({m[0] for m in mismatches}):
+                backfill(day, day)
+            click.echo(f"Backfilled {len({m[0] for m in mismatches})} days")
+        else:
+            raise SystemExit(1)
+
+    @app.cli.command('revoke-tokens')
+    @click.option('--user-id', type=int, default=None)
+    @click.option('--doctor-id', type=int, default=None)
+    def revoke_tokens_command(user_id, doctor_id):
+        """Reject every token issued so far to a patient or doctor."""
+        from services.identity import revoke_tokens
+
+        if (user_id is None) == (doctor_id is None):
+            raise click.UsageError("Pass exactly one of --user-id or --doctor-id")
+        kind, principal_id = ('user', user_id) if user_id is not None else ('doctor', doctor_id)
+        if not revoke_tokens(kind, principal_id):
+            raise click.ClickException(f"No {kind} with id {principal_id}")
+        click.echo(f"Revoked tokens of {kind} {principal_id}")
+        if not app.config.get('INVALIDATION_BACKEND'):
+            click.echo(f"Running workers pick this up within IDENTITY_CACHE_TTL_SECONDS "
+                       f"({app.config.get('IDENTITY_CACHE_TTL_SECONDS', 60):g}s)", err=True)
+
+    @app.cli.command('run-jobs')
+    def run_jobs_command():
+        """Run the periodic maintenance jobs in the foreground."""
+        from apscheduler.schedulers.blocking import BlockingScheduler
+        from services.jobs import create_scheduler
+
+        scheduler = create_scheduler(app, BlockingScheduler)
+        click.echo("Starting job scheduler (Ctrl+C to stop)")
+        try:
+            scheduler.start()
+        except (KeyboardInterrupt, SystemExit):
+            pass
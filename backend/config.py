@@ -0,0 +1,120 @@
+import os
+from datetime import timedelta
+
+
+class Config:
+    """Default configuration, read from the environment."""
+    SECRET_KEY = os.getenv('SECRET_KEY', 'your-secret-key-change-in-production')
+    SQLALCHEMY_DATABASE_URI = os.getenv("DATABASE_URL")
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # Connections can go stale across worker restarts and DB failovers
+    SQLALCHEMY_ENGINE_OPTIONS = {'pool_pre_ping': True}
+    JWT_SECRET_KEY = os.getenv('JWT_SECRET_KEY', 'your-jwt-secret-key-change-in-production')
+    JWT_ACCESS_TOKEN_EXPIRES = timedelta(days=1)
+    GOOGLE_CLIENT_ID = os.getenv('GOOGLE_CLIENT_ID')
+    GOOGLE_CLIENT_SECRET = os.getenv('GOOGLE_CLIENT_SECRET')
+
+    # JSON encoder for responses: 'auto' (orjson if installed), 'orjson' or 'stdlib'
+    JSON_BACKEND = os.getenv('JSON_BACKEND', 'auto')
+
+    # Response compression (see services/http_policy.py)
+    COMPRESS_ENABLED = os.getenv('COMPRESS_ENABLED', 'true').lower() == 'true'
+    COMPRESS_MIN_SIZE = int(os.getenv('COMPRESS_MIN_SIZE', '1024'))
+    COMPRESS_GZIP_LEVEL = int(os.getenv('COMPRESS_GZIP_LEVEL', '6'))
+    COMPRESS_BR_QUALITY = int(os.getenv('COMPRESS_BR_QUALITY', '4'))
+
+    # Admission control (see services/admission.py). Rates are tokens per second.
+    ADMISSION_ENABLED = os.getenv('ADMISSION_ENABLED', 'true').lower() == 'true'
+    ADMISSION_BACKEND = os.getenv('ADMISSION_BACKEND')  # e.g. sqlite:////tmp/wellnesscare-buckets.db
+    ADMISSION_IP_CAPACITY = float(os.getenv('ADMISSION_IP_CAPACITY', '60'))
+    ADMISSION_IP_RATE = float(os.getenv('ADMISSION_IP_RATE', '1'))
+    ADMISSION_IDENTITY_CAPACITY = float(os.getenv('ADMISSION_IDENTITY_CAPACITY', '30'))
+    ADMISSION_IDENTITY_RATE = float(os.getenv('ADMISSION_IDENTITY_RATE', '0.5'))
+    ADMISSION_MAX_CONCURRENT = int(os.getenv('ADMISSION_MAX_CONCURRENT', '32'))
+    # Number of trusted proxies setting X-Forwarded-For (e.g. 1 behind Render's router)
+    PROXY_FIX_HOPS = int(os.getenv('PROXY_FIX_HOPS', '0'))
+
+    # Idempotency-Key replay store (see services/idempotency.py)
+    IDEMPOTENCY_TTL_SECONDS = int(os.getenv('IDEMPOTENCY_TTL_SECONDS', '86400'))
+    # An in-flight key is retried after this long if its worker died; keep above GUNICORN_TIMEOUT
+    IDEMPOTENCY_LEASE_SECONDS = int(os.getenv('IDEMPOTENCY_LEASE_SECONDS', '60'))
+    IDEMPOTENCY_WAIT_SECONDS = float(os.getenv('IDEMPOTENCY_WAIT_SECONDS', '10'))
+
+    # Entries in the chatbot's FAQ/doctor-directory answer cache
+    CHATBOT_CACHE_SIZE = int(os.getenv('CHATBOT_CACHE_SIZE', '1024'))
+
+    # FAQ knowledge base (see services/faq_index.py); defaults to data/faqs.json
+    FAQ_PATH = os.getenv('FAQ_PATH')
+    FAQ_MATCH_THRESHOLD = float(os.getenv('FAQ_MATCH_THRESHOLD', '0.35'))
+    FAQ_RELOAD_INTERVAL = float(os.getenv('FAQ_RELOAD_INTERVAL', '5'))
+
+    # Chat history retention (see services/chat_retention.py); 0 disables a step
+    CHAT_RETENTION_DAYS = int(os.getenv('CHAT_RETENTION_DAYS', '30'))
+    CHAT_MAX_MESSAGES_PER_USER = int(os.getenv('CHAT_MAX_MESSAGES_PER_USER', '500'))
+    CHAT_COMPRESS_AFTER_HOURS = int(os.getenv('CHAT_COMPRESS_AFTER_HOURS', '24'))
+    CHAT_SEGMENT_SIZE = int(os.getenv('CHAT_SEGMENT_SIZE', '200'))
+    CHAT_RETENTION_BATCH_SIZE = int(os.getenv('CHAT_RETENTION_BATCH_SIZE', '1000'))
+    CHAT_RETENTION_INTERVAL_MINUTES = int(os.getenv('CHAT_RETENTION_INTERVAL_MINUTES', '60'))
+
+    # Appointment notifications (see services/notifications.py)
+    NOTIFY_ENABLED = os.getenv('NOTIFY_ENABLED', 'true').lower() == 'true'
+    NOTIFY_SINKS = os.getenv('NOTIFY_SINKS', 'log')  # comma-separated: log, file, smtp
+    NOTIFY_WORKERS = int(os.getenv('NOTIFY_WORKERS', '2'))
+    NOTIFY_BATCH_SIZE = int(os.getenv('NOTIFY_BATCH_SIZE', '50'))
+    NOTIFY_BATCH_WAIT_MS = int(os.getenv('NOTIFY_BATCH_WAIT_MS', '200'))
+    NOTIFY_MAX_ATTEMPTS = int(os.getenv('NOTIFY_MAX_ATTEMPTS', '5'))
+    NOTIFY_RETRY_BASE_SECONDS = float(os.getenv('NOTIFY_RETRY_BASE_SECONDS', '0.5'))
+    NOTIFY_QUEUE_SIZE = int(os.getenv('NOTIFY_QUEUE_SIZE', '10000'))
+    NOTIFY_UPCOMING_MINUTES = int(os.getenv('NOTIFY_UPCOMING_MINUTES', '15'))
+    NOTIFY_FILE_PATH = os.getenv('NOTIFY_FILE_PATH', 'notifications.log')
+    NOTIFY_SMTP_HOST = os.getenv('NOTIFY_SMTP_HOST', 'localhost')
+    NOTIFY_SMTP_PORT = int(os.getenv('NOTIFY_SMTP_PORT', '1025'))
+    NOTIFY_SMTP_USERNAME = os.getenv('NOTIFY_SMTP_USERNAME')
+    NOTIFY_SMTP_PASSWORD = os.getenv('NOTIFY_SMTP_PASSWORD')
+    NOTIFY_SMTP_TLS = os.getenv('NOTIFY_SMTP_TLS', 'false').lower() == 'true'
+    NOTIFY_FROM = os.getenv('NOTIFY_FROM', 'no-reply@wellnesscare.local')
+
+    # Per-user cache of /appointments/my and /reminders/my responses (see services/user_cache.py)
+    USER_CACHE_ENABLED = os.getenv('USER_CACHE_ENABLED', 'true').lower() == 'true'
+    USER_CACHE_MAX_BYTES = int(os.getenv('USER_CACHE_MAX_BYTES', str(16 * 1024 * 1024)))
+    # Upper bound on staleness for writes the invalidation bus doesn't deliver to this worker
+    USER_CACHE_TTL_SECONDS = float(os.getenv('USER_CACHE_TTL_SECONDS', '30'))
+
+    # Per-worker cache of User/Doctor records behind the JWT identity claims (see services/identity.py)
+    IDENTITY_CACHE_SIZE = int(os.getenv('IDENTITY_CACHE_SIZE', '4096'))
+    # Upper bound on how long a worker the invalidation bus doesn't reach keeps accepting revoked tokens
+    IDENTITY_CACHE_TTL_SECONDS = float(os.getenv('IDENTITY_CACHE_TTL_SECONDS', '60'))
+
+    # iCalendar feeds (see services/calendar_feed.py)
+    CALENDAR_FEED_CACHE_MAX_BYTES = int(os.getenv('CALENDAR_FEED_CACHE_MAX_BYTES', str(8 * 1024 * 1024)))
+    CALENDAR_EVENT_MINUTES = int(os.getenv('CALENDAR_EVENT_MINUTES', '30'))
+    CALENDAR_REFRESH_MINUTES = int(os.getenv('CALENDAR_REFRESH_MINUTES', '15'))
+    # Visit reasons are health data and feeds are synced to third-party calendar services
+    CALENDAR_FEED_REASONS = os.getenv('CALENDAR_FEED_REASONS', 'false').lower() == 'true'
+
+    # How long a slot picked in the chatbot booking flow stays reserved
+    SLOT_HOLD_TTL_SECONDS = int(os.getenv('SLOT_HOLD_TTL_SECONDS', '300'))
+
+    # Async /api/chatbot under asgi.py (see services/chatbot_async.py)
+    CHATBOT_ASYNC_THREADS = int(os.getenv('CHATBOT_ASYNC_THREADS', '8'))
+    CHATBOT_ASYNC_DB = os.getenv('CHATBOT_ASYNC_DB', 'true').lower() == 'true'
+
+    # Maintain appointment_daily_stat on every appointment write (see services/rollups.py)
+    ROLLUPS_ENABLED = os.getenv('ROLLUPS_ENABLED', 'true').lower() == 'true'
+
+    # Cross-worker cache invalidation (see services/invalidation.py); unset = in-process only
+    INVALIDATION_BACKEND = os.getenv('INVALIDATION_BACKEND')  # e.g. sqlite:////tmp/wellnesscare-invalidation.db
+    INVALIDATION_POLL_INTERVAL_MS = int(os.getenv('INVALIDATION_POLL_INTERVAL_MS', '50'))
+
+    # Shared secret for /api/admin/* (sent as X-Admin-Key); admin API is off when unset
+    ADMIN_API_KEY = os.getenv('ADMIN_API_KEY')
+    # Rows fetched and encoded per chunk by the streaming exports
+    EXPORT_CHUNK_ROWS = int(os.getenv('EXPORT_CHUNK_ROWS', '1000'))
+
+    # Interval of the expired-appointment cleanup job run by `flask run-jobs`
+    CLEANUP_INTERVAL_HOURS = int(os.getenv('CLEANUP_INTERVAL_HOURS', '1'))
+
+    # Archival of finished appointments (see services/archival.py)
+    ARCHIVE_AFTER_DAYS = int(os.getenv('ARCHIVE_AFTER_DAYS', '90'))
+    ARCHIVE_BATCH_SIZE = int(os.getenv('ARCHIVE_BATCH_SIZE', '1000'))
+    ARCHIVE_INTERVAL_HOURS = int(os.getenv('ARCHIVE_INTERVAL_HOURS', '24'))
@@ -0,0 +1,103 @@
+# gunicorn.conf.py
+"""
+Production server profile.
+
+    gunicorn app:app                 # picks up this file from the working directory
+    GUNICORN_WORKER_CLASS=gevent gunicorn app:app
+
+Worker models (GUNICORN_WORKER_CLASS):
+  - gthread (default): WEB_CONCURRENCY processes x GUNICORN_THREADS threads.
+  - gevent: cooperative workers for many slow concurrent clients. Requires
+    `pip install gevent psycogreen`; psycopg2 is made green in post_fork.
+  - sync: one request per process, mostly useful as a baseline.
+
+The app is preloaded in the master so workers fork with the code already
+imported. Nothing in the import path opens database connections, and each
+worker disposes the inherited engine pool after fork so no connection is
+shared between processes. Periodic jobs are not run by web workers; use
+`flask run-jobs`, or set GUNICORN_RUN_JOBS=true to run them in the master.
+
+On Render (RENDER is set), PROXY_FIX_HOPS defaults to 1 so rate limits see
+client addresses rather than the router's.
+
+With more than one worker, INVALIDATION_BACKEND defaults to a SQLite change
+log in the system temp directory so a write in one worker drops the cached
+responses of the others. Set it explicitly (and to the same value for
+`flask run-jobs`) when workers or the job runner span hosts; otherwise cached
+responses are only bounded by their TTLs.
+
+Note that the chatbot's conversation state lives in worker memory, so
+multi-step chatbot flows rely on a client staying on one worker process.
+"""
+import multiprocessing
+import os
+import tempfile
+
+bind = os.getenv('GUNICORN_BIND', f"0.0.0.0:{os.getenv('PORT', '5000')}")
+worker_class = os.getenv('GUNICORN_WORKER_CLASS', 'gthread')
+workers = int(os.getenv('WEB_CONCURRENCY', min(multiprocessing.cpu_count() * 2 + 1, 8)))
+threads = int(os.getenv('GUNICORN_THREADS', '4'))
+worker_connections = int(os.getenv('GUNICORN_WORKER_CONNECTIONS', '200'))
+
+# Read by config.py when the preloaded app is imported, after this file.
+# Render puts one router in front of the app; client IPs come from its X-Forwarded-For
+if os.getenv('RENDER') and not os.getenv('PROXY_FIX_HOPS'):
+    os.environ['PROXY_FIX_HOPS'] = '1'
+if workers > 1 and not os.getenv('INVALIDATION_BACKEND'):
+    os.environ['INVALIDATION_BACKEND'] = f"sqlite:///{os.path.join(tempfile.gettempdir(), 'wellnesscare-invalidation.db')}"
+
+preload_app = True
+
+# Requests in flight get graceful_timeout seconds to finish on SIGTERM/HUP
+timeout = int(os.getenv('GUNICORN_TIMEOUT', '30'))
+graceful_timeout = int(os.getenv('GUNICORN_GRACEFUL_TIMEOUT', '30'))
+keepalive = int(os.getenv('GUNICORN_KEEPALIVE', '5'))
+
+# Recycle workers periodically to bound memory growth
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', '2000'))
+max_requests_jitter = int(os.getenv('GUNICORN_MAX_REQUESTS_JITTER', '200'))
+
+accesslog = os.getenv('GUNICORN_ACCESS_LOG', '-')
+
+RUN_JOBS_IN_MASTER = os.getenv('GUNICORN_RUN_JOBS', 'false').lower() == 'true'
+
+_scheduler = None
+
+def when_ready(server):
+    global _scheduler
+    if not RUN_JOBS_IN_MASTER:
+        return
+    from app import app
+    from services.jobs import create_scheduler
+    _scheduler = create_scheduler(app)
+    _scheduler.start()
+    server.log.info("Maintenance jobs started in master process")
+
+def post_fork(server, worker):
+    if worker_class == 'gevent':
+        try:
+            from psycogreen.gevent import patch_psycopg
+            patch_psycopg()
+        except ImportError:
+            server.log.warning("psycogreen not installed; psycopg2 calls will block the gevent loop")
+
+    from app import app
+    from database import db
+    from services.chatbot_engine import chat_state
+
+    # Drop pooled connections inherited from the master without closing the
+    # master's sockets, and start with no conversation state.
+    with app.app_context():
+        db.engine.dispose(close=False)
+    chat_state.clear()
+    worker.log.info("Worker %s initialised after fork", worker.pid)
+
+def worker_exit(server, worker):
+    from app import app
+    from database import db
+    with app.app_context():
+        db.engine.dispose()
+
+def on_exit(server):
+    if _scheduler is not None:
+        _scheduler.shutdown(wait=True)
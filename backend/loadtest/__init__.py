@@ -0,0 +1,3 @@
+"""
+Offline load-generation suite. Run `python -m loadtest --help` from backend/.
+"""
@@ -0,0 +1,127 @@
+"""
+End-to-end load test with scripted patient and doctor scenarios.
+
+Against a running server:
+    python -m loadtest --base-url http://127.0.0.1:5000 --patients 50 --doctors 4 --duration 120
+
+Or let the harness start gunicorn on a fresh SQLite database (or on
+DATABASE_URL if set, e.g. a local Postgres):
+    python -m loadtest --start-server --patients 20 --duration 60 --out results.json
+
+Compare with a previous run and fail on regressions:
+    python -m loadtest --start-server --baseline results.json --tolerance 0.2
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+
+from loadtest.scenarios import make_user
+from loadtest.stats import Recorder, compare, evaluate_slos
+
+DEFAULT_SLO_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'slo.json')
+
+def start_local_server(workers, threads):
+    from benchmarks.load_worker_models import free_port, prepare_database, start_server
+
+    path = None if os.getenv('DATABASE_URL') else os.path.join(tempfile.mkdtemp(), 'loadtest.db')
+    env = prepare_database(path)
+    return start_server(env, os.getenv('GUNICORN_WORKER_CLASS', 'gthread'), workers, threads, free_port())
+
+def run(base_url, patients, doctors, duration, ramp_up, think_time, seed):
+    recorder = Recorder()
+    deadline = time.perf_counter() + duration
+    users = [('patient', n) for n in range(patients)] + [('doctor', n) for n in range(doctors)]
+    threads = []
+    for index, (kind, n) in enumerate(users):
+        user = make_user(kind, base_url, recorder, seed=seed * 100003 + index, think_time=think_time)
+        thread = threading.Thread(target=user.run, args=(deadline,), name=f"{kind}-{n}", daemon=True)
+        threads.append(thread)
+    for thread in threads:
+        thread.start()
+        if ramp_up and len(threads) > 1:
+            time.sleep(ramp_up / len(threads))
+    for thread in threads:
+        thread.join()
+    recorder.stop()
+    return recorder.summary()
+
+def print_table(summary):
+    print(f"{'endpoint':<52} {'reqs':>7} {'err%':>6} {'rps':>8} {'p50':>8} {'p95':>8} {'p99':>8}")
+    for endpoint, s in summary['endpoints'].items():
+        print(f"{endpoint:<52} {s['requests']:>7} {s['error_rate'] * 100:>5.1f}% {s['throughput_rps']:>8.1f} "
+              f"{s['p50_ms']:>8.1f} {s['p95_ms']:>8.1f} {s['p99_ms']:>8.1f}")
+    print(f"total: {summary['total_requests']} requests, {summary['throughput_rps']} rps, "
+          f"error rate {summary['error_rate'] * 100:.2f}%")
+
+def main():
+    parser = argparse.ArgumentParser(prog='python -m loadtest', description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument('--base-url')
+    target.add_argument('--start-server', action='store_true')
+    parser.add_argument('--patients', type=int, default=10)
+    parser.add_argument('--doctors', type=int, default=2)
+    parser.add_argument('--duration', type=float, default=30, help='seconds')
+    parser.add_argument('--ramp-up', type=float, default=5, help='seconds to start all users')
+    parser.add_argument('--think-time', type=float, default=0.5, help='mean pause between steps (s)')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--workers', type=int, default=2, help='gunicorn workers with --start-server')
+    parser.add_argument('--threads', type=int, default=4, help='gunicorn threads with --start-server')
+    parser.add_argument('--slo', default=DEFAULT_SLO_FILE)
+    parser.add_argument('--out', help='write results JSON here')
+    parser.add_argument('--baseline', help='previous results JSON to compare against')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='allowed p95 regression fraction')
+    args = parser.parse_args()
+
+    server = None
+    base_url = args.base_url
+    if args.start_server:
+        server, base_url = start_local_server(args.workers, args.threads)
+    try:
+        summary = run(base_url, args.patients, args.doctors, args.duration, args.ramp_up,
+                      args.think_time, args.seed)
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait(timeout=60)
+
+    with open(args.slo) as f:
+        slos = json.load(f)
+    violations = evaluate_slos(summary, slos)
+    regressions = []
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(summary, json.load(f), args.tolerance)
+
+    print_table(summary)
+    for line in violations:
+        print(f"SLO violation: {line}")
+    for line in regressions:
+        print(f"Regression: {line}")
+
+    if args.out:
+        result = {
+            "meta": {
+                "timestamp": datetime.now(timezone.utc).isoformat(),
+                "base_url": base_url,
+                "patients": args.patients,
+                "doctors": args.doctors,
+                "duration_s": args.duration,
+                "think_time_s": args.think_time,
+                "seed": args.seed,
+            },
+            "summary": summary,
+            "slo_violations": violations,
+            "regressions": regressions,
+        }
+        with open(args.out, 'w') as f:
+            json.dump(result, f, indent=2)
+    sys.exit(1 if violations or regressions else 0)
+
+if __name__ == '__main__':
+    main()
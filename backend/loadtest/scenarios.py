@@ -0,0 +1,181 @@
+# scenarios.py
+"""
+Scripted patient and doctor flows. Each virtual user runs its flow in a loop
+until the run's deadline, pausing `think_time` seconds between steps.
+"""
+import random
+import time
+import uuid
+from datetime import datetime, timedelta
+
+import requests
+
+# Seeded doctor accounts (see DOCTOR_CREDENTIALS in routes/doctor_routes.py)
+DOCTOR_ACCOUNTS = [
+    ('doctor_rajesh@clinic.com', 'doctor123'),
+    ('doctor_priya@clinic.com', 'doctor123'),
+    ('doctor_amit@clinic.com', 'doctor123'),
+    ('doctor_sunita@clinic.com', 'doctor123'),
+]
+
+CHATBOT_QUESTIONS = [
+    'hello',
+    'what are the diabetes symptoms',
+    'heart care tips',
+    'show me your doctors',
+    'what is hypertension',
+]
+
+class ApiClient:
+    def __init__(self, base_url, recorder, timeout=30):
+        self.base_url = base_url.rstrip('/')
+        self.recorder = recorder
+        self.session = requests.Session()
+        self.timeout = timeout
+        self.token = None
+
+    def call(self, name, method, path, expected=(200,), auth=False, **kwargs):
+        """Issue a request and record it under `name` (a route template)."""
+        headers = kwargs.pop('headers', {})
+        if auth and self.token:
+            headers['Authorization'] = f'Bearer {self.token}'
+        start = time.perf_counter()
+        try:
+            response = self.session.request(method, self.base_url + path, headers=headers,
+                                            timeout=self.timeout, **kwargs)
+        except requests.RequestException:
+            self.recorder.record(name, time.perf_counter() - start, False)
+            return None
+        self.recorder.record(name, time.perf_counter() - start, response.status_code in expected)
+        return response
+
+class Scenario:
+    def __init__(self, client, rng, think_time):
+        self.client = client
+        self.rng = rng
+        self.think_time = think_time
+
+    def pause(self):
+        if self.think_time:
+            time.sleep(self.rng.uniform(0.5, 1.5) * self.think_time)
+
+    def run(self, deadline):
+        self.setup()
+        while time.perf_counter() < deadline:
+            self.iteration()
+
+    def setup(self):
+        pass
+
+    def iteration(self):
+        raise NotImplementedError
+
+class PatientScenario(Scenario):
+    """Register, then browse doctors, book, chat and poll the dashboard."""
+
+    polls_per_iteration = 3
+
+    def setup(self):
+        self.email = f"load-{uuid.uuid4().hex[:12]}@example.com"
+        self.password = 'loadtest123'
+        r = self.client.call('POST /api/auth/register', 'POST', '/api/auth/register', expected=(201,),
+                             json={'email': self.email, 'password': self.password})
+        if r is not None and r.status_code == 201:
+            self.client.token = r.json()['token']
+        self.doctor_ids = []
+
+    def login(self):
+        r = self.client.call('POST /api/auth/login', 'POST', '/api/auth/login',
+                             json={'email': self.email, 'password': self.password})
+        if r is not None and r.status_code == 200:
+            self.client.token = r.json()['token']
+
+    def browse(self):
+        r = self.client.call('GET /api/doctors', 'GET', '/api/doctors')
+        if r is not None and r.status_code == 200:
+            self.doctor_ids = [d['id'] for d in r.json()]
+        if self.doctor_ids:
+            doctor_id = self.rng.choice(self.doctor_ids)
+            self.client.call('GET /api/doctors/<id>', 'GET', f'/api/doctors/{doctor_id}')
+
+    def random_slot(self):
+        day = datetime.now() + timedelta(days=self.rng.randint(1, 60))
+        slot = day.replace(hour=self.rng.randint(9, 17), minute=self.rng.choice([0, 15, 30, 45]))
+        return slot.strftime('%Y-%m-%d %H:%M')
+
+    def book(self):
+        if not self.doctor_ids:
+            return
+        # 409 is the normal answer for a contended slot, not a server error
+        self.client.call('POST /api/appointments/book', 'POST', '/api/appointments/book',
+                         expected=(201, 409), auth=True,
+                         json={'doctor_id': self.rng.choice(self.doctor_ids), 'time': self.random_slot(),
+                               'reason': 'Routine check-up requested by load test'})
+
+    def chat(self):
+        self.client.call('POST /api/chatbot', 'POST', '/api/chatbot', auth=True,
+                         json={'message': self.rng.choice(CHATBOT_QUESTIONS)})
+
+    def chatbot_booking(self):
+        if not self.doctor_ids:
+            return
+        turns = ['book appointment', str(self.rng.choice(self.doctor_ids)), self.random_slot(),
+                 'Follow-up on recent test results']
+        for message in turns:
+            self.client.call('POST /api/chatbot', 'POST', '/api/chatbot', auth=True, json={'message': message})
+            self.pause()
+
+    def poll(self):
+        for _ in range(self.polls_per_iteration):
+            self.client.call('GET /api/appointments/my', 'GET', '/api/appointments/my', auth=True)
+            self.client.call('GET /api/reminders/my', 'GET', '/api/reminders/my', auth=True)
+            self.pause()
+
+    def iteration(self):
+        self.login()
+        self.pause()
+        self.browse()
+        self.pause()
+        if self.rng.random() < 0.5:
+            self.book()
+        else:
+            self.chatbot_booking()
+        self.pause()
+        self.chat()
+        self.poll()
+
+class DoctorScenario(Scenario):
+    """Log in as a seeded doctor, poll the schedule and request video access."""
+
+    polls_per_iteration = 5
+
+    def setup(self):
+        self.email, self.password = self.rng.choice(DOCTOR_ACCOUNTS)
+
+    def iteration(self):
+        r = self.client.call('POST /api/doctor/login', 'POST', '/api/doctor/login',
+                             json={'email': self.email, 'password': self.password})
+        if r is None or r.status_code != 200:
+            self.pause()
+            return
+        self.client.token = r.json()['token']
+        self.client.call('GET /api/doctor/me', 'GET', '/api/doctor/me', auth=True)
+        appointments = []
+        for _ in range(self.polls_per_iteration):
+            r = self.client.call('GET /api/doctor/appointments', 'GET', '/api/doctor/appointments', auth=True)
+            if r is not None and r.status_code == 200:
+                appointments = r.json()
+            self.pause()
+        if appointments:
+            appointment = self.rng.choice(appointments)
+            # Outside the call window the API answers 403; without Agora credentials, 500
+            self.client.call('GET /api/doctor/appointments/<id>/video-access', 'GET',
+                             f"/api/doctor/appointments/{appointment['id']}/video-access",
+                             expected=(200, 403), auth=True)
+        self.pause()
+
+def make_user(kind, base_url, recorder, seed, think_time):
+    rng = random.Random(seed)
+    client = ApiClient(base_url, recorder)
+    scenario = PatientScenario if kind == 'patient' else DoctorScenario
+    return scenario(client, rng, think_time)
@@ -0,0 +1,90 @@
+# stats.py
+import threading
+import time
+
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, int(round(p * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+class Recorder:
+    """Thread-safe per-endpoint latency and error recorder."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._samples = {}
+        self._errors = {}
+        self.started = time.perf_counter()
+        self.finished = None
+
+    def record(self, endpoint, seconds, ok):
+        with self._lock:
+            self._samples.setdefault(endpoint, []).append(seconds)
+            if not ok:
+                self._errors[endpoint] = self._errors.get(endpoint, 0) + 1
+
+    def stop(self):
+        self.finished = time.perf_counter()
+
+    def summary(self):
+        elapsed = (self.finished or time.perf_counter()) - self.started
+        endpoints = {}
+        with self._lock:
+            for endpoint, samples in sorted(self._samples.items()):
+                values = sorted(samples)
+                errors = self._errors.get(endpoint, 0)
+                endpoints[endpoint] = {
+                    "requests": len(values),
+                    "errors": errors,
+                    "error_rate": round(errors / len(values), 4),
+                    "throughput_rps": round(len(values) / elapsed, 2),
+                    "p50_ms": round(percentile(values, 0.50) * 1000, 2),
+                    "p95_ms": round(percentile(values, 0.95) * 1000, 2),
+                    "p99_ms": round(percentile(values, 0.99) * 1000, 2),
+                }
+        total = sum(e["requests"] for e in endpoints.values())
+        total_errors = sum(e["errors"] for e in endpoints.values())
+        return {
+            "duration_s": round(elapsed, 2),
+            "total_requests": total,
+            "total_errors": total_errors,
+            "error_rate": round(total_errors / total, 4) if total else 0.0,
+            "throughput_rps": round(total / elapsed, 2) if elapsed else 0.0,
+            "endpoints": endpoints,
+        }
+
+def evaluate_slos(summary, slos):
+    """
+    Check each endpoint against its SLO (falling back to the default one).
+    Returns a list of human-readable violations.
+    """
+    violations = []
+    default = slos.get("default", {})
+    for endpoint, stats in summary["endpoints"].items():
+        slo = dict(default, **slos.get("endpoints", {}).get(endpoint, {}))
+        for metric in ("p50_ms", "p95_ms", "p99_ms"):
+            if metric in slo and stats[metric] > slo[metric]:
+                violations.append(f"{endpoint}: {metric} {stats[metric]} > {slo[metric]}")
+        if "error_rate" in slo and stats["error_rate"] > slo["error_rate"]:
+            violations.append(f"{endpoint}: error_rate {stats['error_rate']} > {slo['error_rate']}")
+        if "min_throughput_rps" in slo and stats["throughput_rps"] < slo["min_throughput_rps"]:
+            violations.append(f"{endpoint}: throughput {stats['throughput_rps']} < {slo['min_throughput_rps']}")
+    return violations
+
+def compare(summary, baseline, tolerance):
+    """
+    Compare p95 latency and error rate against a previous results file.
+    Returns a list of regressions beyond `tolerance` (a fraction, e.g. 0.2).
+    """
+    regressions = []
+    previous = baseline.get("summary", baseline).get("endpoints", {})
+    for endpoint, stats in summary["endpoints"].items():
+        before = previous.get(endpoint)
+        if not before:
+            continue
+        if stats["p95_ms"] > before["p95_ms"] * (1 + tolerance):
+            regressions.append(f"{endpoint}: p95 {before['p95_ms']} -> {stats['p95_ms']} ms")
+        if stats["error_rate"] > before["error_rate"] + tolerance / 10:
+            regressions.append(f"{endpoint}: error_rate {before['error_rate']} -> {stats['error_rate']}")
+    return regressions
@@ -3,6 +3,11 @@ from datetime import datetime
 
 class Appointment(db.Model):
     __tablename__ = 'appointment'
+    __table_args__ = (
+        db.Index('ix_appointment_status_time', 'status', 'time'),
+        # Never reuse the id of an archived (deleted) appointment
+        {'sqlite_autoincrement': True},
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
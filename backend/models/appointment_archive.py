@@ -0,0 +1,25 @@
+from database import db
+from datetime import datetime
+
+class AppointmentArchive(db.Model):
+    """Completed and cancelled appointments moved out of the hot `appointment` table."""
+    __tablename__ = 'appointment_archive'
+    __table_args__ = (
+        db.Index('ix_appointment_archive_user_time', 'user_id', 'time'),
+        db.Index('ix_appointment_archive_doctor_time', 'doctor_id', 'time'),
+    )
+    
+    # Own key: SQLite can hand a freed appointment id to a new appointment,
+    # so one appointment id may be archived more than once
+    id = db.Column(db.Integer, primary_key=True)
+    original_id = db.Column(db.Integer)  # appointment.id before archival
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    doctor_id = db.Column(db.Integer, db.ForeignKey('doctor.id'), nullable=False)
+    time = db.Column(db.DateTime, nullable=False)
+    status = db.Column(db.String(50), nullable=False)
+    reason = db.Column(db.String(255), nullable=False)
+    created_at = db.Column(db.DateTime)
+    archived_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<AppointmentArchive {self.id} appointment={self.original_id}>'
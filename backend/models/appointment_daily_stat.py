@@ -0,0 +1,13 @@
+from database import db
+
+class AppointmentDailyStat(db.Model):
+    """Number of appointments per day, doctor and status, kept current by services/rollups.py."""
+    __tablename__ = 'appointment_daily_stat'
+    
+    day = db.Column(db.Date, primary_key=True)
+    doctor_id = db.Column(db.Integer, db.ForeignKey('doctor.id'), primary_key=True)
+    status = db.Column(db.String(50), primary_key=True)
+    count = db.Column(db.Integer, nullable=False, default=0)
+    
+    def __repr__(self):
+        return f'<AppointmentDailyStat {self.day} doctor={self.doctor_id} {self.status}={self.count}>'
@@ -3,6 +3,9 @@ from datetime import datetime
 
 class ChatMessage(db.Model):
     __tablename__ = 'chat_message'
+    __table_args__ = (
+        db.Index('ix_chat_message_user_timestamp', 'user_id', 'timestamp'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
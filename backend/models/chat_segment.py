@@ -0,0 +1,20 @@
+from database import db
+from datetime import datetime
+
+class ChatSegment(db.Model):
+    """A run of older chat messages for one user, stored as zlib-compressed JSON."""
+    __tablename__ = 'chat_segment'
+    __table_args__ = (
+        db.Index('ix_chat_segment_user_first', 'user_id', 'first_timestamp'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    first_timestamp = db.Column(db.DateTime, nullable=False)
+    last_timestamp = db.Column(db.DateTime, nullable=False)
+    message_count = db.Column(db.Integer, nullable=False)
+    payload = db.Column(db.LargeBinary, nullable=False)  # zlib([[sender, text, timestamp], ...])
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<ChatSegment user_id={self.user_id} messages={self.message_count}>'
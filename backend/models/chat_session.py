@@ -0,0 +1,12 @@
+from database import db
+from datetime import datetime
+
+class ChatSession(db.Model):
+    """Start of the user's current chat session; earlier messages are no longer shown."""
+    __tablename__ = 'chat_session'
+    
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    started_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<ChatSession user_id={self.user_id} started_at={self.started_at}>'
@@ -9,6 +9,8 @@ class Doctor(db.Model):
     specialization = db.Column(db.String(100), nullable=False)
     availability = db.Column(db.String(100))
     zego_user_id = db.Column(db.String(50), unique=True)  # Unique ZEGOCLOUD user ID for doctors
+    # Bumped to revoke every token issued so far (see services/identity.py)
+    token_version = db.Column(db.Integer, nullable=False, default=0, server_default='0')
     
     # Relationship with appointments
     appointments = relationship("Appointment", backref="doctor", lazy=True)
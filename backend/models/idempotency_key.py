@@ -0,0 +1,16 @@
+from database import db
+
+class IdempotencyKey(db.Model):
+    """A claimed Idempotency-Key and, once its request finished, the stored response."""
+    __tablename__ = 'idempotency_key'
+
+    # sha256 of identity, method, path and the client's key
+    key = db.Column(db.String(64), primary_key=True)
+    fingerprint = db.Column(db.String(64), nullable=False)  # sha256 of the request body
+    status = db.Column(db.Integer)  # None while the first request is still running
+    body = db.Column(db.LargeBinary)
+    headers = db.Column(db.Text)  # JSON list of [name, value]
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+
+    def __repr__(self):
+        return f'<IdempotencyKey {self.key[:12]} status={self.status}>'
@@ -0,0 +1,19 @@
+from database import db
+from datetime import datetime
+
+class SlotHold(db.Model):
+    """Tentative reservation of a doctor's time slot while a patient finishes booking."""
+    __tablename__ = 'slot_hold'
+    __table_args__ = (
+        db.UniqueConstraint('doctor_id', 'time', name='uq_slot_hold_doctor_time'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    doctor_id = db.Column(db.Integer, db.ForeignKey('doctor.id'), nullable=False)
+    time = db.Column(db.DateTime, nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False, index=True)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<SlotHold doctor={self.doctor_id} time={self.time} user={self.user_id}>'
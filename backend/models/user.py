@@ -11,6 +11,8 @@ class User(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     email = db.Column(db.String(120), unique=True, nullable=False)
     password_hash = db.Column(db.String(255), nullable=False)
+    # Bumped to revoke every token issued so far (see services/identity.py)
+    token_version = db.Column(db.Integer, nullable=False, default=0, server_default='0')
     
     def __init__(self, email):
         self.email = email
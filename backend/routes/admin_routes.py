@@ -0,0 +1,104 @@
+# admin_routes.py
+from flask import Blueprint, Response, request, jsonify, current_app, stream_with_context
+from functools import wraps
+from datetime import datetime
+from services.chat_search import search_messages, searchable_since
+from services.export import EXPORTS, FORMATS, export
+from services.rollups import daily_counts, parse_range
+import hmac
+import logging
+
+logger = logging.getLogger(__name__)
+
+admin_bp = Blueprint('admin', __name__, url_prefix='/api/admin')
+
+def admin_required(view):
+    """Require the X-Admin-Key header to match ADMIN_API_KEY."""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        expected = current_app.config.get('ADMIN_API_KEY')
+        if not expected:
+            return jsonify({"msg": "Admin API is not configured"}), 503
+        provided = request.headers.get('X-Admin-Key', '')
+        if not hmac.compare_digest(provided.encode('utf-8'), expected.encode('utf-8')):
+            logger.warning("Rejected admin request to %s", request.path)
+            return jsonify({"msg": "Admin access required"}), 403
+        return view(*args, **kwargs)
+    return wrapper
+
+@admin_bp.route('/chat/search', methods=['GET'])
+@admin_required
+def search_chat_messages():
+    try:
+        query = request.args.get('q', '').strip()
+        if not query:
+            return jsonify({"msg": "Query parameter 'q' is required"}), 400
+        
+        page = max(request.args.get('page', 1, type=int), 1)
+        per_page = min(max(request.args.get('per_page', 20, type=int), 1), 100)
+        sender = request.args.get('sender')
+        if sender not in (None, 'user', 'bot'):
+            return jsonify({"msg": "sender must be 'user' or 'bot'"}), 400
+        
+        items, has_more = search_messages(
+            query, page=page, per_page=per_page,
+            user_id=request.args.get('user_id', type=int), sender=sender
+        )
+        logger.info("Chat search for %r returned %d results (page %d)", query, len(items), page)
+        return jsonify({
+            "items": items, "page": page, "per_page": per_page, "has_more": has_more,
+            # Older messages may be compressed into chat segments, which are not searched
+            "searchable_since": searchable_since(current_app.config),
+        }), 200
+    
+    except Exception as e:
+        logger.error("Chat search failed: %s", str(e))
+        return jsonify({"msg": f"Chat search failed: {str(e)}"}), 500
+
+@admin_bp.route('/analytics/daily', methods=['GET'])
+@admin_required
+def get_daily_analytics():
+    try:
+        group_by = request.args.get('group_by', 'specialization')
+        if group_by not in ('specialization', 'doctor'):
+            return jsonify({"msg": "group_by must be 'specialization' or 'doctor'"}), 400
+        try:
+            start, end = parse_range(request.args)
+        except ValueError as e:
+            return jsonify({"msg": str(e)}), 400
+        
+        days = daily_counts(start, end, doctor_id=request.args.get('doctor_id', type=int), group_by=group_by)
+        return jsonify({"from": start, "to": end, "group_by": group_by, "days": days}), 200
+    
+    except Exception as e:
+        logger.error("Failed to fetch analytics: %s", str(e))
+        return jsonify({"msg": f"Failed to fetch analytics: {str(e)}"}), 500
+
+@admin_bp.route('/export/<kind>', methods=['GET'])
+@admin_required
+def export_data(kind):
+    if kind not in EXPORTS:
+        return jsonify({"msg": f"Unknown export '{kind}'. Use one of: {', '.join(EXPORTS)}"}), 404
+    
+    fmt = request.args.get('format', 'ndjson')
+    if fmt not in FORMATS:
+        return jsonify({"msg": "format must be 'ndjson' or 'csv'"}), 400
+    
+    try:
+        start = datetime.strptime(request.args['from'], '%Y-%m-%d') if request.args.get('from') else None
+        end = datetime.strptime(request.args['to'], '%Y-%m-%d') if request.args.get('to') else None
+    except ValueError:
+        return jsonify({"msg": "Invalid date format. Use YYYY-MM-DD"}), 400
+    
+    doctor_id = request.args.get('doctor_id', type=int)
+    if doctor_id is not None and not EXPORTS[kind][2]:
+        return jsonify({"msg": f"doctor_id filter is not supported for {kind}"}), 400
+    
+    include_archived = request.args.get('include_archived', 'false').lower() in ('1', 'true')
+    logger.info("Starting %s export of %s (from=%s, to=%s, doctor=%s)", fmt, kind, start, end, doctor_id)
+    
+    body = export(kind, fmt, start=start, end=end, doctor_id=doctor_id, include_archived=include_archived,
+                  chunk_rows=current_app.config.get('EXPORT_CHUNK_ROWS', 1000))
+    response = Response(stream_with_context(body), mimetype=FORMATS[fmt])
+    response.headers['Content-Disposition'] = f'attachment; filename="{kind}.{fmt}"'
+    return response
@@ -1,47 +1,23 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from models.appointment import Appointment
 from models.doctor import Doctor
 from models.reminder import Reminder
 from database import db
+from services import agora
+from services.idempotency import idempotent
+from services.identity import principals
+from services.archival import appointment_history
+from services.bootstrap import patient_appointments, patient_reminders
+from services.notifications import notify_appointment
+from services.slot_holds import active_hold, convert_hold
+from services.user_cache import cached_body
 from datetime import datetime, timedelta
 import logging
 import re
 import os
 import time
 
-# Improved Agora token builder import with better error handling
-AGORA_AVAILABLE = False
-RtcTokenBuilder = None
-Role_Publisher = None
-
-try:
-    # Try the most common import pattern first
-    from agora_token_builder import RtcTokenBuilder
-    from agora_token_builder.RtcTokenBuilder import Role_Publisher
-    AGORA_AVAILABLE = True
-    AGORA_IMPORT_METHOD = 'standard'
-    print("Successfully imported agora-token-builder (standard method)")
-except ImportError:
-    try:
-        # Alternative import pattern
-        from agora_token_builder.RtcTokenBuilder import RtcTokenBuilder, Role_Publisher
-        AGORA_AVAILABLE = True
-        AGORA_IMPORT_METHOD = 'alternative'
-        print("Successfully imported agora-token-builder (alternative method)")
-    except ImportError:
-        try:
-            # Try direct import
-            import agora_token_builder
-            RtcTokenBuilder = agora_token_builder.RtcTokenBuilder
-            Role_Publisher = 1  # Publisher role constant
-            AGORA_AVAILABLE = True
-            AGORA_IMPORT_METHOD = 'direct'
-            print("Successfully imported agora-token-builder (direct method)")
-        except ImportError:
-            print("ERROR: agora-token-builder not installed. Please install it with: pip install agora-token-builder")
-            AGORA_AVAILABLE = False
-
 logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
 
@@ -66,7 +42,7 @@ def generate_agora_token(app_id, app_certificate, channel_name, uid, role, expir
     """
     Generate Agora RTC token with proper error handling
     """
-    if not AGORA_AVAILABLE:
+    if not agora.is_available():
         logger.error("Agora token builder not available - cannot generate real token")
         raise Exception("Agora SDK not properly installed")
     
@@ -77,26 +53,12 @@ def generate_agora_token(app_id, app_certificate, channel_name, uid, role, expir
         raise Exception(f"Invalid Agora credentials: {message}")
     
     try:
-        logger.debug(f"Generating token with method: {AGORA_IMPORT_METHOD}")
+        logger.debug(f"Generating token with method: {agora.import_method()}")
         logger.debug(f"Parameters - Channel: {channel_name}, UID: {uid}, Role: {role}, Expiration: {expiration_time}")
         
-        if AGORA_IMPORT_METHOD == 'standard':
-            # Standard import method
-            token = RtcTokenBuilder.buildTokenWithUid(
-                app_id, app_certificate, channel_name, int(uid), Role_Publisher, expiration_time
-            )
-        elif AGORA_IMPORT_METHOD == 'alternative':
-            # Alternative import method
-            token = RtcTokenBuilder.buildTokenWithUid(
-                app_id, app_certificate, channel_name, int(uid), Role_Publisher, expiration_time
-            )
-        elif AGORA_IMPORT_METHOD == 'direct':
-            # Direct import method
-            token = RtcTokenBuilder.buildTokenWithUid(
-                app_id, app_certificate, channel_name, int(uid), Role_Publisher, expiration_time
-            )
-        else:
-            raise Exception("No valid Agora import method available")
+        token = agora.build_token_with_uid(
+            app_id, app_certificate, channel_name, int(uid), role, expiration_time
+        )
         
         if not token or token.startswith('mock_'):
             raise Exception("Failed to generate valid token")
@@ -145,6 +107,7 @@ def get_doctor(doctor_id):
 
 @appointment_bp.route('/appointments/book', methods=['POST'])
 @jwt_required()
+@idempotent
 def book_appointment():
     try:
         user_id = get_jwt_identity()
@@ -174,13 +137,20 @@ def book_appointment():
         
         existing_appointment = Appointment.query.filter_by(
             doctor_id=data['doctor_id'],
-            time=data['time'],
+            time=appointment_time,
             status='Scheduled'
         ).first()
         if existing_appointment:
             logger.warning(f"Time slot conflict: Doctor ID {data['doctor_id']}, Time {data['time']}")
             return jsonify({"msg": "This time slot is already booked"}), 409
         
+        hold = active_hold(data['doctor_id'], appointment_time)
+        if hold and hold.user_id != user_id_int:
+            logger.warning(f"Time slot held by another patient: Doctor ID {data['doctor_id']}, Time {data['time']}")
+            return jsonify({"msg": "This time slot is being held by another patient"}), 409
+        if hold:
+            convert_hold(hold.id)
+        
         appointment = Appointment(
             user_id=user_id_int,
             doctor_id=data['doctor_id'],
@@ -190,6 +160,8 @@ def book_appointment():
         )
         
         db.session.add(appointment)
+        db.session.flush()
+        notify_appointment('booked', appointment)
         db.session.commit()
         logger.info(f"Appointment booked successfully: ID {appointment.id}, User {user_id_int}")
         
@@ -210,29 +182,31 @@ def my_appointments():
         user_id = get_jwt_identity()
         user_id_int = int(user_id)
         logger.debug(f"Fetching appointments for user ID: {user_id}")
-        appointments = Appointment.query.filter_by(user_id=user_id_int).all()
-        logger.info(f"Fetched {len(appointments)} appointments for user {user_id_int}")
-        
-        result = []
-        for a in appointments:
-            doctor = Doctor.query.get(a.doctor_id)
-            result.append({
-                "id": a.id,
-                "doctor_name": doctor.name if doctor else "Unknown Doctor",
-                "doctor_id": a.doctor_id,
-                "time": a.time,
-                "status": a.status,
-                "reason": a.reason
-            })
-        
-        return jsonify(result), 200
+        body = cached_body('appointments', user_id_int, patient_appointments)
+        return current_app.response_class(body, mimetype='application/json')
     
     except Exception as e:
         logger.error(f"Failed to fetch appointments: {str(e)}")
         return jsonify({"msg": f"Failed to fetch appointments: {str(e)}"}), 500
 
+@appointment_bp.route('/appointments/history', methods=['GET'])
+@jwt_required()
+def my_appointment_history():
+    try:
+        user_id_int = int(get_jwt_identity())
+        page = max(request.args.get('page', 1, type=int), 1)
+        per_page = min(max(request.args.get('per_page', 20, type=int), 1), 100)
+        # Pages across recent and archived appointments as one list
+        items, total = appointment_history(user_id=user_id_int, page=page, per_page=per_page)
+        return jsonify({"items": items, "page": page, "per_page": per_page, "total": total}), 200
+    
+    except Exception as e:
+        logger.error(f"Failed to fetch appointment history: {str(e)}")
+        return jsonify({"msg": f"Failed to fetch appointment history: {str(e)}"}), 500
+
 @appointment_bp.route('/appointments/<int:appointment_id>', methods=['DELETE'])
 @jwt_required()
+@idempotent
 def cancel_appointment(appointment_id):
     try:
         user_id = get_jwt_identity()
@@ -253,6 +227,7 @@ def cancel_appointment(appointment_id):
             return jsonify({"msg": "Appointment is already cancelled"}), 400
         
         appointment.status = 'Cancelled'
+        notify_appointment('cancelled', appointment)
         db.session.commit()
         logger.info(f"Appointment cancelled successfully: ID {appointment_id}")
         
@@ -329,14 +304,20 @@ def reschedule_appointment(appointment_id):
         
         existing_appointment = Appointment.query.filter_by(
             doctor_id=appointment.doctor_id,
-            time=data['time'],
+            time=new_time,
             status='Scheduled'
         ).first()
         if existing_appointment and existing_appointment.id != appointment_id:
             logger.warning(f"Time slot conflict: Doctor ID {appointment.doctor_id}, Time {data['time']}")
             return jsonify({"msg": "This time slot is already booked"}), 409
         
-        appointment.time = data['time']
+        hold = active_hold(appointment.doctor_id, new_time)
+        if hold and hold.user_id != user_id_int:
+            logger.warning(f"Time slot held by another patient: Doctor ID {appointment.doctor_id}, Time {data['time']}")
+            return jsonify({"msg": "This time slot is being held by another patient"}), 409
+        
+        appointment.time = new_time
+        notify_appointment('rescheduled', appointment)
         db.session.commit()
         logger.info(f"Appointment rescheduled successfully: ID {appointment_id} to {data['time']}")
         
@@ -352,6 +333,7 @@ def reschedule_appointment(appointment_id):
 
 @appointment_bp.route('/reminders', methods=['POST'])
 @jwt_required()
+@idempotent
 def create_reminder():
     try:
         user_id = get_jwt_identity()
@@ -399,16 +381,8 @@ def my_reminders():
         user_id = get_jwt_identity()
         user_id_int = int(user_id)
         logger.debug(f"Fetching reminders for user ID: {user_id}")
-        
-        reminders = Reminder.query.filter_by(user_id=user_id_int).all()
-        logger.info(f"Fetched {len(reminders)} reminders for user {user_id_int}")
-        
-        return jsonify([{
-            "id": r.id,
-            "medication": r.medication,
-            "time": r.time,
-            "created_at": r.created_at.isoformat()
-        } for r in reminders]), 200
+        body = cached_body('reminders', user_id_int, patient_reminders)
+        return current_app.response_class(body, mimetype='application/json')
     
     except Exception as e:
         logger.error(f"Failed to fetch reminders: {str(e)}")
@@ -475,7 +449,7 @@ def verify_video_access(appointment_id):
           }), 403
 
         
-        doctor = Doctor.query.get(appointment.doctor_id)
+        doctor = principals.doctor(appointment.doctor_id)
         if not doctor:
             logger.warning(f"Doctor not found for appointment ID {appointment_id}")
             return jsonify({"msg": "Doctor not found"}), 404
@@ -502,7 +476,7 @@ def verify_video_access(appointment_id):
         try:
             # Generate the Agora token
             token = generate_agora_token(
-                app_id, app_certificate, channel_name, uid, Role_Publisher, expiration_time
+                app_id, app_certificate, channel_name, uid, agora.role_publisher(), expiration_time
             )
             
             logger.info(f"Successfully generated video access token for appointment {appointment_id}")
@@ -511,13 +485,13 @@ def verify_video_access(appointment_id):
                 "msg": "Access granted",
                 "appointment_id": appointment.id,
                 "room_id": f"appointment_{appointment.id}",
-                "doctor_user_id": str(doctor.id),
+                "doctor_user_id": str(doctor["id"]),
                 "patient_user_id": str(user_id_int),
                 "token": token,
                 "app_id": app_id,
                 "channel_name": channel_name,
                 "uid": uid,
-                "doctor_name": doctor.name,
+                "doctor_name": doctor["name"],
                 "appointment_time": appointment.time
             }), 200
             
@@ -572,9 +546,10 @@ def cleanup_expired_appointments_endpoint():
 def video_health_check():
     """Check if video service is properly configured"""
     is_valid, message = validate_agora_credentials()
+    agora_available = agora.is_available()
     return jsonify({
-        "agora_available": AGORA_AVAILABLE,
+        "agora_available": agora_available,
         "credentials_valid": is_valid,
         "message": message,
-        "import_method": AGORA_IMPORT_METHOD if AGORA_AVAILABLE else None
-    }), 200 if (AGORA_AVAILABLE and is_valid) else 503
\ No newline at end of file
+        "import_method": agora.import_method()
+    }), 200 if (agora_available and is_valid) else 503
\ No newline at end of file
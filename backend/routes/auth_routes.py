@@ -1,14 +1,13 @@
 from flask import Blueprint, request, jsonify, redirect, url_for
-from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity
+from flask_jwt_extended import create_access_token, jwt_required
 from models.user import User
-from models.chat_message import ChatMessage
 from database import db
 import logging
 from services.chatbot_engine import chat_state
-import requests
+from services.chat_retention import start_chat_session
+from services.identity import current_identity, patient_claims
 import os
-from google.oauth2 import id_token
-from google.auth.transport import requests as google_requests
+from services import google_auth
 
 logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
@@ -36,7 +35,7 @@ def register():
         db.session.commit()
         logger.info("User registered successfully: %s", user.email)
         
-        access_token = create_access_token(identity=str(user.id))
+        access_token = create_access_token(identity=str(user.id), additional_claims=patient_claims(user))
         return jsonify({
             "msg": "User registered successfully",
             "token": access_token,
@@ -67,11 +66,14 @@ def login():
         if str(user.id) in chat_state:
             del chat_state[str(user.id)]
         
-        # Clear previous chat history
-        ChatMessage.query.filter_by(user_id=user.id).delete()
+        # Claims are read before the commit expires the loaded user
+        claims = patient_claims(user)
+        
+        # Hide previous chat history; retention removes it in the background
+        start_chat_session(user.id)
         db.session.commit()
         
-        access_token = create_access_token(identity=str(user.id))
+        access_token = create_access_token(identity=str(user.id), additional_claims=claims)
         logger.info("User logged in successfully: %s, Token issued: %s", user.email, access_token)
         
         return jsonify({
@@ -99,11 +101,7 @@ def google_login():
             return jsonify({"msg": "Google authentication not configured"}), 500
 
         # Verify the Google ID token
-        id_info = id_token.verify_oauth2_token(
-            credential,
-            google_requests.Request(),
-            google_client_id
-        )
+        id_info = google_auth.verify_id_token(credential, google_client_id)
 
         email = id_info.get('email')
         if not email:
@@ -124,13 +122,14 @@ def google_login():
         else:
             logger.info("Existing user logged in via Google: %s", email)
 
-        # Clear chat state and history
+        # Clear chat state and start a fresh chat session
         if str(user.id) in chat_state:
             del chat_state[str(user.id)]
-        ChatMessage.query.filter_by(user_id=user.id).delete()
+        claims = patient_claims(user)
+        start_chat_session(user.id)
         db.session.commit()
 
-        access_token = create_access_token(identity=str(user.id))
+        access_token = create_access_token(identity=str(user.id), additional_claims=claims)
         logger.info("Google login successful for user: %s, Token issued: %s", email, access_token)
 
         return jsonify({
@@ -151,21 +150,21 @@ def google_login():
 @jwt_required()
 def logout():
     try:
-        identity = get_jwt_identity()
-        logger.debug("Logout request for identity: %s", identity)
+        identity = current_identity()
+        logger.debug("Logout request for identity: %s", identity.subject)
 
         # CASE 1: Doctor token
-        if isinstance(identity, str) and identity.startswith("doctor_"):
+        if identity.is_doctor:
             logger.info("Doctor logout detected, no chat cleanup needed")
             return jsonify({"msg": "Doctor logged out successfully"}), 200
 
         # CASE 2: User token
-        user_id = int(identity)
+        user_id = identity.user_id
 
         if str(user_id) in chat_state:
             del chat_state[str(user_id)]
 
-        ChatMessage.query.filter_by(user_id=user_id).delete()
+        start_chat_session(user_id)
         db.session.commit()
 
         logger.info("User logged out successfully: %s", user_id)
@@ -179,16 +178,16 @@ def logout():
 @jwt_required()
 def get_me():
     try:
-        user_id = get_jwt_identity()
-        logger.debug("Fetching user with ID: %s", user_id)
+        identity = current_identity()
+        logger.debug("Fetching user with ID: %s", identity.subject)
         
-        user = User.query.get(int(user_id))
-        if not user:
-            logger.warning("User not found: ID %s", user_id)
+        # The email comes from the token claims; older tokens fall back to the identity cache
+        if identity.is_doctor or identity.email is None:
+            logger.warning("User not found: ID %s", identity.subject)
             return jsonify({"msg": "User not found"}), 404
         
-        logger.info("User fetched successfully: %s", user.email)
-        return jsonify({"email": user.email, "user_id": user_id}), 200
+        logger.info("User fetched successfully: %s", identity.email)
+        return jsonify({"email": identity.email, "user_id": identity.subject}), 200
     
     except Exception as e:
         logger.error("Failed to fetch user: %s", str(e))
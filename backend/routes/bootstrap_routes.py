@@ -0,0 +1,60 @@
+# bootstrap_routes.py
+from flask import Blueprint, request, jsonify
+from flask_jwt_extended import jwt_required
+from services.bootstrap import PATIENT_SECTIONS, DOCTOR_SECTIONS, parse_fields, build
+from services.identity import current_identity
+import logging
+
+logger = logging.getLogger(__name__)
+
+bootstrap_bp = Blueprint('bootstrap', __name__, url_prefix='/api')
+
+@bootstrap_bp.route('/bootstrap', methods=['GET'])
+@jwt_required()
+def patient_bootstrap():
+    try:
+        identity = current_identity()
+        if identity.is_doctor:
+            return jsonify({"msg": "Patient access required"}), 403
+
+        try:
+            selected = parse_fields(request.args.get('fields'), PATIENT_SECTIONS)
+        except ValueError as e:
+            return jsonify({"msg": str(e)}), 400
+
+        result = build(PATIENT_SECTIONS, identity.user_id, selected)
+        if result is None:
+            logger.warning("User not found: ID %s", identity.subject)
+            return jsonify({"msg": "User not found"}), 404
+
+        logger.info("Bootstrap sections %s loaded for user %s", sorted(selected), identity.subject)
+        return jsonify(result), 200
+
+    except Exception as e:
+        logger.error("Failed to load patient bootstrap: %s", str(e))
+        return jsonify({"msg": f"Failed to load dashboard: {str(e)}"}), 500
+
+@bootstrap_bp.route('/doctor/bootstrap', methods=['GET'])
+@jwt_required()
+def doctor_bootstrap():
+    try:
+        identity = current_identity()
+        if not identity.is_doctor:
+            return jsonify({"msg": "Doctor access required"}), 403
+
+        try:
+            selected = parse_fields(request.args.get('fields'), DOCTOR_SECTIONS)
+        except ValueError as e:
+            return jsonify({"msg": str(e)}), 400
+
+        result = build(DOCTOR_SECTIONS, identity.doctor_id, selected)
+        if result is None:
+            logger.warning("Doctor not found: %s", identity.subject)
+            return jsonify({"msg": "Doctor not found"}), 404
+
+        logger.info("Bootstrap sections %s loaded for %s", sorted(selected), identity.subject)
+        return jsonify(result), 200
+
+    except Exception as e:
+        logger.error("Failed to load doctor bootstrap: %s", str(e))
+        return jsonify({"msg": f"Failed to load dashboard: {str(e)}"}), 500
@@ -0,0 +1,66 @@
+# calendar_routes.py
+from flask import Blueprint, Response, current_app, request, jsonify, url_for
+from flask_jwt_extended import jwt_required
+from services import metrics
+from services.calendar_feed import feed_etag, feed_token, get_feed, read_feed_token
+from services.http_policy import compress_body, negotiated_encoding
+from services.identity import current_identity
+import logging
+
+logger = logging.getLogger(__name__)
+
+calendar_bp = Blueprint('calendar', __name__, url_prefix='/api/calendar')
+
+@calendar_bp.route('/feed-url', methods=['GET'])
+@jwt_required()
+def feed_url():
+    try:
+        identity = current_identity()
+        if identity.is_doctor:
+            token = feed_token('doctor', identity.doctor_id)
+        else:
+            token = feed_token('user', identity.user_id)
+        if token is None:
+            logger.warning("Calendar feed URL requested for missing %s", identity.subject)
+            return jsonify({"msg": "User not found"}), 404
+        url = url_for('calendar.feed', token=token, _external=True)
+        logger.info("Calendar feed URL issued for %s", identity.subject)
+        # webcal:// makes browsers hand the link to the calendar app as a subscription
+        return jsonify({"url": url, "webcal_url": 'webcal://' + url.split('://', 1)[1]}), 200
+
+    except Exception as e:
+        logger.error("Failed to issue calendar feed URL: %s", str(e))
+        return jsonify({"msg": f"Failed to issue calendar feed URL: {str(e)}"}), 500
+
+@calendar_bp.route('/<token>.ics', methods=['GET'])
+def feed(token):
+    try:
+        principal = read_feed_token(token)
+        if principal is None:
+            logger.warning("Invalid or revoked calendar feed token")
+            return jsonify({"msg": "Invalid or revoked calendar feed link"}), 404
+
+        body = get_feed(*principal)
+        if body is None:
+            logger.warning("Calendar feed for missing %s %s", *principal)
+            return jsonify({"msg": "Calendar not found"}), 404
+
+        # Compressed here rather than in http_policy so the ETag stays strong:
+        # it is computed for the exact bytes sent in each encoding
+        encoding = negotiated_encoding(len(body), current_app.config)
+        etag = feed_etag(body, encoding)
+        if request.if_none_match.contains_weak(etag):
+            metrics.incr('calendar_feed.not_modified')
+            response = Response(status=304)
+        elif encoding:
+            response = Response(compress_body(body, encoding, current_app.config), mimetype='text/calendar')
+            response.headers['Content-Encoding'] = encoding
+        else:
+            response = Response(body, mimetype='text/calendar')
+        response.set_etag(etag)
+        response.vary.add('Accept-Encoding')
+        return response
+
+    except Exception as e:
+        logger.error("Failed to load calendar feed: %s", str(e))
+        return jsonify({"msg": f"Failed to load calendar feed: {str(e)}"}), 500
@@ -1,8 +1,7 @@
 from flask import Blueprint, request, jsonify
-from flask_jwt_extended import get_jwt_identity, decode_token
 from services.chatbot_engine import get_bot_response
-from models.chat_message import ChatMessage
-from database import db
+from services.chat_retention import load_history
+from services.identity import current_identity
 import logging
 
 logging.basicConfig(level=logging.DEBUG)
@@ -28,13 +27,9 @@ def chatbot():
     try:
         # Use authenticated user ID if available
         if not user_id and token:
-            try:
-                decoded_token = decode_token(token)
-                user_id = decoded_token['sub']
-                logger.debug("Authenticated user ID: %s", user_id)
-            except Exception:
-                logger.debug("No authenticated user")
-                user_id = None
+            identity = current_identity()
+            user_id = identity.subject if identity else None
+            logger.debug("Authenticated user ID: %s", user_id)
         
         response = get_bot_response(message, user_id, token)
         logger.info("Chatbot response generated for message: %s", message)
@@ -50,11 +45,12 @@ def get_chat_history():
         if not token:
             return jsonify({"msg": "Missing token"}), 401
         
-        decoded_token = decode_token(token)
-        user_id = decoded_token['sub']
+        identity = current_identity()
+        if identity is None:
+            return jsonify({"msg": "Invalid token. Please log in again."}), 401
+        user_id = identity.subject
         
-        messages = ChatMessage.query.filter_by(user_id=int(user_id)).order_by(ChatMessage.timestamp.asc()).all()
-        history = [{"sender": m.sender, "text": m.text} for m in messages]
+        history = load_history(int(user_id))
         
         logger.info("Chat history retrieved for user: %s", user_id)
         return jsonify({"history": history})
@@ -1,32 +1,19 @@
 # doctor_routes.py
 from flask import Blueprint, request, jsonify
-from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity
-from models.doctor import Doctor
+from flask_jwt_extended import create_access_token, jwt_required
 from models.appointment import Appointment
-from models.user import User
 from database import db
+from services import agora
+from services.archival import appointment_history
+from services.bootstrap import doctor_appointments, doctor_me
+from services.identity import current_identity, doctor_claims, principals
+from services.notifications import notify_appointment
+from services.rollups import daily_counts, parse_range
 from datetime import datetime, timedelta
 import logging
 import os
 import time
 
-# Try different import methods for Agora token builder
-try:
-    from agora_token_builder import RtcTokenBuilder
-    from agora_token_builder.RtcTokenBuilder import Role_Publisher
-    AGORA_IMPORT_METHOD = 'v1'
-except ImportError:
-    try:
-        from agora_token_builder.RtcTokenBuilder import RtcTokenBuilder, Role_Publisher
-        AGORA_IMPORT_METHOD = 'v2'
-    except ImportError:
-        try:
-            import agora_token_builder as agora
-            AGORA_IMPORT_METHOD = 'v3'
-        except ImportError:
-            AGORA_IMPORT_METHOD = None
-            print("Warning: agora-token-builder not installed")
-
 logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
 
@@ -40,6 +27,9 @@ DOCTOR_CREDENTIALS = {
     'doctor_sunita@clinic.com': {'password': 'doctor123', 'doctor_id': 'doctor_sunita'}
 }
 
+# Login lookup keyed by lowercased email (emails are case-insensitive)
+DOCTOR_LOGINS = {email.lower(): cred for email, cred in DOCTOR_CREDENTIALS.items()}
+
 def generate_agora_token(app_id, app_certificate, channel_name, uid, role, expiration_time):
     """
     Generate Agora RTC token with compatibility for different versions
@@ -48,22 +38,8 @@ def generate_agora_token(app_id, app_certificate, channel_name, uid, role, expir
         # Ensure UID is an integer
         uid_int = int(uid) if uid else 0
         
-        if AGORA_IMPORT_METHOD == 'v1':
-            try:
-                token = RtcTokenBuilder.buildTokenWithUid(
-                    app_id, app_certificate, channel_name, uid_int, role, expiration_time
-                )
-            except AttributeError:
-                # Fallback method for v1
-                token = RtcTokenBuilder.build_token_with_uid(
-                    app_id, app_certificate, channel_name, uid_int, role, expiration_time
-                )
-        elif AGORA_IMPORT_METHOD == 'v2':
-            token = RtcTokenBuilder.buildTokenWithUid(
-                app_id, app_certificate, channel_name, uid_int, role, expiration_time
-            )
-        elif AGORA_IMPORT_METHOD == 'v3':
-            token = agora.RtcTokenBuilder.buildTokenWithUid(
+        if agora.is_available():
+            token = agora.build_token_with_uid(
                 app_id, app_certificate, channel_name, uid_int, role, expiration_time
             )
         else:
@@ -107,13 +83,7 @@ def doctor_login():
         logger.debug("Attempting login for email: %s", email)
         logger.debug("Available doctor emails: %s", list(DOCTOR_CREDENTIALS.keys()))
         
-        # Check credentials (case-insensitive email comparison)
-        doctor_cred = None
-        for cred_email, cred_data in DOCTOR_CREDENTIALS.items():
-            if cred_email.lower() == email:
-                doctor_cred = cred_data
-                break
-        
+        doctor_cred = DOCTOR_LOGINS.get(email)
         if not doctor_cred or doctor_cred['password'] != password:
             logger.warning("Invalid doctor credentials for email: %s", email)
             return jsonify({"msg": "Invalid doctor credentials"}), 401
@@ -122,26 +92,25 @@ def doctor_login():
         doctor_id = doctor_cred['doctor_id']
         logger.debug("Looking for doctor with doctor_id: %s", doctor_id)
         
-        doctor = Doctor.query.filter_by(zego_user_id=doctor_id).first()
+        doctor = principals.doctor_by_zego_id(doctor_id)
         
         if not doctor:
             logger.warning("Doctor not found for doctor_id: %s", doctor_id)
-            all_doctors = Doctor.query.all()
-            logger.debug("All doctors in database: %s", [(d.id, d.name, d.zego_user_id) for d in all_doctors])
             return jsonify({"msg": "Doctor not found in database"}), 404
         
-        access_token = create_access_token(identity=f"doctor_{doctor.id}")
-        logger.info("Doctor logged in successfully: %s (ID: %d)", email, doctor.id)
+        access_token = create_access_token(identity=f"doctor_{doctor['id']}",
+                                           additional_claims=doctor_claims(doctor, email))
+        logger.info("Doctor logged in successfully: %s (ID: %d)", email, doctor["id"])
         
         return jsonify({
             "msg": "Doctor logged in successfully",
             "token": access_token,
-            "doctor_id": doctor.id,
+            "doctor_id": doctor["id"],
             "role": "doctor",
             "doctor_info": {
-                "name": doctor.name,
-                "specialization": doctor.specialization,
-                "doctor_id": doctor.zego_user_id
+                "name": doctor["name"],
+                "specialization": doctor["specialization"],
+                "doctor_id": doctor["zego_user_id"]
             }
         }), 200
     
@@ -153,28 +122,22 @@ def doctor_login():
 @jwt_required()
 def get_doctor_info():
     try:
-        token_data = get_jwt_identity()
-        logger.debug("Fetching doctor info for token: %s", token_data)
+        identity = current_identity()
+        logger.debug("Fetching doctor info for token: %s", identity.subject)
         
-        if not token_data.startswith('doctor_'):
-            logger.warning("Invalid token format for doctor access: %s", token_data)
+        if not identity.is_doctor:
+            logger.warning("Invalid token format for doctor access: %s", identity.subject)
             return jsonify({"msg": "Doctor access required"}), 403
         
-        doctor_id = int(token_data.replace('doctor_', ''))
-        doctor = Doctor.query.get(doctor_id)
+        doctor_id = identity.doctor_id
+        doctor = doctor_me(doctor_id)
         
         if not doctor:
             logger.warning("Doctor not found: ID %d", doctor_id)
             return jsonify({"msg": "Doctor not found"}), 404
         
-        logger.info("Doctor info fetched successfully: %s", doctor.name)
-        return jsonify({
-            "id": doctor.id,
-            "name": doctor.name,
-            "specialization": doctor.specialization,
-            "availability": doctor.availability,
-            "doctor_id": doctor.zego_user_id
-        }), 200
+        logger.info("Doctor info fetched successfully: %s", doctor["name"])
+        return jsonify(doctor), 200
     
     except Exception as e:
         logger.error("Failed to fetch doctor info: %s", str(e))
@@ -184,43 +147,15 @@ def get_doctor_info():
 @jwt_required()
 def get_doctor_appointments():
     try:
-        token_data = get_jwt_identity()
-        logger.debug("Fetching appointments for doctor token: %s", token_data)
+        identity = current_identity()
+        logger.debug("Fetching appointments for doctor token: %s", identity.subject)
         
-        if not token_data.startswith('doctor_'):
+        if not identity.is_doctor:
             return jsonify({"msg": "Doctor access required"}), 403
         
-        doctor_id = int(token_data.replace('doctor_', ''))
-        
-        today = datetime.now().date()
-        
-        appointments = Appointment.query.filter_by(
-            doctor_id=doctor_id,
-            status='Scheduled'
-        ).all()
-        
-        result = []
-        for appointment in appointments:
-            try:
-                appointment_datetime = appointment.time
-                patient = User.query.get(appointment.user_id)
-                patient_email = patient.email if patient else "Unknown"
-                
-                result.append({
-                    "id": appointment.id,
-                    "patient_email": patient_email,
-                    "patient_id": appointment.user_id,
-                    "time": appointment.time,
-                    "reason": appointment.reason,
-                    "status": appointment.status,
-                    "is_today": appointment_datetime.date() == today,
-                    "is_current": is_appointment_current(appointment_datetime)
-                })
-            except ValueError:
-                logger.error("Invalid time format for appointment %d: %s", appointment.id, appointment.time)
-                continue
-        
-        result.sort(key=lambda x: appointment_datetime)
+        doctor_id = identity.doctor_id
+        
+        result = doctor_appointments(doctor_id)
         
         logger.info("Fetched %d appointments for doctor %d", len(result), doctor_id)
         return jsonify(result), 200
@@ -229,17 +164,56 @@ def get_doctor_appointments():
         logger.error("Failed to fetch doctor appointments: %s", str(e))
         return jsonify({"msg": f"Failed to fetch appointments: {str(e)}"}), 500
 
+@doctor_bp.route('/appointments/history', methods=['GET'])
+@jwt_required()
+def get_doctor_appointment_history():
+    try:
+        identity = current_identity()
+        if not identity.is_doctor:
+            return jsonify({"msg": "Doctor access required"}), 403
+        
+        doctor_id = identity.doctor_id
+        page = max(request.args.get('page', 1, type=int), 1)
+        per_page = min(max(request.args.get('per_page', 20, type=int), 1), 100)
+        items, total = appointment_history(doctor_id=doctor_id, page=page, per_page=per_page)
+        return jsonify({"items": items, "page": page, "per_page": per_page, "total": total}), 200
+    
+    except Exception as e:
+        logger.error("Failed to fetch appointment history: %s", str(e))
+        return jsonify({"msg": f"Failed to fetch appointment history: {str(e)}"}), 500
+
+@doctor_bp.route('/analytics/daily', methods=['GET'])
+@jwt_required()
+def get_doctor_daily_analytics():
+    try:
+        identity = current_identity()
+        if not identity.is_doctor:
+            return jsonify({"msg": "Doctor access required"}), 403
+        
+        doctor_id = identity.doctor_id
+        try:
+            start, end = parse_range(request.args)
+        except ValueError as e:
+            return jsonify({"msg": str(e)}), 400
+        
+        days = daily_counts(start, end, doctor_id=doctor_id)
+        return jsonify({"from": start, "to": end, "days": days}), 200
+    
+    except Exception as e:
+        logger.error("Failed to fetch doctor analytics: %s", str(e))
+        return jsonify({"msg": f"Failed to fetch analytics: {str(e)}"}), 500
+
 @doctor_bp.route('/appointments/<int:appointment_id>/video-access', methods=['GET'])
 @jwt_required()
 def verify_doctor_video_access(appointment_id):
     try:
-        token_data = get_jwt_identity()
-        logger.debug("Doctor video access request for appointment %d, token: %s", appointment_id, token_data)
+        identity = current_identity()
+        logger.debug("Doctor video access request for appointment %d, token: %s", appointment_id, identity.subject)
         
-        if not token_data.startswith('doctor_'):
+        if not identity.is_doctor:
             return jsonify({"msg": "Doctor access required"}), 403
         
-        doctor_id = int(token_data.replace('doctor_', ''))
+        doctor_id = identity.doctor_id
         
         appointment = Appointment.query.get(appointment_id)
         if not appointment:
@@ -267,8 +241,7 @@ def verify_doctor_video_access(appointment_id):
             logger.error("Invalid appointment time format: %s", appointment.time)
             return jsonify({"msg": "Invalid appointment time format"}), 400
         
-        doctor = Doctor.query.get(doctor_id)
-        if not doctor:
+        if not identity.name:
             logger.warning("Doctor not found: ID %d", doctor_id)
             return jsonify({"msg": "Doctor not found"}), 404
         
@@ -286,13 +259,7 @@ def verify_doctor_video_access(appointment_id):
         uid = int(f"1{doctor_id:03d}")  # Doctor UIDs start with 1
         
         # Define role - use 1 for publisher (can send and receive)
-        try:
-            if AGORA_IMPORT_METHOD in ['v1', 'v2']:
-                role = Role_Publisher
-            else:
-                role = 1  # Publisher role
-        except:
-            role = 1  # Default publisher role
+        role = agora.role_publisher()
         
         expiration_time = int(time.time()) + 3600  # Token valid for 1 hour
 
@@ -310,7 +277,7 @@ def verify_doctor_video_access(appointment_id):
             "room_id": channel_name,
             "doctor_user_id": str(uid),
             "patient_user_id": str(int(f"2{appointment.user_id:03d}")),  # Patient UIDs start with 2
-            "doctor_name": doctor.name,
+            "doctor_name": identity.name,
             "patient_id": appointment.user_id,
             "token": token,
             "app_id": app_id,
@@ -325,12 +292,12 @@ def verify_doctor_video_access(appointment_id):
 @jwt_required()
 def complete_appointment(appointment_id):
     try:
-        token_data = get_jwt_identity()
+        identity = current_identity()
         
-        if not token_data.startswith('doctor_'):
+        if not identity.is_doctor:
             return jsonify({"msg": "Doctor access required"}), 403
         
-        doctor_id = int(token_data.replace('doctor_', ''))
+        doctor_id = identity.doctor_id
         
         appointment = Appointment.query.get(appointment_id)
         if not appointment:
@@ -340,6 +307,7 @@ def complete_appointment(appointment_id):
             return jsonify({"msg": "Unauthorized"}), 403
         
         appointment.status = 'Completed'
+        notify_appointment('completed', appointment)
         db.session.commit()
         
         logger.info("Appointment %d marked as completed by doctor %d", appointment_id, doctor_id)
@@ -349,10 +317,3 @@ def complete_appointment(appointment_id):
         db.session.rollback()
         logger.error("Failed to complete appointment: %s", str(e))
         return jsonify({"msg": f"Failed to complete appointment: {str(e)}"}), 500
-
-def is_appointment_current(appointment_datetime):
-    """Check if appointment is within the video call time window"""
-    current_time = datetime.now()
-    start_window = appointment_datetime - timedelta(minutes=5)
-    end_window = appointment_datetime + timedelta(minutes=30)
-    return start_window <= current_time <= end_window
\ No newline at end of file
@@ -0,0 +1,182 @@
+# admission.py
+"""
+Admission control for expensive or abusable endpoints.
+
+Each guarded endpoint has a cost. A request is admitted only if both the
+client IP bucket and, when known, the identity bucket (JWT subject, or the
+email being logged into from this IP) hold enough tokens, and the per-process
+concurrency limit has a free slot. Rejections return 429 with Retry-After
+from a before_request hook, so no database or password-hashing work is done.
+
+IP buckets need the real client address: behind a reverse proxy set
+PROXY_FIX_HOPS (gunicorn.conf.py sets 1 on Render), or every client shares
+the proxy's bucket.
+
+Buckets live in process memory by default. Set ADMISSION_BACKEND to a
+sqlite:/// URL to share them between the workers of one host.
+"""
+import logging
+import math
+import sqlite3
+import threading
+import time
+
+from flask import g, jsonify, request
+
+from services import metrics
+
+logger = logging.getLogger(__name__)
+
+# endpoint -> cost in tokens, and which identity to charge besides the IP
+ADMISSION_RULES = {
+    'auth.login': {'cost': 5, 'identity': 'email'},
+    'auth.register': {'cost': 5, 'identity': 'email'},
+    'auth.google_login': {'cost': 3, 'identity': None},
+    'doctor.doctor_login': {'cost': 3, 'identity': 'email'},
+    'chatbot.chatbot': {'cost': 1, 'identity': 'jwt'},
+    'appointment.book_appointment': {'cost': 2, 'identity': 'jwt'},
+    'appointment.cleanup_expired_appointments_endpoint': {'cost': 10, 'identity': 'jwt'},
+}
+
+class MemoryBucketStore:
+    """Token buckets in a dict; idle buckets are pruned once they would be full again."""
+
+    def __init__(self, max_buckets=100000):
+        self._lock = threading.Lock()
+        self._buckets = {}
+        self.max_buckets = max_buckets
+
+    def take(self, key, cost, capacity, rate, now=None):
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - updated) * rate)
+            if tokens >= cost:
+                self._buckets[key] = (tokens - cost, now)
+                allowed, retry_after = True, 0.0
+            else:
+                self._buckets[key] = (tokens, now)
+                allowed, retry_after = False, (cost - tokens) / rate
+            if len(self._buckets) > self.max_buckets:
+                self._prune(now, capacity, rate)
+        return allowed, retry_after
+
+    def _prune(self, now, capacity, rate):
+        idle = capacity / rate
+        for key in [k for k, (_, updated) in self._buckets.items() if now - updated > idle]:
+            del self._buckets[key]
+
+class SqliteBucketStore:
+    """Token buckets in a SQLite file shared by all workers on a host."""
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS buckets (key TEXT PRIMARY KEY, tokens REAL, updated REAL)")
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=1.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def take(self, key, cost, capacity, rate, now=None):
+        now = time.time() if now is None else now
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT tokens, updated FROM buckets WHERE key = ?", (key,)).fetchone()
+            tokens, updated = row if row else (capacity, now)
+            tokens = min(capacity, tokens + max(0.0, now - updated) * rate)
+            allowed = tokens >= cost
+            if allowed:
+                tokens -= cost
+            conn.execute("INSERT OR REPLACE INTO buckets (key, tokens, updated) VALUES (?, ?, ?)", (key, tokens, now))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return allowed, 0.0 if allowed else (cost - tokens) / rate
+
+def make_store(backend):
+    if backend and backend.startswith('sqlite:///'):
+        return SqliteBucketStore(backend[len('sqlite:///'):])
+    return MemoryBucketStore()
+
+def _identity(rule):
+    kind = rule['identity']
+    if kind == 'email':
+        data = request.get_json(silent=True) or {}
+        email = data.get('email')
+        if not isinstance(email, str) or not email.strip():
+            return None
+        # Per IP as well, so failed attempts from elsewhere cannot lock the account's owner out
+        return f"email:{email.strip().lower()}|ip:{request.remote_addr}"
+    if kind == 'jwt':
+        from flask_jwt_extended import decode_token
+        token = request.headers.get('Authorization', '').replace('Bearer ', '')
+        if not token:
+            return None
+        try:
+            return f"sub:{decode_token(token)['sub']}"
+        except Exception:
+            return None
+    return None
+
+def _reject(endpoint, reason, retry_after):
+    metrics.incr(f"admission.rejected.{endpoint}.{reason}")
+    logger.warning("Admission rejected %s (%s) for %s", endpoint, reason, request.remote_addr)
+    response = jsonify({"msg": "Too many requests. Please try again later."})
+    response.status_code = 429
+    response.headers['Retry-After'] = str(max(1, math.ceil(retry_after)))
+    return response
+
+def init_admission_control(app):
+    if not app.config.get('ADMISSION_ENABLED', True):
+        return
+    # Warned on the first guarded request, so CLI commands stay quiet
+    warn_proxy = not app.config.get('PROXY_FIX_HOPS') and not (app.debug or app.testing)
+    store = make_store(app.config.get('ADMISSION_BACKEND'))
+    ip_capacity = app.config.get('ADMISSION_IP_CAPACITY', 60)
+    ip_rate = app.config.get('ADMISSION_IP_RATE', 1.0)
+    identity_capacity = app.config.get('ADMISSION_IDENTITY_CAPACITY', 30)
+    identity_rate = app.config.get('ADMISSION_IDENTITY_RATE', 0.5)
+    slots = threading.BoundedSemaphore(app.config.get('ADMISSION_MAX_CONCURRENT', 32))
+
+    @app.before_request
+    def _admit():
+        nonlocal warn_proxy
+        rule = ADMISSION_RULES.get(request.endpoint)
+        if rule is None or request.method == 'OPTIONS':
+            return None
+        if warn_proxy:
+            warn_proxy = False
+            logger.warning("Admission control is on but PROXY_FIX_HOPS is 0: behind a proxy every "
+                           "client shares the proxy's IP bucket. Set PROXY_FIX_HOPS to the number of proxies.")
+        endpoint = request.endpoint
+        cost = rule['cost']
+        try:
+            allowed, retry_after = store.take(f"ip:{request.remote_addr}", cost, ip_capacity, ip_rate)
+            if not allowed:
+                return _reject(endpoint, 'ip', retry_after)
+            identity = _identity(rule)
+            if identity:
+                allowed, retry_after = store.take(identity, cost, identity_capacity, identity_rate)
+                if not allowed:
+                    return _reject(endpoint, 'identity', retry_after)
+        except Exception as e:
+            # Never fail closed because the bucket store is unavailable
+            logger.error("Admission control store error: %s", str(e))
+        if not slots.acquire(blocking=False):
+            return _reject(endpoint, 'concurrency', 1)
+        g.admission_slot = True
+        metrics.incr(f"admission.admitted.{endpoint}")
+        return None
+
+    @app.teardown_request
+    def _release(exc):
+        if g.pop('admission_slot', False):
+            slots.release()
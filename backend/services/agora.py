@@ -0,0 +1,73 @@
+# agora.py
+"""
+Lazy adapter around the optional agora-token-builder SDK.
+
+The SDK is only imported the first time a video token is needed, so workers
+that never serve a video call don't pay for it at startup. All routes share
+the single import performed here.
+"""
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+# Publisher role constant, used when the SDK doesn't export Role_Publisher
+DEFAULT_ROLE_PUBLISHER = 1
+
+_lock = threading.Lock()
+_loaded = False
+_sdk = None  # (RtcTokenBuilder, Role_Publisher, import_method) once resolved
+
+def _import_sdk():
+    """Try the known import layouts of agora-token-builder, newest first."""
+    try:
+        from agora_token_builder import RtcTokenBuilder
+        from agora_token_builder.RtcTokenBuilder import Role_Publisher
+        return RtcTokenBuilder, Role_Publisher, 'standard'
+    except ImportError:
+        pass
+    try:
+        from agora_token_builder.RtcTokenBuilder import RtcTokenBuilder, Role_Publisher
+        return RtcTokenBuilder, Role_Publisher, 'alternative'
+    except ImportError:
+        pass
+    try:
+        import agora_token_builder
+        return agora_token_builder.RtcTokenBuilder, DEFAULT_ROLE_PUBLISHER, 'direct'
+    except ImportError:
+        logger.error("agora-token-builder not installed. Please install it with: pip install agora-token-builder")
+        return None
+
+def _get_sdk():
+    global _loaded, _sdk
+    if not _loaded:
+        with _lock:
+            if not _loaded:
+                _sdk = _import_sdk()
+                _loaded = True
+                if _sdk:
+                    logger.info("Loaded agora-token-builder (%s method)", _sdk[2])
+    return _sdk
+
+def is_available():
+    return _get_sdk() is not None
+
+def import_method():
+    sdk = _get_sdk()
+    return sdk[2] if sdk else None
+
+def role_publisher():
+    sdk = _get_sdk()
+    return sdk[1] if sdk else DEFAULT_ROLE_PUBLISHER
+
+def build_token_with_uid(app_id, app_certificate, channel_name, uid, role, expiration_time):
+    """Build an RTC token. Raises RuntimeError if the SDK is not installed."""
+    sdk = _get_sdk()
+    if sdk is None:
+        raise RuntimeError("Agora SDK not properly installed")
+    builder = sdk[0]
+    try:
+        return builder.buildTokenWithUid(app_id, app_certificate, channel_name, uid, role, expiration_time)
+    except AttributeError:
+        # Older releases use snake_case names
+        return builder.build_token_with_uid(app_id, app_certificate, channel_name, uid, role, expiration_time)
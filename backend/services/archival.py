@@ -0,0 +1,109 @@
+# archival.py
+"""
+Archival of finished appointments.
+
+`archive_appointments` moves Completed and Cancelled appointments older than
+ARCHIVE_AFTER_DAYS from `appointment` into `appointment_archive`, one batch
+per transaction, so the hot table only holds recent and upcoming visits.
+`appointment_history` pages over both tables as one time-ordered list for
+history views.
+"""
+import logging
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete, func, insert, literal, literal_column, select, union_all
+
+from database import db
+from models.appointment import Appointment
+from models.appointment_archive import AppointmentArchive
+from models.doctor import Doctor
+from services import metrics
+from services.calendar_feed import publish_doctor_change
+from services.user_cache import publish_user_change
+
+logger = logging.getLogger(__name__)
+
+ARCHIVABLE_STATUSES = ('Completed', 'Cancelled')
+
+_COLUMNS = ['user_id', 'doctor_id', 'time', 'status', 'reason', 'created_at']
+
+def archive_appointments(max_age_days=90, batch_size=1000, max_batches=None):
+    """Move old finished appointments into the archive. Returns the number of rows moved."""
+    cutoff = datetime.now() - timedelta(days=max_age_days)
+    started = time.perf_counter()
+    moved = batches = 0
+    while max_batches is None or batches < max_batches:
+        rows = db.session.execute(
+            select(Appointment.id, Appointment.user_id, Appointment.doctor_id)
+            .where(Appointment.status.in_(ARCHIVABLE_STATUSES), Appointment.time < cutoff)
+            .order_by(Appointment.id)
+            .limit(batch_size)
+        ).all()
+        if not rows:
+            break
+        ids = [r.id for r in rows]
+        try:
+            db.session.execute(insert(AppointmentArchive).from_select(
+                ['original_id'] + _COLUMNS + ['archived_at'],
+                select(Appointment.id, *[getattr(Appointment, c) for c in _COLUMNS], literal(datetime.utcnow()))
+                .where(Appointment.id.in_(ids))
+            ))
+            db.session.execute(delete(Appointment).where(Appointment.id.in_(ids)))
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        # Bulk statements bypass the ORM change tracking that invalidates user caches
+        for user_id in {r.user_id for r in rows}:
+            publish_user_change('appointments', user_id)
+        for doctor_id in {r.doctor_id for r in rows}:
+            publish_doctor_change(doctor_id)
+        moved += len(ids)
+        batches += 1
+        metrics.incr('archival.rows_moved', len(ids))
+        logger.debug("Archived batch of %d appointments", len(ids))
+
+    elapsed = time.perf_counter() - started
+    metrics.incr('archival.runs')
+    metrics.set_gauge('archival.last_run_rows', moved)
+    metrics.set_gauge('archival.last_run_seconds', round(elapsed, 3))
+    logger.info("Archived %d appointments older than %s in %d batches (%.2fs)", moved, cutoff, batches, elapsed)
+    return moved
+
+def appointment_history(user_id=None, doctor_id=None, page=1, per_page=20):
+    """
+    One page of a patient's or doctor's appointments across the hot and archive
+    tables, newest first. Returns (items, total).
+    """
+    def part(model, archived):
+        appointment_id = model.original_id if archived else model.id
+        query = select(
+            appointment_id.label('id'), model.doctor_id, model.user_id, model.time, model.status, model.reason,
+            literal_column('1' if archived else '0').label('archived'),
+        )
+        if user_id is not None:
+            query = query.where(model.user_id == user_id)
+        if doctor_id is not None:
+            query = query.where(model.doctor_id == doctor_id)
+        return query
+
+    combined = union_all(part(Appointment, False), part(AppointmentArchive, True)).subquery()
+    rows = db.session.execute(
+        select(combined, Doctor.name.label('doctor_name'))
+        .outerjoin(Doctor, Doctor.id == combined.c.doctor_id)
+        .order_by(combined.c.time.desc(), combined.c.id.desc())
+        .limit(per_page).offset((page - 1) * per_page)
+    ).all()
+    total = db.session.execute(select(func.count()).select_from(combined)).scalar()
+    items = [{
+        "id": r.id,
+        "doctor_name": r.doctor_name or "Unknown Doctor",
+        "doctor_id": r.doctor_id,
+        "patient_id": r.user_id,
+        "time": r.time,
+        "status": r.status,
+        "reason": r.reason,
+        "archived": bool(int(r.archived)),
+    } for r in rows]
+    return items, total
@@ -0,0 +1,158 @@
+# bootstrap.py
+"""
+Section loaders for the dashboard bootstrap endpoints.
+
+Each section has the same shape as the standalone endpoint the dashboards
+used to call (`/api/auth/me`, `/api/appointments/my`, `/api/reminders/my`,
+`/api/chatbot/history`, `/api/doctor/me`, `/api/doctor/appointments`) and
+costs a fixed number of queries, independent of the number of rows.
+
+Appointments and reminders go through the per-user response cache under the
+same keys as their list endpoints, so dashboard polls cost no query until the
+user's rows change.
+
+`?fields=` trims the response: a bare name selects a whole section,
+`section.field` selects single fields of a section's items, e.g.
+`fields=me,appointments.id,appointments.time`. Sections that are not
+selected are not queried at all.
+"""
+from datetime import datetime, timedelta
+
+from flask import current_app
+
+from database import db
+from models.appointment import Appointment
+from models.doctor import Doctor
+from models.reminder import Reminder
+from models.user import User
+from services.chat_retention import load_history
+from services.identity import current_identity, principals
+from services.user_cache import cached_body
+
+def patient_me(user_id):
+    # Served from the token claims; older tokens fall back to the identity cache
+    identity = current_identity()
+    if identity is not None and identity.user_id == user_id:
+        email = identity.email
+    else:
+        record = principals.user(user_id)
+        email = record["email"] if record else None
+    if email is None:
+        return None
+    return {"email": email, "user_id": str(user_id)}
+
+def patient_appointments(user_id):
+    # Doctor names come from the join instead of a lookup per row
+    rows = db.session.query(Appointment, Doctor.name).outerjoin(
+        Doctor, Doctor.id == Appointment.doctor_id
+    ).filter(Appointment.user_id == user_id).all()
+    return [{
+        "id": a.id,
+        "doctor_name": doctor_name or "Unknown Doctor",
+        "doctor_id": a.doctor_id,
+        "time": a.time,
+        "status": a.status,
+        "reason": a.reason
+    } for a, doctor_name in rows]
+
+def patient_reminders(user_id):
+    return [{
+        "id": r.id,
+        "medication": r.medication,
+        "time": r.time,
+        "created_at": r.created_at.isoformat()
+    } for r in Reminder.query.filter_by(user_id=user_id).all()]
+
+def cached_patient_appointments(user_id):
+    return current_app.json.loads(cached_body('appointments', user_id, patient_appointments))
+
+def cached_patient_reminders(user_id):
+    return current_app.json.loads(cached_body('reminders', user_id, patient_reminders))
+
+def doctor_me(doctor_id):
+    doctor = principals.doctor(doctor_id)
+    if not doctor:
+        return None
+    return {
+        "id": doctor["id"],
+        "name": doctor["name"],
+        "specialization": doctor["specialization"],
+        "availability": doctor["availability"],
+        "doctor_id": doctor["zego_user_id"]
+    }
+
+def is_appointment_current(appointment_datetime, now=None):
+    """Check if appointment is within the video call time window"""
+    now = now or datetime.now()
+    return appointment_datetime - timedelta(minutes=5) <= now <= appointment_datetime + timedelta(minutes=30)
+
+def doctor_appointments(doctor_id):
+    # Already in time order: patient emails come from the join
+    rows = db.session.query(Appointment, User.email).outerjoin(
+        User, User.id == Appointment.user_id
+    ).filter(
+        Appointment.doctor_id == doctor_id,
+        Appointment.status == 'Scheduled'
+    ).order_by(Appointment.time).all()
+    now = datetime.now()
+    today = now.date()
+    return [{
+        "id": a.id,
+        "patient_email": patient_email or "Unknown",
+        "patient_id": a.user_id,
+        "time": a.time,
+        "reason": a.reason,
+        "status": a.status,
+        "is_today": a.time.date() == today,
+        "is_current": is_appointment_current(a.time, now)
+    } for a, patient_email in rows]
+
+# section name -> loader; loaders returning None mean the principal is gone
+PATIENT_SECTIONS = {
+    'me': patient_me,
+    'appointments': cached_patient_appointments,
+    'reminders': cached_patient_reminders,
+    'chat_history': load_history,
+}
+
+DOCTOR_SECTIONS = {
+    'me': doctor_me,
+    'appointments': doctor_appointments,
+}
+
+def parse_fields(value, sections):
+    """{section: None (all fields) | set of field names} from ?fields=; raises ValueError."""
+    if not value:
+        return {name: None for name in sections}
+    selected = {}
+    for item in value.split(','):
+        item = item.strip()
+        if not item:
+            continue
+        section, _, field = item.partition('.')
+        if section not in sections:
+            raise ValueError(f"Unknown field '{section}'")
+        if not field:
+            selected[section] = None
+        elif section not in selected or selected[section] is not None:
+            selected.setdefault(section, set()).add(field)
+    if not selected:
+        raise ValueError("'fields' must name at least one section")
+    return selected
+
+def _trim(value, fields):
+    if fields is None:
+        return value
+    if isinstance(value, dict):
+        return {k: v for k, v in value.items() if k in fields}
+    return [_trim(item, fields) for item in value]
+
+def build(sections, principal_id, selected):
+    """Load the selected sections; None if the principal no longer exists."""
+    result = {}
+    for name, fields in selected.items():
+        value = sections[name](principal_id)
+        if value is None:
+            return None
+        result[name] = _trim(value, fields)
+    return result
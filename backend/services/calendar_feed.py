@@ -0,0 +1,210 @@
+# calendar_feed.py
+"""
+iCalendar feeds of a patient's or a doctor's appointments.
+
+Calendar apps subscribe to a feed URL and cannot send an Authorization
+header, so the URL carries a feed token: the principal and its
+`token_version`, signed with SECRET_KEY (itsdangerous). Revoking the
+principal's tokens (`flask revoke-tokens`) bumps the version in the
+database, which invalidates every feed URL issued before; the user then
+fetches a new one. Feeds of deleted principals are not served.
+
+Rendered feeds are cached per principal in a `ResponseCache`, so a poll
+costs no query until the feed changes. Committed appointment changes
+invalidate the feed through the bus: 'appointments' (keyed by user id,
+published by user_cache) for patient feeds, 'doctor_appointments' (keyed by
+doctor id) for doctor feeds, and 'doctors' for every feed, since they show
+doctor names. Writes the bus does not deliver to this worker (other workers
+without an INVALIDATION_BACKEND, the `flask run-jobs` expiry job) show up
+once the entry expires: a cached feed lives at most one refresh interval
+(CALENDAR_REFRESH_MINUTES), the staleness it advertises in X-PUBLISHED-TTL.
+
+Responses carry a strong ETag over the bytes sent, computed per content
+encoding (the route compresses feeds itself), and a matching If-None-Match
+gets a 304. DTSTAMP is the render time, so each worker's render has its own
+ETag.
+
+Feeds end up in third-party calendar services, so events carry the doctor's
+name and the status but no patient contact details, and the visit reason
+only when CALENDAR_FEED_REASONS is enabled. Appointment times are stored as
+server-local wall-clock times and are emitted as floating times.
+
+Metrics: calendar_feed.hits, .misses, .evictions, .expirations,
+.invalidations, .renders, .not_modified.
+"""
+import hashlib
+import logging
+from datetime import datetime, timedelta
+
+from flask import current_app
+from itsdangerous import BadSignature, URLSafeSerializer
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from database import db
+from models.appointment import Appointment
+from models.doctor import Doctor
+from services import metrics
+from services.identity import principals, token_version
+from services.invalidation import bus
+from services.user_cache import ResponseCache
+
+logger = logging.getLogger(__name__)
+
+KINDS = ('user', 'doctor')
+
+# Appointment.status -> iCalendar STATUS
+EVENT_STATUS = {
+    'Scheduled': 'CONFIRMED',
+    'Completed': 'CONFIRMED',
+    'Cancelled': 'CANCELLED',
+}
+
+feed_cache = ResponseCache(max_bytes=8 * 1024 * 1024, name='calendar_feed')
+
+def _serializer():
+    return URLSafeSerializer(current_app.config['SECRET_KEY'], salt='calendar-feed')
+
+def feed_token(kind, principal_id):
+    """Feed token for the principal's current token version, or None if it does not exist."""
+    version = token_version(kind, principal_id)
+    if version is None:
+        return None
+    return _serializer().dumps([kind, principal_id, version])
+
+def read_feed_token(token):
+    """(kind, principal id) for a valid, current feed token, else None."""
+    try:
+        kind, principal_id, version = _serializer().loads(token)
+    except (BadSignature, ValueError, TypeError):
+        return None
+    if kind not in KINDS or not isinstance(principal_id, int):
+        return None
+    if token_version(kind, principal_id) != version:
+        return None
+    return kind, principal_id
+
+def feed_etag(body, encoding=None):
+    """Strong ETag of `body` as sent with `encoding` (compression is deterministic)."""
+    digest = hashlib.sha256(body).hexdigest()[:32]
+    return f"{digest}-{encoding}" if encoding else digest
+
+def get_feed(kind, principal_id):
+    """The rendered feed (bytes), or None if the principal does not exist."""
+    body = feed_cache.get(kind, principal_id)
+    if body is not None:
+        return body
+    epoch = feed_cache.epoch()
+    body = render_feed(kind, principal_id)
+    if body is not None:
+        feed_cache.put(kind, principal_id, body, epoch)
+    return body
+
+def render_feed(kind, principal_id):
+    if kind == 'doctor':
+        doctor = principals.doctor(principal_id)
+        if doctor is None:
+            return None
+        title = f"{doctor['name']} - WellnessCare appointments"
+        rows = [(a, None) for a in Appointment.query.filter_by(doctor_id=principal_id)
+                .order_by(Appointment.time, Appointment.id).all()]
+    else:
+        if principals.user(principal_id) is None:
+            return None
+        title = "WellnessCare appointments"
+        rows = db.session.query(Appointment, Doctor.name).outerjoin(
+            Doctor, Doctor.id == Appointment.doctor_id
+        ).filter(Appointment.user_id == principal_id).order_by(Appointment.time, Appointment.id).all()
+
+    duration = timedelta(minutes=current_app.config.get('CALENDAR_EVENT_MINUTES', 30))
+    refresh = current_app.config.get('CALENDAR_REFRESH_MINUTES', 15)
+    with_reasons = current_app.config.get('CALENDAR_FEED_REASONS', False)
+    stamp = datetime.utcnow().strftime('%Y%m%dT%H%M%SZ')
+    lines = [
+        "BEGIN:VCALENDAR",
+        "VERSION:2.0",
+        "PRODID:-//WellnessCare//Appointments//EN",
+        "CALSCALE:GREGORIAN",
+        "METHOD:PUBLISH",
+        f"X-WR-CALNAME:{_escape(title)}",
+        f"REFRESH-INTERVAL;VALUE=DURATION:PT{refresh}M",
+        f"X-PUBLISHED-TTL:PT{refresh}M",
+    ]
+    for appointment, doctor_name in rows:
+        if kind == 'doctor':
+            summary = "Patient appointment"
+        else:
+            summary = f"Appointment with {doctor_name or 'Unknown Doctor'}"
+        lines += [
+            "BEGIN:VEVENT",
+            f"UID:appointment-{appointment.id}@wellnesscare",
+            f"DTSTAMP:{stamp}",
+            f"DTSTART:{appointment.time.strftime('%Y%m%dT%H%M%S')}",
+            f"DTEND:{(appointment.time + duration).strftime('%Y%m%dT%H%M%S')}",
+            f"SUMMARY:{_escape(summary)}",
+        ]
+        if with_reasons and appointment.reason:
+            lines.append(f"DESCRIPTION:{_escape(appointment.reason)}")
+        lines += [
+            f"STATUS:{EVENT_STATUS.get(appointment.status, 'TENTATIVE')}",
+            "END:VEVENT",
+        ]
+    lines.append("END:VCALENDAR")
+    metrics.incr('calendar_feed.renders')
+    return "".join(_fold(line) + "\r\n" for line in lines).encode('utf-8')
+
+def _escape(text):
+    return (text.replace('\\', '\\\\').replace(';', '\\;').replace(',', '\\,')
+            .replace('\r\n', '\\n').replace('\n', '\\n'))
+
+def _fold(line, limit=75):
+    """Split a content line into chunks of at most `limit` octets (RFC 5545 3.1)."""
+    data = line.encode('utf-8')
+    if len(data) <= limit:
+        return line
+    parts = []
+    while data:
+        cut = min(limit if not parts else limit - 1, len(data))
+        # Never split a UTF-8 sequence
+        while cut < len(data) and (data[cut] & 0xC0) == 0x80:
+            cut -= 1
+        parts.append(data[:cut].decode('utf-8'))
+        data = data[cut:]
+    return "\r\n ".join(parts)
+
+def _track_doctor_appointments(session, flush_context):
+    changed = session.info.setdefault('calendar_feed_changes', set())
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, Appointment):
+            changed.add(obj.doctor_id)
+
+def publish_doctor_change(doctor_id):
+    bus.publish('doctor_appointments', key=str(doctor_id))
+
+def _publish_after_commit(session):
+    for doctor_id in session.info.pop('calendar_feed_changes', ()):
+        publish_doctor_change(doctor_id)
+
+def _forget_on_rollback(session):
+    session.info.pop('calendar_feed_changes', None)
+
+def _on_user_appointments_changed(key):
+    feed_cache.invalidate('user', None if key is None else int(key))
+
+def _on_doctor_appointments_changed(key):
+    feed_cache.invalidate('doctor', None if key is None else int(key))
+
+def _on_doctors_changed(key):
+    feed_cache.clear()
+    metrics.incr('calendar_feed.invalidations')
+
+def init_calendar_feed(app):
+    feed_cache.max_bytes = app.config.get('CALENDAR_FEED_CACHE_MAX_BYTES', 8 * 1024 * 1024)
+    feed_cache.ttl = app.config.get('CALENDAR_REFRESH_MINUTES', 15) * 60
+    bus.subscribe('appointments', _on_user_appointments_changed)
+    bus.subscribe('doctor_appointments', _on_doctor_appointments_changed)
+    bus.subscribe('doctors', _on_doctors_changed)
+    if not event.contains(Session, 'after_flush', _track_doctor_appointments):
+        event.listen(Session, 'after_flush', _track_doctor_appointments)
+        event.listen(Session, 'after_commit', _publish_after_commit)
+        event.listen(Session, 'after_rollback', _forget_on_rollback)
@@ -0,0 +1,221 @@
+# chat_retention.py
+"""
+Retention for chat history.
+
+Login and logout only move the user's session watermark (`ChatSession`), so
+earlier history disappears from the chat window at once without a bulk delete
+on the request path. `enforce_retention` then cleans up in batches from the
+job scheduler:
+
+- messages before the user's session watermark are dropped
+- messages older than CHAT_RETENTION_DAYS are expired
+- visible messages older than CHAT_COMPRESS_AFTER_HOURS are packed, in runs
+  of CHAT_SEGMENT_SIZE, into zlib-compressed `ChatSegment` rows
+- each user keeps at most CHAT_MAX_MESSAGES_PER_USER messages
+"""
+import json
+import logging
+import time
+import zlib
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete, func, insert, or_, select, update
+from sqlalchemy.exc import IntegrityError
+
+from database import db
+from models.chat_message import ChatMessage
+from models.chat_segment import ChatSegment
+from models.chat_session import ChatSession
+from services import metrics
+
+logger = logging.getLogger(__name__)
+
+def start_chat_session(user_id):
+    """Start a fresh chat session for the user. The caller commits."""
+    now = datetime.utcnow()
+    dialect = db.session.get_bind().dialect.name
+    if dialect in ('sqlite', 'postgresql'):
+        if dialect == 'sqlite':
+            from sqlalchemy.dialects.sqlite import insert as upsert
+        else:
+            from sqlalchemy.dialects.postgresql import insert as upsert
+        statement = upsert(ChatSession).values(user_id=user_id, started_at=now)
+        db.session.execute(statement.on_conflict_do_update(
+            index_elements=[ChatSession.user_id], set_={'started_at': now}
+        ))
+        return
+
+    result = db.session.execute(
+        update(ChatSession).where(ChatSession.user_id == user_id).values(started_at=now)
+    )
+    if result.rowcount:
+        return
+    try:
+        with db.session.begin_nested():
+            db.session.execute(insert(ChatSession).values(user_id=user_id, started_at=now))
+    except IntegrityError:
+        # A concurrent login created the row first
+        db.session.execute(
+            update(ChatSession).where(ChatSession.user_id == user_id).values(started_at=now)
+        )
+
+def _session_start(user_id_column):
+    return select(ChatSession.started_at).where(ChatSession.user_id == user_id_column).scalar_subquery()
+
+def _pack(entries):
+    """entries: [(sender, text, iso timestamp), ...] -> compressed payload"""
+    return zlib.compress(json.dumps(entries, separators=(',', ':')).encode('utf-8'))
+
+def _unpack(payload):
+    return json.loads(zlib.decompress(payload).decode('utf-8'))
+
+def load_history(user_id):
+    """Messages of the user's current chat session, oldest first."""
+    visible_from = _session_start(user_id)
+    segments = db.session.execute(
+        select(ChatSegment.payload)
+        .where(ChatSegment.user_id == user_id,
+               or_(visible_from.is_(None), ChatSegment.first_timestamp >= visible_from))
+        .order_by(ChatSegment.first_timestamp, ChatSegment.id)
+    ).scalars().all()
+    messages = db.session.execute(
+        select(ChatMessage.sender, ChatMessage.text)
+        .where(ChatMessage.user_id == user_id,
+               or_(visible_from.is_(None), ChatMessage.timestamp >= visible_from))
+        .order_by(ChatMessage.timestamp, ChatMessage.id)
+    ).all()
+
+    history = []
+    for payload in segments:
+        history.extend({"sender": sender, "text": text} for sender, text, _ in _unpack(payload))
+    history.extend({"sender": m.sender, "text": m.text} for m in messages)
+    return history
+
+def _purge_messages(criteria, batch_size):
+    removed = 0
+    while True:
+        ids = db.session.execute(
+            select(ChatMessage.id).where(*criteria).order_by(ChatMessage.id).limit(batch_size)
+        ).scalars().all()
+        if not ids:
+            return removed
+        db.session.execute(delete(ChatMessage).where(ChatMessage.id.in_(ids)))
+        db.session.commit()
+        removed += len(ids)
+
+def _purge_segments(criteria, batch_size):
+    removed = 0
+    while True:
+        rows = db.session.execute(
+            select(ChatSegment.id, ChatSegment.message_count).where(*criteria)
+            .order_by(ChatSegment.id).limit(batch_size)
+        ).all()
+        if not rows:
+            return removed
+        db.session.execute(delete(ChatSegment).where(ChatSegment.id.in_([r.id for r in rows])))
+        db.session.commit()
+        removed += sum(r.message_count for r in rows)
+
+def _compress(before, segment_size, batch_size):
+    """Pack full runs of old messages into segments; shorter tails stay as rows."""
+    compressed = 0
+    while True:
+        user_ids = db.session.execute(
+            select(ChatMessage.user_id).where(ChatMessage.timestamp < before)
+            .group_by(ChatMessage.user_id).having(func.count() >= segment_size)
+            .limit(batch_size)
+        ).scalars().all()
+        if not user_ids:
+            return compressed
+        for user_id in user_ids:
+            while True:
+                rows = db.session.execute(
+                    select(ChatMessage.id, ChatMessage.sender, ChatMessage.text, ChatMessage.timestamp)
+                    .where(ChatMessage.user_id == user_id, ChatMessage.timestamp < before)
+                    .order_by(ChatMessage.timestamp, ChatMessage.id).limit(segment_size)
+                ).all()
+                if len(rows) < segment_size:
+                    break
+                db.session.add(ChatSegment(
+                    user_id=user_id,
+                    first_timestamp=rows[0].timestamp,
+                    last_timestamp=rows[-1].timestamp,
+                    message_count=len(rows),
+                    payload=_pack([(r.sender, r.text, r.timestamp.isoformat()) for r in rows])
+                ))
+                db.session.execute(delete(ChatMessage).where(ChatMessage.id.in_([r.id for r in rows])))
+                db.session.commit()
+                compressed += len(rows)
+
+def _enforce_cap(max_messages):
+    """Drop each user's oldest messages beyond the cap, segments first."""
+    live = dict(db.session.execute(
+        select(ChatMessage.user_id, func.count()).group_by(ChatMessage.user_id)
+    ).all())
+    packed = dict(db.session.execute(
+        select(ChatSegment.user_id, func.sum(ChatSegment.message_count)).group_by(ChatSegment.user_id)
+    ).all())
+
+    removed = 0
+    for user_id in set(live) | set(packed):
+        excess = live.get(user_id, 0) + int(packed.get(user_id) or 0) - max_messages
+        if excess <= 0:
+            continue
+        removed += excess
+        if packed.get(user_id):
+            segments = ChatSegment.query.filter_by(user_id=user_id).order_by(
+                ChatSegment.first_timestamp, ChatSegment.id
+            ).all()
+            for segment in segments:
+                if excess <= 0:
+                    break
+                if segment.message_count <= excess:
+                    excess -= segment.message_count
+                    db.session.delete(segment)
+                else:
+                    entries = _unpack(segment.payload)[excess:]
+                    segment.payload = _pack(entries)
+                    segment.message_count = len(entries)
+                    segment.first_timestamp = datetime.fromisoformat(entries[0][2])
+                    excess = 0
+        if excess > 0:
+            ids = db.session.execute(
+                select(ChatMessage.id).where(ChatMessage.user_id == user_id)
+                .order_by(ChatMessage.timestamp, ChatMessage.id).limit(excess)
+            ).scalars().all()
+            db.session.execute(delete(ChatMessage).where(ChatMessage.id.in_(ids)))
+        db.session.commit()
+    return removed
+
+def enforce_retention(retention_days=30, max_messages=500, compress_after_hours=24,
+                      segment_size=200, batch_size=1000):
+    """
+    Run one retention pass. A zero or None limit disables that step.
+    Returns the number of messages affected per step.
+    """
+    started = time.perf_counter()
+    now = datetime.utcnow()
+    counts = {'superseded': 0, 'expired': 0, 'compressed': 0, 'capped': 0}
+
+    counts['superseded'] += _purge_messages(
+        [ChatMessage.timestamp < _session_start(ChatMessage.user_id)], batch_size)
+    counts['superseded'] += _purge_segments(
+        [ChatSegment.last_timestamp < _session_start(ChatSegment.user_id)], batch_size)
+
+    if retention_days:
+        cutoff = now - timedelta(days=retention_days)
+        counts['expired'] += _purge_messages([ChatMessage.timestamp < cutoff], batch_size)
+        counts['expired'] += _purge_segments([ChatSegment.last_timestamp < cutoff], batch_size)
+
+    if compress_after_hours and segment_size:
+        counts['compressed'] = _compress(now - timedelta(hours=compress_after_hours), segment_size, batch_size)
+
+    if max_messages:
+        counts['capped'] = _enforce_cap(max_messages)
+
+    elapsed = time.perf_counter() - started
+    for step, count in counts.items():
+        metrics.incr(f'chat_retention.{step}', count)
+    metrics.set_gauge('chat_retention.last_run_seconds', round(elapsed, 3))
+    logger.info("Chat retention pass: %s (%.2fs)", counts, elapsed)
+    return counts
@@ -0,0 +1,186 @@
+# chat_search.py
+"""
+Full-text search over chat transcripts.
+
+The index lives in the database so writes keep it current without any
+application code on the chatbot path:
+
+- SQLite: an external-content FTS5 table (`chat_message_fts`) kept in sync by
+  insert/update/delete triggers on `chat_message`
+- PostgreSQL: a stored generated `text_tsv` column (`to_tsvector('english',
+  text)`) with a GIN index; matching and ranking both read the stored vector
+
+`install_search_index` creates whichever applies (run by `flask init-db`).
+Other databases fall back to an unindexed LIKE scan.
+
+Only live `chat_message` rows are searched. Messages the retention job has
+packed into compressed chat segments (older than CHAT_COMPRESS_AFTER_HOURS)
+or expired are not; the search API reports the cutoff as `searchable_since`
+so callers can tell "no match" from "not searched".
+"""
+import logging
+import re
+from datetime import datetime, timedelta
+
+from sqlalchemy import text
+
+from database import db
+
+logger = logging.getLogger(__name__)
+
+TS_CONFIG = 'english'
+
+_SQLITE_DDL = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS chat_message_fts USING fts5(
+        text, content='chat_message', content_rowid='id', tokenize='porter unicode61'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS chat_message_fts_ai AFTER INSERT ON chat_message BEGIN
+        INSERT INTO chat_message_fts(rowid, text) VALUES (new.id, new.text);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS chat_message_fts_ad AFTER DELETE ON chat_message BEGIN
+        INSERT INTO chat_message_fts(chat_message_fts, rowid, text) VALUES ('delete', old.id, old.text);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS chat_message_fts_au AFTER UPDATE OF text ON chat_message BEGIN
+        INSERT INTO chat_message_fts(chat_message_fts, rowid, text) VALUES ('delete', old.id, old.text);
+        INSERT INTO chat_message_fts(rowid, text) VALUES (new.id, new.text);
+    END""",
+]
+
+_POSTGRES_DDL = [
+    f"""ALTER TABLE chat_message ADD COLUMN IF NOT EXISTS text_tsv tsvector
+        GENERATED ALWAYS AS (to_tsvector('{TS_CONFIG}', coalesce(text, ''))) STORED""",
+    "CREATE INDEX IF NOT EXISTS ix_chat_message_text_tsv ON chat_message USING GIN (text_tsv)",
+    # Superseded by the index on the stored column
+    "DROP INDEX IF EXISTS ix_chat_message_text_fts",
+]
+
+_TERM = re.compile(r'\w+\*?', re.UNICODE)
+
+def _dialect():
+    return db.engine.dialect.name
+
+def install_search_index(rebuild=False):
+    """Create the full-text index for the current database. Safe to run repeatedly."""
+    dialect = _dialect()
+    with db.engine.begin() as conn:
+        if dialect == 'sqlite':
+            created = not conn.execute(text(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'chat_message_fts'"
+            )).first()
+            try:
+                for statement in _SQLITE_DDL:
+                    conn.execute(text(statement))
+            except Exception as e:
+                logger.warning("SQLite FTS5 unavailable, chat search will scan: %s", str(e))
+                return False
+            if created or rebuild:
+                # Index rows written before the table existed
+                conn.execute(text("INSERT INTO chat_message_fts(chat_message_fts) VALUES ('rebuild')"))
+        elif dialect == 'postgresql':
+            for statement in _POSTGRES_DDL:
+                conn.execute(text(statement))
+        else:
+            logger.warning("No full-text index for %s, chat search will scan", dialect)
+            return False
+    logger.info("Chat search index ready (%s)", dialect)
+    return True
+
+def parse_terms(query):
+    """Words of the search string; a trailing * marks a prefix term."""
+    return _TERM.findall(query.lower())[:16]
+
+def _fts5_query(terms):
+    # Quote every term so user input can never be read as FTS5 syntax
+    return ' '.join(f'"{t[:-1]}"*' if t.endswith('*') else f'"{t}"' for t in terms)
+
+def _tsquery(terms):
+    return ' & '.join(f"{t[:-1]}:*" if t.endswith('*') else t for t in terms)
+
+def _like_pattern(term):
+    # '_' is a word character, so terms can contain LIKE wildcards
+    escaped = term.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+    return f"%{escaped}%"
+
+def searchable_since(config):
+    """
+    Cutoff of the search's coverage: older messages may have been packed into
+    compressed segments and are not searched. None when compression is off.
+    """
+    hours = config.get('CHAT_COMPRESS_AFTER_HOURS', 24)
+    if not hours or hours <= 0:
+        return None
+    return datetime.utcnow() - timedelta(hours=hours)
+
+_fts5_ready = {}
+
+def _has_fts5_table():
+    url = str(db.engine.url)
+    if not _fts5_ready.get(url):
+        _fts5_ready[url] = db.session.execute(text(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'chat_message_fts'"
+        )).first() is not None
+    return _fts5_ready[url]
+
+def search_messages(query, page=1, per_page=20, user_id=None, sender=None):
+    """
+    Ranked page of messages matching every term of `query`, best first.
+    Returns (items, has_more); counting all matches is skipped on purpose.
+    """
+    terms = parse_terms(query)
+    if not terms:
+        return [], False
+
+    params = {'limit': per_page + 1, 'offset': (page - 1) * per_page}
+    filters = ''
+    if user_id is not None:
+        filters += ' AND m.user_id = :user_id'
+        params['user_id'] = user_id
+    if sender is not None:
+        filters += ' AND m.sender = :sender'
+        params['sender'] = sender
+
+    dialect = _dialect()
+    if dialect == 'sqlite' and _has_fts5_table():
+        params['match'] = _fts5_query(terms)
+        sql = f"""
+            SELECT m.id, m.user_id, m.sender, m.text, m.timestamp,
+                   -bm25(chat_message_fts) AS score,
+                   snippet(chat_message_fts, 0, '[', ']', '...', 12) AS snippet
+            FROM chat_message_fts JOIN chat_message m ON m.id = chat_message_fts.rowid
+            WHERE chat_message_fts MATCH :match{filters}
+            ORDER BY bm25(chat_message_fts)
+            LIMIT :limit OFFSET :offset"""
+    elif dialect == 'postgresql':
+        params['tsquery'] = _tsquery(terms)
+        sql = f"""
+            SELECT m.id, m.user_id, m.sender, m.text, m.timestamp,
+                   ts_rank(m.text_tsv, q) AS score,
+                   ts_headline('{TS_CONFIG}', m.text, q, 'StartSel=[, StopSel=], MaxWords=24') AS snippet
+            FROM chat_message m, to_tsquery('{TS_CONFIG}', :tsquery) q
+            WHERE m.text_tsv @@ q{filters}
+            ORDER BY score DESC, m.id DESC
+            LIMIT :limit OFFSET :offset"""
+    else:
+        conditions = []
+        for i, term in enumerate(terms):
+            params[f'term{i}'] = _like_pattern(term.rstrip('*'))
+            conditions.append(f"lower(m.text) LIKE :term{i} ESCAPE '\\'")
+        sql = f"""
+            SELECT m.id, m.user_id, m.sender, m.text, m.timestamp,
+                   0 AS score, m.text AS snippet
+            FROM chat_message m
+            WHERE {' AND '.join(conditions)}{filters}
+            ORDER BY m.id DESC
+            LIMIT :limit OFFSET :offset"""
+
+    rows = db.session.execute(text(sql).columns(timestamp=db.DateTime), params).all()
+    items = [{
+        "id": r.id,
+        "user_id": r.user_id,
+        "sender": r.sender,
+        "text": r.text,
+        "snippet": r.snippet,
+        "timestamp": r.timestamp,
+        "score": round(float(r.score or 0), 4),
+    } for r in rows[:per_page]]
+    return items, len(rows) > per_page
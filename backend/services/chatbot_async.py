@@ -0,0 +1,224 @@
+# chatbot_async.py
+"""
+Asynchronous dispatch of POST /api/chatbot for the ASGI entry point (asgi.py).
+
+The request runs through the Flask app's own request context, before/after
+request hooks and error handlers (admission control, CORS, cache headers,
+compression), so status codes, bodies and headers match the sync view in
+routes/chatbot_routes.py. Only the view body differs:
+
+- Turns that need no conversation state (login prompts, greetings, FAQ and
+  doctor-directory answers) are answered on the event loop. The user and bot
+  messages are written in one transaction through an async engine
+  (aiosqlite or asyncpg, derived from SQLALCHEMY_DATABASE_URI).
+- Everything else, including multi-step flows and their outbound HTTP calls,
+  runs the existing `get_bot_response` in a bounded thread pool
+  (CHATBOT_ASYNC_THREADS), so a slow flow never blocks the loop.
+
+Without an async driver for the configured database, writes also go through
+the thread pool. Conversation state stays in `chat_state`, shared with the
+sync path in the same process.
+
+Metrics: chatbot_async.inline, chatbot_async.offloaded.
+"""
+import asyncio
+import contextvars
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from io import BytesIO
+
+from flask import jsonify, request
+from sqlalchemy import insert
+
+from database import db
+from models.chat_message import ChatMessage
+from services import metrics
+from services.chatbot_cache import answer_cache, normalize_message
+from services.chatbot_engine import (GREETING_PATTERN, LOGIN_REQUIRED, RESTRICTED_ACTIONS, chat_state,
+                                     get_bot_response, greeting, stateless_answer)
+from services.faq_index import faq_kb
+from services.identity import current_identity, display_name
+
+try:
+    from sqlalchemy.ext.asyncio import create_async_engine
+except ImportError:  # optional dependency (needs greenlet)
+    create_async_engine = None
+
+logger = logging.getLogger(__name__)
+
+# sync dialect -> async driver
+ASYNC_DRIVERS = {
+    'sqlite': 'sqlite+aiosqlite',
+    'postgresql': 'postgresql+asyncpg',
+}
+
+def async_database_url(url):
+    """The async-driver equivalent of a SQLAlchemy URL, or None if there is none."""
+    driver = ASYNC_DRIVERS.get(url.get_backend_name())
+    if driver is None:
+        return None
+    if driver.startswith('postgresql'):
+        # psycopg2-only options are not understood by asyncpg
+        url = url.difference_update_query(['sslmode', 'connect_timeout', 'application_name'])
+    return url.set(drivername=driver)
+
+class AsyncChatbot:
+    """ASGI callable serving POST /api/chatbot for `app`."""
+
+    def __init__(self, app):
+        self.app = app
+        self.executor = ThreadPoolExecutor(max_workers=app.config.get('CHATBOT_ASYNC_THREADS', 8),
+                                           thread_name_prefix='chatbot')
+        self.engine = None
+        self._engine_url = None
+        if app.config.get('CHATBOT_ASYNC_DB', True) and create_async_engine is not None:
+            with app.app_context():
+                self._engine_url = async_database_url(db.engine.url)
+        if self._engine_url is None:
+            logger.warning("No async database driver configured; chatbot writes use the thread pool")
+
+    def _get_engine(self):
+        # Created on first use, inside the serving event loop
+        if self.engine is None and self._engine_url is not None:
+            try:
+                self.engine = create_async_engine(
+                    self._engine_url, **self.app.config.get('SQLALCHEMY_ENGINE_OPTIONS', {})
+                )
+            except ImportError as e:
+                logger.warning("Async database driver unavailable (%s); chatbot writes use the thread pool", e)
+                self._engine_url = None
+        return self.engine
+
+    async def __call__(self, scope, receive, send):
+        body = BytesIO()
+        while True:
+            message = await receive()
+            body.write(message.get('body', b''))
+            if not message.get('more_body'):
+                break
+        body.seek(0)
+
+        environ = _build_environ(self.app, scope, body)
+        # Same steps as Flask.full_dispatch_request, with an awaitable view
+        with self.app.request_context(environ):
+            try:
+                try:
+                    rv = self.app.preprocess_request()
+                    if rv is None:
+                        rv = await self._view()
+                except Exception as e:
+                    rv = self.app.handle_user_exception(e)
+                response = self.app.finalize_request(rv)
+            except Exception as e:
+                response = self.app.handle_exception(e)
+
+        await send({
+            'type': 'http.response.start',
+            'status': response.status_code,
+            'headers': [(k.lower().encode('latin1'), v.encode('latin1')) for k, v in response.headers.items()],
+        })
+        await send({'type': 'http.response.body', 'body': response.get_data()})
+        response.close()
+
+    async def _view(self):
+        # Mirrors routes/chatbot_routes.chatbot
+        if not request.is_json:
+            logger.warning("Invalid request: JSON required")
+            return jsonify({"msg": "Request must be JSON"}), 400
+
+        data = request.json
+        message = data.get('message', '')
+        user_id = data.get('user_id')
+        token = request.headers.get('Authorization', '').replace('Bearer ', '')
+
+        if not isinstance(message, str) or not message.strip():
+            logger.warning("Invalid message: Non-empty string required")
+            return jsonify({"msg": "Message must be a non-empty string"}), 400
+
+        try:
+            if not user_id and token:
+                identity = current_identity()
+                user_id = identity.subject if identity else None
+                logger.debug("Authenticated user ID: %s", user_id)
+
+            response = await self.reply(message, user_id, token)
+            logger.info("Chatbot response generated for message: %s", message)
+            return jsonify({"response": response})
+        except Exception as e:
+            logger.error("Chatbot error: %s", str(e))
+            return jsonify({"msg": f"Chatbot error: {str(e)}"}), 500
+
+    async def reply(self, message, user_id=None, token=None):
+        """Same answer as `get_bot_response`, without blocking the loop."""
+        text = message.lower().strip()
+        user_id = user_id or 'anonymous'
+        state = chat_state.get(user_id)
+        if state is not None and state['step'] is not None:
+            return await self._offload(get_bot_response, message, user_id, token)
+
+        if user_id == 'anonymous' and any(action in text for action in RESTRICTED_ACTIONS):
+            answer = LOGIN_REQUIRED
+        elif GREETING_PATTERN.search(text):
+            answer = greeting(await self._name(user_id))
+        else:
+            faq_kb.refresh()
+            key = normalize_message(text)
+            cached, answer = answer_cache.lookup(key)
+            if not cached:
+                answer = await self._offload(answer_cache.get_or_compute, key, stateless_answer)
+            if answer is None:
+                # Needs the conversation flows
+                return await self._offload(get_bot_response, message, user_id, token)
+
+        chat_state.setdefault(user_id, {'step': None, 'data': {}})
+        if user_id != 'anonymous':
+            await self._save(int(user_id), text, answer)
+        metrics.incr('chatbot_async.inline')
+        return answer
+
+    async def _name(self, user_id):
+        if user_id == 'anonymous':
+            return None
+        identity = current_identity()
+        if identity is not None and identity.has_claims and identity.user_id == int(user_id):
+            return identity.name
+        return await self._offload(display_name, user_id)
+
+    async def _save(self, user_id, user_text, bot_text):
+        rows = [
+            {"user_id": user_id, "sender": 'user', "text": user_text, "timestamp": datetime.utcnow()},
+            {"user_id": user_id, "sender": 'bot', "text": bot_text, "timestamp": datetime.utcnow()},
+        ]
+        engine = self._get_engine()
+        if engine is None:
+            await self._offload(_save_sync, rows)
+            return
+        async with engine.begin() as conn:
+            await conn.execute(insert(ChatMessage.__table__), rows)
+
+    async def _offload(self, fn, *args):
+        """Run `fn` in the thread pool with this request's context."""
+        metrics.incr('chatbot_async.offloaded')
+        context = contextvars.copy_context()
+        return await asyncio.get_running_loop().run_in_executor(self.executor, context.run, fn, *args)
+
+    async def aclose(self):
+        if self.engine is not None:
+            await self.engine.dispose()
+            self.engine = None
+        self.executor.shutdown(wait=False)
+
+def _save_sync(rows):
+    db.session.execute(insert(ChatMessage.__table__), rows)
+    db.session.commit()
+
+def _build_environ(app, scope, body):
+    from asgiref.wsgi import WsgiToAsgiInstance
+
+    instance = WsgiToAsgiInstance(app)
+    instance.scope = scope
+    environ = instance.build_environ(scope, body)
+    # The body is fully buffered, so its length is known even for chunked uploads
+    environ['CONTENT_LENGTH'] = str(len(body.getbuffer()))
+    return environ
@@ -0,0 +1,99 @@
+# chatbot_cache.py
+"""
+Cache of chatbot answers that depend only on the message text (FAQ answers
+and the doctor directory listing), keyed by the normalized message.
+
+The engine bypasses the cache whenever the user is part-way through a
+conversation flow. Entries are evicted LRU, and the whole cache is cleared
+when the FAQ content changes or a Doctor row is committed in any worker (via
+the 'doctors' topic of the invalidation bus).
+"""
+import logging
+import re
+import threading
+from collections import OrderedDict
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from services import metrics
+from services.invalidation import bus
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+_NO_ANSWER = object()  # cached "no stateless answer for this message"
+
+def normalize_message(message):
+    return re.sub(r'\s+', ' ', message.lower().strip())
+
+class AnswerCache:
+    def __init__(self, max_entries=1024):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+
+    def lookup(self, message):
+        """(True, answer) if `message` is cached, else (False, None); misses are counted by get_or_compute."""
+        with self._lock:
+            cached = self._entries.get(message, _MISSING)
+            if cached is _MISSING:
+                return False, None
+            self._entries.move_to_end(message)
+        metrics.incr('chatbot_cache.hits')
+        return True, None if cached is _NO_ANSWER else cached
+
+    def get_or_compute(self, message, compute):
+        """Return the cached answer for `message`, computing and storing it on a miss."""
+        with self._lock:
+            cached = self._entries.get(message, _MISSING)
+            if cached is not _MISSING:
+                self._entries.move_to_end(message)
+        if cached is not _MISSING:
+            metrics.incr('chatbot_cache.hits')
+            return None if cached is _NO_ANSWER else cached
+
+        metrics.incr('chatbot_cache.misses')
+        answer = compute(message)
+        with self._lock:
+            self._entries[message] = _NO_ANSWER if answer is None else answer
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                metrics.incr('chatbot_cache.evictions')
+            metrics.set_gauge('chatbot_cache.size', len(self._entries))
+        return answer
+
+    def clear(self, reason=''):
+        with self._lock:
+            self._entries.clear()
+        metrics.incr('chatbot_cache.invalidations')
+        metrics.set_gauge('chatbot_cache.size', 0)
+        logger.info("Chatbot answer cache cleared%s", f" ({reason})" if reason else "")
+
+    def __len__(self):
+        return len(self._entries)
+
+answer_cache = AnswerCache()
+
+def _track_doctor_changes(session, flush_context):
+    from models.doctor import Doctor
+    if any(isinstance(obj, Doctor) for obj in (*session.new, *session.dirty, *session.deleted)):
+        session.info['doctor_directory_changed'] = True
+
+def _invalidate_after_commit(session):
+    if session.info.pop('doctor_directory_changed', False):
+        bus.publish('doctors')
+
+def _on_doctors_changed(key):
+    answer_cache.clear('doctor directory changed')
+
+def _forget_on_rollback(session):
+    session.info.pop('doctor_directory_changed', None)
+
+def init_chatbot_cache(app):
+    answer_cache.max_entries = app.config.get('CHATBOT_CACHE_SIZE', 1024)
+    bus.subscribe('doctors', _on_doctors_changed)
+    if not event.contains(Session, 'after_flush', _track_doctor_changes):
+        event.listen(Session, 'after_flush', _track_doctor_changes)
+        event.listen(Session, 'after_commit', _invalidate_after_commit)
+        event.listen(Session, 'after_rollback', _forget_on_rollback)
@@ -1,11 +1,16 @@
 from models.doctor import Doctor
-from models.user import User
 from models.profile import Profile
 from models.chat_message import ChatMessage
 from database import db
+from services.chatbot_cache import answer_cache, normalize_message
+from services.faq_index import faq_kb
+from services.identity import display_name
+from services.slot_holds import place_hold, release_holds
 from datetime import datetime
 import re
+import uuid
 import requests
+from flask import current_app
 from flask_jwt_extended import decode_token
 import logging
 
@@ -15,19 +20,13 @@ logger = logging.getLogger(__name__)
 # In-memory state for conversation context (per user)
 chat_state = {}
 
-# FAQ database
-FAQS = {
-    'diabetes': {
-        'what is diabetes': 'Diabetes is a condition where your body has trouble managing blood sugar levels. Type 1 is autoimmune, while Type 2 is often lifestyle-related. Want to know about symptoms or management?',
-        'diabetes symptoms': 'Common symptoms include increased thirst, frequent urination, fatigue, and blurred vision. Should I connect you with a Diabetologist?',
-        'diabetes management': 'Manage diabetes with a balanced diet, regular exercise, medication, and monitoring blood sugar. Want to book a consultation for personalized advice?'
-    },
-    'heart': {
-        'heart disease symptoms': 'Symptoms include chest pain, shortness of breath, fatigue, and swelling in legs. Would you like to consult a Cardiologist?',
-        'heart care tips': 'Maintain heart health with a low-sodium diet, regular exercise, stress management, and avoiding smoking. Want to schedule a heart check-up?',
-        'what is hypertension': 'Hypertension, or high blood pressure, can strain your heart. It’s often managed with lifestyle changes and medication. Need a doctor’s advice?'
-    }
-}
+RESTRICTED_ACTIONS = ['book appointment', 'set reminder', 'show appointments', 'cancel appointment']
+LOGIN_REQUIRED = "Please log in to book appointments, set reminders, view appointments, or cancel appointments."
+GREETING_PATTERN = re.compile(r'\b(hello|hi)\b')
+
+def greeting(name):
+    greeting = f"Hello{' ' + name if name else ''}! I’m your health assistant. How can I help today?"
+    return greeting + " Try asking about appointments, doctors, diabetes, heart care, reminders, or onboarding."
 
 def get_bot_response(message, user_id=None, token=None):
     message = message.lower().strip()
@@ -47,38 +46,27 @@ def get_bot_response(message, user_id=None, token=None):
     state = chat_state[user_id]
 
     # Check for restricted actions
-    restricted_actions = ['book appointment', 'set reminder', 'show appointments', 'cancel appointment']
-    if user_id == 'anonymous' and any(action in message for action in restricted_actions):
-        response = "Please log in to book appointments, set reminders, view appointments, or cancel appointments."
+    if user_id == 'anonymous' and any(action in message for action in RESTRICTED_ACTIONS):
+        response = LOGIN_REQUIRED
         save_bot_message(user_id, response)
         return response
 
     # Handle greetings
-    if 'hello' in message or 'hi' in message:
-        user = User.query.get(int(user_id)) if user_id != 'anonymous' else None
-        greeting = f"Hello{' ' + user.email.split('@')[0] if user else ''}! I’m your health assistant. How can I help today?"
-        response = greeting + " Try asking about appointments, doctors, diabetes, heart care, reminders, or onboarding."
+    if GREETING_PATTERN.search(message):
+        response = greeting(display_name(user_id) if user_id != 'anonymous' else None)
         save_bot_message(user_id, response)
         return response
 
-    # Handle FAQs
-    for category, faqs in FAQS.items():
-        for question, answer in faqs.items():
-            if question in message or any(word in message for word in question.split()):
-                save_bot_message(user_id, answer)
-                return answer
-
-    # Handle doctor intro and availability
-    if 'doctor' in message or 'doctors' in message:
-        doctors = Doctor.query.all()
-        if not doctors:
-            response = "No doctors available at the moment. Please check back later."
-            save_bot_message(user_id, response)
-            return response
-        response = "Our doctors:\n" + "\n".join([f"- {d.name} ({d.specialization}, Available: {d.availability})" for d in doctors])
-        response += "\nWould you like to book an appointment?"
-        save_bot_message(user_id, response)
-        return response
+    # Handle FAQs and the doctor directory. These answers depend only on the
+    # message, so they are cached. Mid-conversation the message is an answer
+    # to the flow's question (a doctor ID, a medication, an age), never an FAQ.
+    answer = None
+    if state['step'] is None:
+        faq_kb.refresh()
+        answer = answer_cache.get_or_compute(normalize_message(message), stateless_answer)
+    if answer is not None:
+        save_bot_message(user_id, answer)
+        return answer
 
     # Handle showing appointments
     if 'show appointments' in message or state['step'] == 'show_appointments':
@@ -184,7 +172,8 @@ def get_bot_response(message, user_id=None, token=None):
             return response
         if state['step'] != 'appointment':
             state['step'] = 'appointment'
-            state['data'] = {'step': 'select_doctor'}
+            # One key per booking flow, so a retried POST can't book twice
+            state['data'] = {'step': 'select_doctor', 'idempotency_key': str(uuid.uuid4())}
             doctors = Doctor.query.all()
             response = "Let’s book an appointment. Available doctors:\n" + "\n".join([f"- {d.id}: {d.name} ({d.specialization})" for d in doctors])
             response += "\nReply with the doctor’s ID (e.g., '1') to select."
@@ -216,9 +205,18 @@ def get_bot_response(message, user_id=None, token=None):
                     response = "Cannot book appointments in the past. Please choose a future time."
                     save_bot_message(user_id, response)
                     return response
+                # Hold the slot so it can't be taken while the user types a reason
+                ttl = current_app.config.get('SLOT_HOLD_TTL_SECONDS', 300)
+                expires_at, conflict = place_hold(int(user_id), state['data']['doctor_id'], appt_time, ttl)
+                if conflict:
+                    response = ("That time is already booked." if conflict == 'booked'
+                                else "Someone else is booking that time right now.")
+                    response += " Please choose another time (e.g., '2025-06-08 14:00')."
+                    save_bot_message(user_id, response)
+                    return response
                 state['data']['time'] = message
                 state['data']['step'] = 'reason'
-                response = "Great! What’s the reason for your visit?"
+                response = f"Great! I’m holding this slot for you for {max(ttl // 60, 1)} minutes. What’s the reason for your visit?"
                 save_bot_message(user_id, response)
                 return response
             except ValueError:
@@ -238,7 +236,7 @@ def get_bot_response(message, user_id=None, token=None):
                 'reason': state['data']['reason']
             }
             try:
-                headers = {'Authorization': f'Bearer {token}'}
+                headers = {'Authorization': f'Bearer {token}', 'Idempotency-Key': state['data']['idempotency_key']}
                 response = requests.post(
                     'http://localhost:5000/api/appointments/book',
                     json=appt_data,
@@ -248,9 +246,11 @@ def get_bot_response(message, user_id=None, token=None):
                     response_text = "Appointment booked successfully! Check your dashboard for details."
                 else:
                     response_text = f"Failed to book appointment: {response.json().get('msg', 'Unknown error')}"
+                    release_holds(int(user_id))
             except Exception as e:
                 logger.error("Error booking appointment: %s", str(e))
                 response_text = f"Error booking appointment: {str(e)}"
+                release_holds(int(user_id))
             state['step'] = None
             state['data'] = {}
             save_bot_message(user_id, response_text)
@@ -264,7 +264,7 @@ def get_bot_response(message, user_id=None, token=None):
             return response
         if state['step'] != 'reminder':
             state['step'] = 'reminder'
-            state['data'] = {'step': 'medication_name'}
+            state['data'] = {'step': 'medication_name', 'idempotency_key': str(uuid.uuid4())}
             response = "Let’s set a medication reminder. What’s the medication name (e.g., Insulin)?"
             save_bot_message(user_id, response)
             return response
@@ -291,7 +291,7 @@ def get_bot_response(message, user_id=None, token=None):
                 'time': message
             }
             try:
-                headers = {'Authorization': f'Bearer {token}'}
+                headers = {'Authorization': f'Bearer {token}', 'Idempotency-Key': state['data']['idempotency_key']}
                 response = requests.post(
                     'http://localhost:5000/api/reminders',
                     json=reminder_data,
@@ -376,6 +376,24 @@ def get_bot_response(message, user_id=None, token=None):
     save_bot_message(user_id, response)
     return response
 
+def stateless_answer(message):
+    """Answer FAQ and doctor-directory questions, or None for anything else."""
+    # Handle FAQs
+    answer = faq_kb.match(message)
+    if answer is not None:
+        return answer
+
+    # Handle doctor intro and availability
+    if 'doctor' in message or 'doctors' in message:
+        doctors = Doctor.query.all()
+        if not doctors:
+            return "No doctors available at the moment. Please check back later."
+        response = "Our doctors:\n" + "\n".join([f"- {d.name} ({d.specialization}, Available: {d.availability})" for d in doctors])
+        response += "\nWould you like to book an appointment?"
+        return response
+
+    return None
+
 def save_bot_message(user_id, text):
     if user_id != 'anonymous':
         bot_message = ChatMessage(user_id=int(user_id), sender='bot', text=text)
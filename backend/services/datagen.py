@@ -0,0 +1,201 @@
+# datagen.py
+"""
+Synthetic dataset generator for scale testing.
+
+Rows are produced lazily in chunks and written with COPY on PostgreSQL or
+executemany INSERTs elsewhere, bypassing the ORM unit of work. Primary keys
+are assigned here (continuing after the current maximum) so foreign keys can
+be generated without reading anything back. The same seed and anchor date
+always produce the same dataset. Bulk writes skip the ORM hooks, so
+`flask gen-data` recomputes the appointment rollups afterwards.
+"""
+import csv
+import io
+import itertools
+import logging
+import random
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, select, text
+
+from database import db
+
+logger = logging.getLogger(__name__)
+
+SPECIALIZATIONS = [
+    'Cardiologist', 'Endocrinologist', 'Diabetologist', 'General Physician', 'Dermatologist',
+    'Neurologist', 'Pediatrician', 'Orthopedic Surgeon', 'Psychiatrist', 'Gastroenterologist',
+    'Pulmonologist', 'Nephrologist', 'Ophthalmologist', 'ENT Specialist', 'Gynecologist',
+]
+FIRST_NAMES = [
+    'Rajesh', 'Priya', 'Amit', 'Sunita', 'Anil', 'Kavita', 'Vikram', 'Neha', 'Suresh', 'Pooja',
+    'Arjun', 'Meera', 'Rahul', 'Anjali', 'Sanjay', 'Deepa', 'Karan', 'Lakshmi', 'Rohit', 'Divya',
+]
+LAST_NAMES = [
+    'Kumar', 'Sharma', 'Patel', 'Gupta', 'Singh', 'Reddy', 'Iyer', 'Nair', 'Mehta', 'Joshi',
+    'Rao', 'Das', 'Verma', 'Menon', 'Kapoor', 'Chopra', 'Bose', 'Pillai', 'Shah', 'Malhotra',
+]
+DAY_PATTERNS = ['Mon-Fri', 'Tue-Sat', 'Mon-Wed-Fri', 'Daily', 'Mon-Sat', 'Tue-Thu', 'Weekends']
+REASONS = [
+    'Routine check-up', 'Follow-up on blood sugar levels', 'Chest pain and shortness of breath',
+    'Persistent headache', 'Skin rash consultation', 'Thyroid test results review',
+    'Blood pressure monitoring', 'Annual physical examination', 'Joint pain in knees',
+    'Fatigue and dizziness', 'Medication review', 'Post-surgery follow-up',
+]
+MEDICATIONS = [
+    'Insulin', 'Metformin', 'Amlodipine', 'Atorvastatin', 'Levothyroxine', 'Lisinopril',
+    'Aspirin', 'Vitamin D', 'Omeprazole', 'Losartan', 'Glimepiride', 'Paracetamol',
+]
+CHAT_EXCHANGES = [
+    ('what is diabetes', 'Diabetes is a condition where your body has trouble managing blood sugar levels.'),
+    ('heart care tips', 'Maintain heart health with a low-sodium diet, regular exercise and stress management.'),
+    ('show appointments', 'You have no appointments scheduled.'),
+    ('book appointment', 'Let’s book an appointment. Reply with the doctor’s ID to select.'),
+    ('set reminder', 'Let’s set a medication reminder. What’s the medication name?'),
+    ('hello', 'Hello! I’m your health assistant. How can I help today?'),
+]
+MEDICAL_HISTORY = ['', 'Type 2 diabetes', 'Hypertension', 'Asthma', 'Penicillin allergy', 'Hypothyroidism']
+
+def _availability(rng):
+    start = rng.choice([8, 9, 10, 11, 14])
+    end = start + rng.choice([4, 6, 8])
+    fmt = lambda h: f"{(h - 1) % 12 + 1}{'AM' if h < 12 else 'PM'}"
+    return f"{rng.choice(DAY_PATTERNS)} {fmt(start)}-{fmt(end)}"
+
+def _appointment_status(rng, when, now):
+    roll = rng.random()
+    if when < now:
+        return 'Completed' if roll < 0.75 else 'Cancelled' if roll < 0.95 else 'Scheduled'
+    return 'Scheduled' if roll < 0.85 else 'Cancelled'
+
+class _Writer:
+    """Writes row chunks with COPY on PostgreSQL and executemany elsewhere."""
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.use_copy = connection.dialect.name == 'postgresql'
+
+    def write(self, table, columns, rows):
+        if self.use_copy:
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            for row in rows:
+                writer.writerow(['\\N' if v is None else v for v in row])
+            buffer.seek(0)
+            preparer = self.connection.dialect.identifier_preparer
+            sql = (f"COPY {preparer.format_table(table)} ({', '.join(preparer.quote(c) for c in columns)}) "
+                   f"FROM STDIN WITH (FORMAT csv, NULL '\\N')")
+            cursor = self.connection.connection.cursor()
+            cursor.copy_expert(sql, buffer)
+        else:
+            self.connection.execute(table.insert(), [dict(zip(columns, row)) for row in rows])
+
+    def reset_sequence(self, table):
+        if self.use_copy:
+            name = table.name
+            self.connection.execute(text(
+                f"SELECT setval(pg_get_serial_sequence('\"{name}\"', 'id'), "
+                f"COALESCE((SELECT MAX(id) FROM \"{name}\"), 1))"
+            ))
+
+def _chunks(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(itertools.islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+def _next_id(connection, table):
+    return (connection.execute(select(func.max(table.c.id))).scalar() or 0) + 1
+
+def generate(users=1000, doctors=50, appointments=10000, reminders=2000, messages=20000,
+             profile_ratio=0.6, seed=42, anchor=None, chunk_size=50000, password='password123'):
+    """
+    Bulk-load a synthetic dataset and return the number of rows written per table.
+    Must be called inside an application context.
+    """
+    from models.appointment import Appointment
+    from models.chat_message import ChatMessage
+    from models.doctor import Doctor
+    from models.profile import Profile
+    from models.reminder import Reminder
+    from models.user import User
+
+    rng = random.Random(seed)
+    now = anchor or datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    probe = User(email='datagen@example.com')
+    probe.set_password(password)
+    password_hash = probe.password_hash
+    written = {}
+
+    with db.engine.begin() as connection:
+        writer = _Writer(connection)
+        tables = {m: m.__table__ for m in (User, Doctor, Profile, Appointment, Reminder, ChatMessage)}
+        first_user = _next_id(connection, tables[User])
+        first_doctor = _next_id(connection, tables[Doctor])
+        user_ids = range(first_user, first_user + users)
+        doctor_ids = range(first_doctor, first_doctor + doctors)
+        tag = f"s{seed}-{first_user}"
+
+        def load(model, columns, rows):
+            table = tables[model]
+            count = 0
+            for chunk in _chunks(rows, chunk_size):
+                writer.write(table, columns, chunk)
+                count += len(chunk)
+                logger.info("Wrote %d %s rows", count, table.name)
+            writer.reset_sequence(table)
+            written[table.name] = count
+
+        load(User, ['id', 'email', 'password_hash'], (
+            (uid, f"{tag}-user{uid}@example.com", password_hash) for uid in user_ids))
+
+        load(Doctor, ['id', 'name', 'specialization', 'availability', 'zego_user_id'], (
+            (did, f"Dr. {rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}", rng.choice(SPECIALIZATIONS),
+             _availability(rng), f"{tag}_doctor_{did}") for did in doctor_ids))
+
+        profile_users = [uid for uid in user_ids if rng.random() < profile_ratio]
+        first_profile = _next_id(connection, tables[Profile])
+        load(Profile, ['id', 'user_id', 'name', 'age', 'medical_history', 'created_at'], (
+            (first_profile + n, uid, f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}", rng.randint(18, 90),
+             rng.choice(MEDICAL_HISTORY), now - timedelta(days=rng.randint(0, 730)))
+            for n, uid in enumerate(profile_users)))
+
+        def appointment_rows():
+            start = _next_id(connection, tables[Appointment])
+            for n in range(appointments):
+                # One year of history and three months ahead, on 15-minute slots in clinic hours
+                when = now + timedelta(days=rng.randint(-365, 90), hours=rng.randint(8, 19),
+                                       minutes=rng.choice((0, 15, 30, 45)))
+                yield (start + n, rng.choice(user_ids), rng.choice(doctor_ids), when,
+                       _appointment_status(rng, when, now), rng.choice(REASONS),
+                       when - timedelta(days=rng.randint(1, 30)))
+        if users and doctors:
+            load(Appointment, ['id', 'user_id', 'doctor_id', 'time', 'status', 'reason', 'created_at'],
+                 appointment_rows())
+
+        def reminder_rows():
+            start = _next_id(connection, tables[Reminder])
+            for n in range(reminders):
+                yield (start + n, rng.choice(user_ids), rng.choice(MEDICATIONS),
+                       f"{rng.randint(6, 22):02d}:{rng.choice((0, 30)):02d}",
+                       now - timedelta(days=rng.randint(0, 365)))
+        if users:
+            load(Reminder, ['id', 'user_id', 'medication', 'time', 'created_at'], reminder_rows())
+
+        def message_rows():
+            start = _next_id(connection, tables[ChatMessage])
+            n = 0
+            while n < messages:
+                uid = rng.choice(user_ids)
+                question, answer = rng.choice(CHAT_EXCHANGES)
+                when = now - timedelta(days=rng.randint(0, 180), seconds=rng.randint(0, 86400))
+                yield (start + n, uid, 'user', question, when)
+                if n + 1 < messages:
+                    yield (start + n + 1, uid, 'bot', answer, when + timedelta(seconds=1))
+                n += 2
+        if users:
+            load(ChatMessage, ['id', 'user_id', 'sender', 'text', 'timestamp'], message_rows())
+
+    return written
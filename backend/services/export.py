@@ -0,0 +1,104 @@
+# export.py
+"""
+Streaming bulk export of appointments, reminders and chat messages.
+
+Rows are read through a server-side cursor (`stream_results` + `yield_per`)
+as plain tuples, so nothing accumulates in the session, and encoded into
+NDJSON or CSV chunks of EXPORT_CHUNK_ROWS rows. Memory use depends on the
+chunk size, not on how many rows match. Used by the admin export endpoint
+and `flask export`.
+"""
+import csv
+import io
+import logging
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import select
+
+from database import db
+from models.appointment import Appointment
+from models.appointment_archive import AppointmentArchive
+from models.chat_message import ChatMessage
+from models.reminder import Reminder
+from services import metrics
+
+logger = logging.getLogger(__name__)
+
+# kind -> (column names, date column used for from/to, supports doctor filter)
+EXPORTS = {
+    'appointments': (['id', 'user_id', 'doctor_id', 'time', 'status', 'reason', 'created_at'], 'time', True),
+    'reminders': (['id', 'user_id', 'medication', 'time', 'created_at'], 'created_at', False),
+    'chat_messages': (['id', 'user_id', 'sender', 'text', 'timestamp'], 'timestamp', False),
+}
+FORMATS = {'ndjson': 'application/x-ndjson', 'csv': 'text/csv'}
+
+def _statements(kind, start=None, end=None, doctor_id=None, include_archived=False):
+    columns, date_column, _ = EXPORTS[kind]
+    models = {
+        'appointments': [Appointment] + ([AppointmentArchive] if include_archived else []),
+        'reminders': [Reminder],
+        'chat_messages': [ChatMessage],
+    }[kind]
+    for model in models:
+        statement = select(*[_column(model, c) for c in columns])
+        if start is not None:
+            statement = statement.where(getattr(model, date_column) >= start)
+        if end is not None:
+            # `end` is an inclusive date
+            statement = statement.where(getattr(model, date_column) < end + timedelta(days=1))
+        if doctor_id is not None:
+            statement = statement.where(model.doctor_id == doctor_id)
+        yield statement.order_by(model.id)
+
+def _column(model, name):
+    # Archived appointments keep their appointment id in original_id
+    if model is AppointmentArchive and name == 'id':
+        return AppointmentArchive.original_id.label('id')
+    return getattr(model, name)
+
+def iter_rows(kind, start=None, end=None, doctor_id=None, include_archived=False, chunk_rows=1000):
+    """Yield lists of up to `chunk_rows` row tuples."""
+    for statement in _statements(kind, start, end, doctor_id, include_archived):
+        result = db.session.execute(statement.execution_options(stream_results=True, yield_per=chunk_rows))
+        for partition in result.partitions():
+            yield partition
+
+def _plain(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+def iter_ndjson(columns, chunks):
+    dumps = current_app.json.dumps_bytes
+    for chunk in chunks:
+        yield b''.join(dumps({c: _plain(v) for c, v in zip(columns, row)}) for row in chunk)
+
+def iter_csv(columns, chunks):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    for chunk in chunks:
+        writer.writerows([_plain(v) for v in row] for row in chunk)
+        yield buffer.getvalue().encode('utf-8')
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode('utf-8')
+
+def export(kind, fmt='ndjson', start=None, end=None, doctor_id=None, include_archived=False, chunk_rows=1000):
+    """Generator of encoded byte chunks for the requested export."""
+    columns = EXPORTS[kind][0]
+    rows = 0
+
+    def counted(chunks):
+        nonlocal rows
+        for chunk in chunks:
+            rows += len(chunk)
+            yield chunk
+
+    chunks = counted(iter_rows(kind, start, end, doctor_id, include_archived, chunk_rows))
+    encode = iter_csv if fmt == 'csv' else iter_ndjson
+    try:
+        yield from encode(columns, chunks)
+    finally:
+        metrics.incr(f'export.rows.{kind}', rows)
+        logger.info("Exported %d %s rows as %s", rows, kind, fmt)
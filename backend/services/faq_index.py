@@ -0,0 +1,176 @@
+# faq_index.py
+"""
+FAQ knowledge base with TF-IDF retrieval.
+
+The corpus is read from a JSON file (FAQ_PATH, default data/faqs.json): a
+list of {"category", "question", "keywords", "answer"} objects. Question,
+category and keywords are indexed into an L2-normalised sparse TF-IDF
+matrix, and a message is answered by the best cosine-similarity match above
+FAQ_MATCH_THRESHOLD.
+
+The file is re-read when its modification time changes (checked at most
+every FAQ_RELOAD_INTERVAL seconds), so FAQ edits go live without a restart.
+A reload that fails to parse keeps the previous index. NumPy and SciPy are
+imported when the index is first built, not at startup.
+"""
+import json
+import logging
+import math
+import os
+import re
+import threading
+import time
+from collections import Counter
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_FAQ_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'faqs.json')
+
+STOPWORDS = frozenset("""
+a about am an and any are as at be been being but by can could did do does doing for from had has have
+how i if in into is it its me my of on or our please should so some tell than that the their them then
+there these this those to up us was we were what when where which who why will with would you your
+know want need like get give show much many more
+""".split())
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+
+def tokenize(text):
+    tokens = []
+    for token in _TOKEN.findall(text.lower()):
+        # Bare numbers ("1", "2" in "type 1"/"type 2") are IDs, ages or times in
+        # chat replies and would match FAQs on their own
+        if token in STOPWORDS or token.isdigit():
+            continue
+        # Light plural folding so "symptom"/"symptoms" and "tip"/"tips" match
+        if len(token) > 3 and token.endswith('s') and not token.endswith('ss'):
+            token = token[:-1]
+        tokens.append(token)
+    return tokens
+
+def normalize_question(text):
+    return ' '.join(_TOKEN.findall(text.lower()))
+
+def document_text(entry):
+    return ' '.join([entry.get('question', ''), entry.get('category', ''), *entry.get('keywords', [])])
+
+class FAQIndex:
+    def __init__(self, entries):
+        import numpy as np
+        from scipy import sparse
+
+        self.entries = entries
+        # A message that is exactly an FAQ question always gets that answer
+        self.exact = {normalize_question(e.get('question', '')): i for i, e in enumerate(entries)}
+        doc_terms = [Counter(tokenize(document_text(e))) for e in entries]
+        df = Counter(term for terms in doc_terms for term in terms)
+        self.vocab = {term: i for i, term in enumerate(df)}
+        n = len(entries)
+        self.idf = np.array([math.log((1 + n) / (1 + df[term])) + 1 for term in df])
+
+        rows, cols, values = [], [], []
+        for row, terms in enumerate(doc_terms):
+            for term, count in terms.items():
+                col = self.vocab[term]
+                rows.append(row)
+                cols.append(col)
+                values.append((1 + math.log(count)) * self.idf[col])
+        matrix = sparse.csr_matrix((values, (rows, cols)), shape=(n, len(self.vocab)), dtype=np.float64)
+        norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+        norms[norms == 0] = 1.0
+        # Column-major so a query only touches the columns of its own terms
+        self.matrix = sparse.diags(1.0 / norms) @ matrix
+        self.matrix = self.matrix.tocsc()
+        self._np = np
+
+    def search(self, message, k=3, threshold=0.0):
+        """Return up to k (score, entry) pairs, best first."""
+        np = self._np
+        exact = self.exact.get(normalize_question(message))
+        if exact is not None:
+            return [(1.0, self.entries[exact])]
+        terms = Counter(tokenize(message))
+        known = [(self.vocab[t], c) for t, c in terms.items() if t in self.vocab]
+        if not known or not self.entries:
+            return []
+        cols = [col for col, _ in known]
+        weights = np.array([(1 + math.log(count)) * self.idf[col] for col, count in known])
+        weights /= np.linalg.norm(weights)
+        scores = self.matrix[:, cols] @ weights
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind='stable')]
+        return [(float(scores[i]), self.entries[i]) for i in top if scores[i] > 0 and scores[i] >= threshold]
+
+class FAQKnowledgeBase:
+    """Hot-reloadable holder for the current FAQIndex."""
+
+    def __init__(self, path=DEFAULT_FAQ_PATH, threshold=0.35, reload_interval=5.0):
+        self.path = path
+        self.threshold = threshold
+        self.reload_interval = reload_interval
+        self._lock = threading.Lock()
+        self._index = None
+        self._mtime = None
+        self._checked = 0.0
+
+    def configure(self, path=None, threshold=None, reload_interval=None):
+        with self._lock:
+            if path and path != self.path:
+                self.path = path
+                self._index, self._mtime = None, None
+            if threshold is not None:
+                self.threshold = threshold
+            if reload_interval is not None:
+                self.reload_interval = reload_interval
+
+    def _load(self, mtime):
+        with open(self.path, encoding='utf-8') as f:
+            entries = json.load(f)
+        start = time.perf_counter()
+        index = FAQIndex(entries)
+        logger.info("Loaded %d FAQs from %s in %.1f ms", len(entries), self.path,
+                    (time.perf_counter() - start) * 1000)
+        self._index, self._mtime = index, mtime
+        return index
+
+    def index(self):
+        """Return the current index, reloading it if the file changed."""
+        now = time.monotonic()
+        if self._index is not None and now - self._checked < self.reload_interval:
+            return self._index
+        with self._lock:
+            self._checked = now
+            try:
+                mtime = os.stat(self.path).st_mtime_ns
+                if self._index is None or mtime != self._mtime:
+                    reloaded = self._index is not None
+                    self._load(mtime)
+                    if reloaded:
+                        from services.chatbot_cache import answer_cache
+                        answer_cache.clear('FAQ file reloaded')
+            except (OSError, ValueError) as e:
+                logger.error("Failed to load FAQs from %s: %s", self.path, str(e))
+            return self._index
+
+    def refresh(self):
+        """Pick up FAQ file changes (throttled); called before cached lookups."""
+        self.index()
+
+    def search(self, message, k=3):
+        index = self.index()
+        return index.search(message, k=k, threshold=self.threshold) if index else []
+
+    def match(self, message):
+        """Best answer for the message, or None if nothing is confident enough."""
+        results = self.search(message, k=1)
+        return results[0][1]['answer'] if results else None
+
+faq_kb = FAQKnowledgeBase()
+
+def init_faq_kb(app):
+    faq_kb.configure(
+        path=app.config.get('FAQ_PATH') or DEFAULT_FAQ_PATH,
+        threshold=app.config.get('FAQ_MATCH_THRESHOLD'),
+        reload_interval=app.config.get('FAQ_RELOAD_INTERVAL'),
+    )
@@ -0,0 +1,23 @@
+# google_auth.py
+"""
+Lazy adapter around google-auth. The SDK (and its transport stack) is imported
+on the first Google sign-in rather than when the auth blueprint is loaded.
+"""
+import threading
+
+_lock = threading.Lock()
+_request = None
+
+def verify_id_token(credential, client_id):
+    """
+    Verify a Google ID token and return its claims.
+    Raises ValueError for invalid tokens, like google.oauth2.id_token does.
+    """
+    global _request
+    from google.oauth2 import id_token
+    if _request is None:
+        with _lock:
+            if _request is None:
+                from google.auth.transport import requests as google_requests
+                _request = google_requests.Request()
+    return id_token.verify_oauth2_token(credential, _request, client_id)
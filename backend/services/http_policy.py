@@ -0,0 +1,124 @@
+# http_policy.py
+"""
+Response post-processing: per-endpoint cache headers and body compression.
+
+Cache headers come from the declarative CACHE_POLICIES table, keyed by
+endpoint name. Successful GET responses and 304s get the endpoint's policy;
+other responses from a listed endpoint are marked `no-store` so errors and
+mutations are never cached.
+
+Bodies of compressible types above COMPRESS_MIN_SIZE bytes are compressed
+with brotli (if installed) or gzip, according to the client's
+Accept-Encoding. Streamed responses are passed through untouched.
+"""
+import gzip
+import logging
+
+from flask import request
+
+try:
+    import brotli
+except ImportError:  # optional dependency
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+PUBLIC_SHORT = {"cache_control": "public, max-age=300", "vary": ()}
+PRIVATE_NO_STORE = {"cache_control": "private, no-store", "vary": ("Authorization",)}
+PRIVATE_REVALIDATE = {"cache_control": "private, no-cache", "vary": ("Authorization",)}
+
+CACHE_POLICIES = {
+    # Public directory data, identical for every client
+    'appointment.get_doctors': PUBLIC_SHORT,
+    'appointment.get_doctor': PUBLIC_SHORT,
+    # Per-user data
+    'appointment.my_appointments': PRIVATE_NO_STORE,
+    'appointment.my_appointment_history': PRIVATE_NO_STORE,
+    'appointment.my_reminders': PRIVATE_NO_STORE,
+    'appointment.verify_video_access': PRIVATE_NO_STORE,
+    'chatbot.get_chat_history': PRIVATE_NO_STORE,
+    'auth.get_me': PRIVATE_REVALIDATE,
+    'bootstrap.patient_bootstrap': PRIVATE_NO_STORE,
+    # Doctor data
+    'doctor.get_doctor_info': PRIVATE_REVALIDATE,
+    'doctor.get_doctor_appointments': PRIVATE_NO_STORE,
+    'doctor.get_doctor_appointment_history': PRIVATE_NO_STORE,
+    'doctor.get_doctor_daily_analytics': PRIVATE_NO_STORE,
+    'doctor.verify_doctor_video_access': PRIVATE_NO_STORE,
+    'bootstrap.doctor_bootstrap': PRIVATE_NO_STORE,
+    # Calendar feeds: authorized by the token in the URL, revalidated with If-None-Match
+    'calendar.feed_url': PRIVATE_NO_STORE,
+    'calendar.feed': {"cache_control": "private, no-cache", "vary": ()},
+    # Support tooling
+    'admin.search_chat_messages': PRIVATE_NO_STORE,
+    'admin.export_data': PRIVATE_NO_STORE,
+    'admin.get_daily_analytics': PRIVATE_NO_STORE,
+    # Health checks must always reach the app
+    'health_check': {"cache_control": "no-cache", "vary": ()},
+    'appointment.video_health_check': {"cache_control": "no-cache", "vary": ()},
+}
+
+COMPRESSIBLE_MIMETYPES = {'application/json', 'text/plain', 'text/html', 'text/csv', 'text/calendar'}
+
+def apply_cache_policy(response):
+    policy = CACHE_POLICIES.get(request.endpoint)
+    if policy is None:
+        return
+    succeeded = 200 <= response.status_code < 300 or response.status_code == 304
+    if request.method in ('GET', 'HEAD') and succeeded:
+        response.headers['Cache-Control'] = policy['cache_control']
+        for header in policy['vary']:
+            response.vary.add(header)
+    else:
+        response.headers['Cache-Control'] = 'no-store'
+
+def choose_encoding(accept_encodings):
+    candidates = ['br', 'gzip'] if brotli is not None else ['gzip']
+    return accept_encodings.best_match(candidates)
+
+def negotiated_encoding(size, config):
+    """Encoding compress_response would pick for a `size`-byte body on this request, or None."""
+    if not config.get('COMPRESS_ENABLED', True) or size < config.get('COMPRESS_MIN_SIZE', 1024):
+        return None
+    return choose_encoding(request.accept_encodings)
+
+def compress_body(data, encoding, config):
+    if encoding == 'br':
+        return brotli.compress(data, quality=config.get('COMPRESS_BR_QUALITY', 4))
+    return gzip.compress(data, compresslevel=config.get('COMPRESS_GZIP_LEVEL', 6), mtime=0)
+
+def compress_response(response, config):
+    if (response.direct_passthrough or response.is_streamed
+            or response.status_code < 200 or response.status_code in (204, 206, 304)
+            or 'Content-Encoding' in response.headers
+            or response.mimetype not in COMPRESSIBLE_MIMETYPES):
+        return
+    data = response.get_data()
+    if len(data) < config.get('COMPRESS_MIN_SIZE', 1024):
+        return
+    # The body could have been compressed, so caches must key on the encoding
+    response.vary.add('Accept-Encoding')
+    encoding = choose_encoding(request.accept_encodings)
+    if not encoding:
+        return
+    compressed = compress_body(data, encoding, config)
+    if len(compressed) >= len(data):
+        return
+    response.set_data(compressed)
+    response.headers['Content-Encoding'] = encoding
+    if response.headers.get('ETag'):
+        # Weak comparison only: the representation bytes changed. Endpoints that
+        # need strong tags compress themselves (see routes/calendar_routes.py)
+        etag, weak = response.get_etag()
+        response.set_etag(etag, weak=True)
+
+def init_http_policy(app):
+    @app.after_request
+    def _post_process(response):
+        try:
+            apply_cache_policy(response)
+            if app.config.get('COMPRESS_ENABLED', True):
+                compress_response(response, app.config)
+        except Exception as e:
+            logger.error("Response post-processing failed: %s", str(e))
+        return response
@@ -0,0 +1,181 @@
+# idempotency.py
+"""
+Idempotency-Key support for retried POST/DELETE requests.
+
+The first request with a given key runs the handler and its response is
+kept for IDEMPOTENCY_TTL_SECONDS. Replays get the stored response (with an
+`Idempotent-Replayed: true` header) without running the handler again.
+Duplicates that arrive while the first request is still running wait for
+it and share its result. 5xx responses are not stored, so a retry after a
+server error executes again.
+
+Keys are scoped to the caller's identity, method and path. Reusing a key
+with a different request body is rejected with 422.
+
+Keys live in the `idempotency_key` table, so a retry is recognised by any
+worker and across restarts. The primary key makes the claim atomic: the
+request whose INSERT commits first executes. An in-flight claim is a lease
+of IDEMPOTENCY_LEASE_SECONDS; if its worker dies, a retry after the lease
+executes again. Expired rows are deleted by the scheduler.
+"""
+import hashlib
+import json
+import logging
+import time
+from datetime import datetime, timedelta
+from functools import wraps
+
+from flask import current_app, jsonify, make_response, request
+from flask_jwt_extended import get_jwt_identity
+from sqlalchemy import delete, select, update
+from sqlalchemy.exc import IntegrityError
+
+from database import db
+from models.idempotency_key import IdempotencyKey
+from services import metrics
+
+logger = logging.getLogger(__name__)
+
+HEADER = 'Idempotency-Key'
+
+class IdempotencyStore:
+    def __init__(self, ttl=86400, lease=60, poll_interval=0.05):
+        self.ttl = ttl
+        self.lease = lease
+        self.poll_interval = poll_interval
+
+    def begin(self, key, fingerprint):
+        """
+        Returns ('execute', None) if the caller should run the handler,
+        ('replay', response) if a result is stored, ('pending', None) if the
+        first request is still running, or ('mismatch', None) if the key was
+        used for a different request.
+        """
+        for _ in range(2):
+            now = datetime.utcnow()
+            try:
+                db.session.execute(delete(IdempotencyKey).where(
+                    IdempotencyKey.key == key, IdempotencyKey.expires_at <= now))
+                db.session.add(IdempotencyKey(key=key, fingerprint=fingerprint,
+                                              expires_at=now + timedelta(seconds=self.lease)))
+                db.session.commit()
+                return 'execute', None
+            except IntegrityError:
+                db.session.rollback()
+            row = self._load(key)
+            if row is None:
+                continue  # released in the meantime; claim again
+            if row.fingerprint != fingerprint:
+                return 'mismatch', None
+            if row.status is None:
+                return 'pending', None
+            return 'replay', _response(row)
+        return 'pending', None
+
+    def wait(self, key, timeout):
+        """The stored response once the first request finishes, None if it failed, or 'timeout'."""
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            time.sleep(self.poll_interval)
+            row = self._load(key)
+            if row is None:
+                return None
+            if row.status is not None:
+                return _response(row)
+        return 'timeout'
+
+    def complete(self, key, response):
+        body, status, headers = response
+        db.session.execute(update(IdempotencyKey).where(
+            IdempotencyKey.key == key, IdempotencyKey.status.is_(None)
+        ).values(status=status, body=body, headers=json.dumps(headers),
+                 expires_at=datetime.utcnow() + timedelta(seconds=self.ttl)))
+        db.session.commit()
+
+    def abandon(self, key):
+        """Forget an in-flight claim so the next retry executes again."""
+        db.session.rollback()
+        db.session.execute(delete(IdempotencyKey).where(
+            IdempotencyKey.key == key, IdempotencyKey.status.is_(None)))
+        db.session.commit()
+
+    def purge_expired(self):
+        deleted = db.session.execute(delete(IdempotencyKey).where(
+            IdempotencyKey.expires_at <= datetime.utcnow())).rowcount
+        db.session.commit()
+        return deleted
+
+    def _load(self, key):
+        row = db.session.execute(select(
+            IdempotencyKey.fingerprint, IdempotencyKey.status, IdempotencyKey.body, IdempotencyKey.headers
+        ).where(IdempotencyKey.key == key, IdempotencyKey.expires_at > datetime.utcnow())).first()
+        # End the read so the next poll sees other workers' commits
+        db.session.rollback()
+        return row
+
+def _response(row):
+    return row.body, row.status, [tuple(h) for h in json.loads(row.headers or '[]')]
+
+def init_idempotency(app):
+    app.extensions['idempotency'] = IdempotencyStore(
+        ttl=app.config.get('IDEMPOTENCY_TTL_SECONDS', 86400),
+        lease=app.config.get('IDEMPOTENCY_LEASE_SECONDS', 60),
+    )
+
+def _replay(stored):
+    body, status, headers = stored
+    response = current_app.response_class(body, status=status, headers=headers)
+    response.headers['Idempotent-Replayed'] = 'true'
+    return response
+
+def idempotent(view):
+    """Honour an Idempotency-Key header. Apply below @jwt_required()."""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        key = request.headers.get(HEADER)
+        store = current_app.extensions.get('idempotency')
+        if not key or store is None:
+            return view(*args, **kwargs)
+        if len(key) > 255:
+            return jsonify({"msg": "Idempotency-Key must be at most 255 characters"}), 400
+
+        scoped_key = hashlib.sha256(f"{get_jwt_identity()}:{request.method}:{request.path}:{key}".encode()).hexdigest()
+        fingerprint = hashlib.sha256(request.get_data()).hexdigest()
+        action, stored = store.begin(scoped_key, fingerprint)
+        if action == 'mismatch':
+            metrics.incr('idempotency.mismatch')
+            return jsonify({"msg": "Idempotency-Key was already used for a different request"}), 422
+        if action == 'replay':
+            metrics.incr('idempotency.replayed')
+            logger.info("Replaying response for idempotency key %s", key)
+            return _replay(stored)
+        if action == 'pending':
+            metrics.incr('idempotency.coalesced')
+            stored = store.wait(scoped_key, current_app.config.get('IDEMPOTENCY_WAIT_SECONDS', 10))
+            if stored == 'timeout':
+                return jsonify({"msg": "A request with this Idempotency-Key is still in progress"}), 409
+            if stored is None:
+                # The original request failed; let the client retry
+                return jsonify({"msg": "The original request failed. Please retry."}), 409
+            logger.info("Replaying response for idempotency key %s", key)
+            return _replay(stored)
+
+        metrics.incr('idempotency.executed')
+        try:
+            response = make_response(view(*args, **kwargs))
+        except Exception:
+            store.abandon(scoped_key)
+            raise
+        if response.status_code >= 500:
+            store.abandon(scoped_key)
+        else:
+            headers = [(k, v) for k, v in response.headers.items() if k.lower() in ('content-type', 'location')]
+            store.complete(scoped_key, (response.get_data(), response.status_code, headers))
+        return response
+    return wrapper
+
+def purge_expired_keys():
+    deleted = current_app.extensions['idempotency'].purge_expired()
+    if deleted:
+        metrics.incr('idempotency.purged', deleted)
+    return deleted
@@ -0,0 +1,260 @@
+# identity.py
+"""
+Request-scoped identity built from signed JWT claims.
+
+Logins issue tokens whose additional claims carry the role ('patient' or
+'doctor'), the doctor id, a display name and the email, so handlers can tell
+who is calling without loading the User or Doctor row. `current_identity()`
+builds an `Identity` from the verified claims once per request.
+
+Lookups that are still needed (doctor profile fields, tokens issued before
+the claims existed, doctor login, the revocation check) go through
+`principals`, an in-process LRU of User and Doctor records whose entries
+expire after IDENTITY_CACHE_TTL_SECONDS. Committed ORM changes to those rows
+publish 'users' / 'doctors' on the invalidation bus so every worker drops its
+copy at once; the TTL bounds staleness when no bus reaches a worker.
+
+Every User and Doctor row has a `token_version`, carried in tokens as the
+`tv` claim. `revoke_tokens` (and `flask revoke-tokens`) increments it, and
+the JWT blocklist check (`is_revoked`) rejects tokens with an older version,
+as well as tokens of deleted principals. The version lives in the database,
+so revocations survive restarts and reach every process.
+
+Metrics: identity_cache.hits, .misses, .invalidations, identity.revoked.
+"""
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+from flask import g, has_request_context
+from flask_jwt_extended import get_jwt, verify_jwt_in_request
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from database import db
+from services import metrics
+from services.invalidation import bus
+
+logger = logging.getLogger(__name__)
+
+ROLE_PATIENT = 'patient'
+ROLE_DOCTOR = 'doctor'
+
+_MISSING = object()
+
+def patient_claims(user):
+    return {"role": ROLE_PATIENT, "name": user.email.split('@')[0], "email": user.email,
+            "tv": user.token_version or 0}
+
+def doctor_claims(doctor, email):
+    """Claims for a doctor record from `principals`."""
+    return {"role": ROLE_DOCTOR, "doctor_id": doctor["id"], "name": doctor["name"], "email": email,
+            "tv": doctor["token_version"]}
+
+class PrincipalCache:
+    def __init__(self, max_entries=4096, ttl=60):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+
+    def _get(self, key, load):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] > now:
+                self._entries.move_to_end(key)
+            else:
+                entry = None
+        if entry is not None:
+            metrics.incr('identity_cache.hits')
+            return None if entry[0] is _MISSING else entry[0]
+        metrics.incr('identity_cache.misses')
+        value = load()
+        with self._lock:
+            self._entries[key] = (_MISSING if value is None else value, now + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return value
+
+    def user(self, user_id):
+        """{'email', 'name', 'token_version'} for a patient, or None if the user does not exist."""
+        def load():
+            from models.user import User
+            user = User.query.get(user_id)
+            if user is None:
+                return None
+            return {"email": user.email, "name": user.email.split('@')[0], "token_version": user.token_version}
+        return self._get(('user', user_id), load)
+
+    def doctor(self, doctor_id):
+        """Public profile of a doctor, or None if the doctor does not exist."""
+        def load():
+            from models.doctor import Doctor
+            return _doctor_record(Doctor.query.get(doctor_id))
+        return self._get(('doctor', doctor_id), load)
+
+    def doctor_by_zego_id(self, zego_user_id):
+        def load():
+            from models.doctor import Doctor
+            return _doctor_record(Doctor.query.filter_by(zego_user_id=zego_user_id).first())
+        return self._get(('zego', zego_user_id), load)
+
+    def invalidate(self, kind, principal_id=None):
+        """Drop one principal, or every principal of `kind` when principal_id is None."""
+        kinds = ('doctor', 'zego') if kind == 'doctor' else (kind,)
+        with self._lock:
+            for key in [k for k in self._entries if k[0] in kinds]:
+                if principal_id is None or key[0] == 'zego' or key[1] == principal_id:
+                    del self._entries[key]
+        metrics.incr('identity_cache.invalidations')
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+principals = PrincipalCache()
+
+def _doctor_record(doctor):
+    if doctor is None:
+        return None
+    return {
+        "id": doctor.id,
+        "name": doctor.name,
+        "specialization": doctor.specialization,
+        "availability": doctor.availability,
+        "zego_user_id": doctor.zego_user_id,
+        "token_version": doctor.token_version
+    }
+
+def _principal(subject):
+    """('doctor', id) or ('user', id) from a token subject."""
+    if subject.startswith('doctor_'):
+        return 'doctor', int(subject.replace('doctor_', ''))
+    return 'user', int(subject)
+
+class Identity:
+    """The caller of the current request, as stated by its token."""
+
+    __slots__ = ('subject', 'role', 'user_id', 'doctor_id', 'has_claims', '_name', '_email')
+
+    def __init__(self, claims):
+        self.subject = claims['sub']
+        kind, principal_id = _principal(self.subject)
+        self.role = claims.get('role') or (ROLE_DOCTOR if kind == 'doctor' else ROLE_PATIENT)
+        self.user_id = principal_id if kind == 'user' else None
+        self.doctor_id = claims.get('doctor_id', principal_id) if kind == 'doctor' else None
+        # False for tokens issued before the claims existed; name/email then need a lookup
+        self.has_claims = 'role' in claims
+        self._name = claims.get('name')
+        self._email = claims.get('email')
+
+    @property
+    def is_doctor(self):
+        return self.role == ROLE_DOCTOR
+
+    def _record(self):
+        # Only tokens issued before the claims existed get here
+        return principals.doctor(self.doctor_id) if self.is_doctor else principals.user(self.user_id)
+
+    @property
+    def name(self):
+        if self._name is None:
+            record = self._record()
+            self._name = record["name"] if record else None
+        return self._name
+
+    @property
+    def email(self):
+        if self._email is None and not self.is_doctor:
+            record = self._record()
+            self._email = record["email"] if record else None
+        return self._email
+
+def current_identity():
+    """Identity of the caller, or None for anonymous requests and invalid tokens."""
+    if not has_request_context():
+        return None
+    if 'identity' in g:
+        return g.identity
+    identity = None
+    try:
+        if g.get('_jwt_extended_jwt') is None:
+            verify_jwt_in_request(optional=True)
+        claims = get_jwt()
+        if claims:
+            identity = Identity(claims)
+    except Exception as e:
+        logger.debug("No usable identity on request: %s", str(e))
+    g.identity = identity
+    return identity
+
+def display_name(user_id):
+    """Name to greet a patient by, from the token when it is theirs."""
+    identity = current_identity()
+    if identity is not None and identity.user_id == int(user_id):
+        return identity.name
+    record = principals.user(int(user_id))
+    return record["name"] if record else None
+
+def token_version(kind, principal_id):
+    """Current token version of a principal, or None if it does not exist."""
+    record = principals.doctor(principal_id) if kind == 'doctor' else principals.user(principal_id)
+    return record["token_version"] if record else None
+
+def is_revoked(claims):
+    try:
+        kind, principal_id = _principal(claims['sub'])
+    except (KeyError, ValueError):
+        return False
+    version = token_version(kind, principal_id)
+    # Tokens issued before versions existed count as version 0
+    return version is None or claims.get('tv', 0) < version
+
+def revoke_tokens(kind, principal_id):
+    """Reject every token of the principal issued until now, in all processes. False if it does not exist."""
+    from models.doctor import Doctor
+    from models.user import User
+    model = Doctor if kind == 'doctor' else User
+    principal = db.session.get(model, principal_id)
+    if principal is None:
+        return False
+    # Incremented in SQL so concurrent revocations both count
+    principal.token_version = model.token_version + 1
+    db.session.commit()
+    metrics.incr('identity.revoked')
+    logger.info("Tokens of %s %s revoked", kind, principal_id)
+    return True
+
+def _track_principal_changes(session, flush_context):
+    from models.user import User
+    changes = session.info.setdefault('identity_changes', set())
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, User):
+            changes.add(obj.id)
+
+def _publish_after_commit(session):
+    # Doctor changes are already published as 'doctors' by chatbot_cache
+    for user_id in session.info.pop('identity_changes', ()):
+        bus.publish('users', key=str(user_id))
+
+def _forget_on_rollback(session):
+    session.info.pop('identity_changes', None)
+
+def _on_users_changed(key):
+    principals.invalidate('user', None if key is None else int(key))
+
+def _on_doctors_changed(key):
+    principals.invalidate('doctor')
+
+def init_identity(app):
+    principals.max_entries = app.config.get('IDENTITY_CACHE_SIZE', 4096)
+    principals.ttl = app.config.get('IDENTITY_CACHE_TTL_SECONDS', 60)
+    bus.subscribe('users', _on_users_changed)
+    bus.subscribe('doctors', _on_doctors_changed)
+    if not event.contains(Session, 'after_flush', _track_principal_changes):
+        event.listen(Session, 'after_flush', _track_principal_changes)
+        event.listen(Session, 'after_commit', _publish_after_commit)
+        event.listen(Session, 'after_rollback', _forget_on_rollback)
@@ -0,0 +1,243 @@
+# invalidation.py
+"""
+Cross-process cache invalidation bus.
+
+Caches subscribe to a topic and drop what they hold when an event arrives;
+writers publish after their transaction commits:
+
+    bus.subscribe('doctors', lambda key: answer_cache.clear())
+    bus.publish('appointments', key=str(user_id))
+
+A key of None means "everything under this topic". Subscribers in the
+publishing process are called synchronously; other processes hear about it
+through the backend chosen by INVALIDATION_BACKEND:
+
+- unset: in-process only (single worker)
+- sqlite:///path: a change-log table in a SQLite file, polled every
+  INVALIDATION_POLL_INTERVAL_MS by each worker on the host
+- postgresql://...: LISTEN/NOTIFY, for workers spread across hosts
+
+Events are best-effort; caches that must never serve stale data should also
+bound entry lifetimes. `benchmarks/bench_invalidation.py` measures the delay.
+"""
+import json
+import logging
+import os
+import select
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from collections import defaultdict
+
+from services import metrics
+
+logger = logging.getLogger(__name__)
+
+class LocalBackend:
+    """Single process: subscribers are called directly, nothing is forwarded."""
+
+    def start(self, deliver, origin):
+        pass
+
+    def publish(self, topic, key, origin, created):
+        pass
+
+    def stop(self):
+        pass
+
+class SqliteChangeLogBackend:
+    """Events appended to a SQLite table that every worker on the host polls."""
+
+    def __init__(self, path, poll_interval=0.05, retention=60):
+        self.path = path
+        self.poll_interval = poll_interval
+        self.retention = retention
+        self._local = threading.local()
+        self._stopping = threading.Event()
+        self._published = 0
+        with self._connect() as conn:
+            conn.execute("""CREATE TABLE IF NOT EXISTS invalidation_log (
+                id INTEGER PRIMARY KEY AUTOINCREMENT, topic TEXT NOT NULL, key TEXT,
+                origin TEXT NOT NULL, created REAL NOT NULL)""")
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=1.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")  # events are transient; skip the fsync per publish
+            self._local.conn = conn
+        return conn
+
+    def publish(self, topic, key, origin, created):
+        conn = self._connect()
+        conn.execute("INSERT INTO invalidation_log (topic, key, origin, created) VALUES (?, ?, ?, ?)",
+                     (topic, key, origin, created))
+        self._published += 1
+        if self._published % 100 == 0:
+            conn.execute("DELETE FROM invalidation_log WHERE created < ?", (created - self.retention,))
+
+    def start(self, deliver, origin):
+        # Connections must not be shared with a parent process
+        self._local = threading.local()
+        self._stopping = threading.Event()
+        last_id = self._connect().execute("SELECT COALESCE(MAX(id), 0) FROM invalidation_log").fetchone()[0]
+        threading.Thread(target=self._poll, args=(deliver, origin, last_id),
+                         name='invalidation-poller', daemon=True).start()
+
+    def _poll(self, deliver, origin, last_id):
+        while not self._stopping.wait(self.poll_interval):
+            try:
+                rows = self._connect().execute(
+                    "SELECT id, topic, key, origin, created FROM invalidation_log WHERE id > ? ORDER BY id",
+                    (last_id,)
+                ).fetchall()
+            except sqlite3.Error as e:
+                logger.warning("Invalidation log poll failed: %s", str(e))
+                continue
+            for row_id, topic, key, row_origin, created in rows:
+                last_id = row_id
+                if row_origin != origin:
+                    deliver(topic, key, created)
+
+    def stop(self):
+        self._stopping.set()
+
+class PostgresNotifyBackend:
+    """Events sent with pg_notify and received on a dedicated LISTEN connection."""
+
+    CHANNEL = 'wellnesscare_invalidation'
+
+    def __init__(self, url):
+        from sqlalchemy.engine import make_url
+        self.dsn = make_url(url).set(drivername='postgresql').render_as_string(hide_password=False)
+        self._lock = threading.Lock()
+        self._conn = None
+        self._stopping = threading.Event()
+
+    def _connect(self):
+        import psycopg2
+        conn = psycopg2.connect(self.dsn)
+        conn.autocommit = True
+        return conn
+
+    def publish(self, topic, key, origin, created):
+        payload = json.dumps({"topic": topic, "key": key, "origin": origin, "created": created})
+        with self._lock:
+            if self._conn is None or self._conn.closed:
+                self._conn = self._connect()
+            try:
+                with self._conn.cursor() as cur:
+                    cur.execute("SELECT pg_notify(%s, %s)", (self.CHANNEL, payload))
+            except Exception:
+                self._conn.close()
+                self._conn = None
+                raise
+
+    def start(self, deliver, origin):
+        self._conn = None
+        self._stopping = threading.Event()
+        threading.Thread(target=self._listen, args=(deliver, origin),
+                         name='invalidation-listener', daemon=True).start()
+
+    def _listen(self, deliver, origin):
+        backoff = 0.5
+        while not self._stopping.is_set():
+            try:
+                conn = self._connect()
+                with conn.cursor() as cur:
+                    cur.execute(f"LISTEN {self.CHANNEL}")
+                backoff = 0.5
+                while not self._stopping.is_set():
+                    if select.select([conn], [], [], 1.0) == ([], [], []):
+                        continue
+                    conn.poll()
+                    while conn.notifies:
+                        event = json.loads(conn.notifies.pop(0).payload)
+                        if event['origin'] != origin:
+                            deliver(event['topic'], event['key'], event['created'])
+                conn.close()
+            except Exception as e:
+                # Events sent while disconnected are lost; subscribers see a gap
+                metrics.incr('invalidation.listener_errors')
+                logger.warning("Invalidation listener error, reconnecting in %.1fs: %s", backoff, str(e))
+                self._stopping.wait(backoff)
+                backoff = min(backoff * 2, 30)
+
+    def stop(self):
+        self._stopping.set()
+
+def make_backend(url, poll_interval=0.05):
+    if not url:
+        return LocalBackend()
+    if url.startswith('sqlite:///'):
+        return SqliteChangeLogBackend(url[len('sqlite:///'):], poll_interval=poll_interval)
+    if url.startswith('postgres'):
+        return PostgresNotifyBackend(url)
+    raise ValueError(f"Unsupported invalidation backend: {url}")
+
+class InvalidationBus:
+    def __init__(self, backend=None):
+        self.backend = backend or LocalBackend()
+        self.origin = None
+        self._subscribers = defaultdict(list)
+        self._lock = threading.Lock()
+        self._pid = None
+
+    def subscribe(self, topic, callback):
+        """Call `callback(key)` whenever `topic` is published, here or in another process."""
+        with self._lock:
+            if callback not in self._subscribers[topic]:
+                self._subscribers[topic].append(callback)
+
+    def publish(self, topic, key=None):
+        self.ensure_started()
+        created = time.time()
+        self._dispatch(topic, key)
+        try:
+            self.backend.publish(topic, key, self.origin, created)
+        except Exception as e:
+            metrics.incr('invalidation.publish_errors')
+            logger.error("Failed to publish invalidation %s/%s: %s", topic, key, str(e))
+        metrics.incr(f'invalidation.published.{topic}')
+
+    def _dispatch(self, topic, key):
+        for callback in list(self._subscribers.get(topic, ())):
+            try:
+                callback(key)
+            except Exception as e:
+                logger.error("Invalidation subscriber for %s failed: %s", topic, str(e))
+
+    def _deliver_remote(self, topic, key, created):
+        metrics.incr(f'invalidation.received.{topic}')
+        metrics.set_gauge('invalidation.last_delay_ms', round((time.time() - created) * 1000, 1))
+        self._dispatch(topic, key)
+
+    def ensure_started(self):
+        """Start receiving events in this process; forked workers start their own receiver."""
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self.origin = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+            self.backend.start(self._deliver_remote, self.origin)
+            self._pid = os.getpid()
+
+    def stop(self):
+        self.backend.stop()
+        self._pid = None
+
+bus = InvalidationBus()
+
+def init_invalidation_bus(app):
+    bus.stop()
+    bus.backend = make_backend(
+        app.config.get('INVALIDATION_BACKEND'),
+        poll_interval=app.config.get('INVALIDATION_POLL_INTERVAL_MS', 50) / 1000
+    )
+    app.extensions['invalidation'] = bus
+    # Cheap pid check; starts the receiver in each worker after fork
+    app.before_request(bus.ensure_started)
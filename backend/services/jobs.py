@@ -0,0 +1,127 @@
+from database import db
+from datetime import datetime, timedelta
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Function to clean up expired appointments
+def cleanup_expired_appointments(app):
+    with app.app_context():
+        try:
+            from models.appointment import Appointment
+            current_time = datetime.now()
+            expired_appointments = Appointment.query.filter(
+                Appointment.status == 'Scheduled',
+                db.func.datetime(Appointment.time) < db.func.datetime(current_time - timedelta(minutes=30))
+            ).all()
+            
+            for appointment in expired_appointments:
+                logger.info(f"Deleting expired appointment ID {appointment.id}, scheduled at {appointment.time}")
+                db.session.delete(appointment)
+            
+            db.session.commit()
+            logger.info(f"Deleted {len(expired_appointments)} expired appointments")
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Failed to clean up expired appointments: {str(e)}")
+
+# Function to move old finished appointments into the archive table
+def archive_finished_appointments(app):
+    with app.app_context():
+        try:
+            from services.archival import archive_appointments
+            archive_appointments(
+                max_age_days=app.config.get('ARCHIVE_AFTER_DAYS', 90),
+                batch_size=app.config.get('ARCHIVE_BATCH_SIZE', 1000)
+            )
+        except Exception as e:
+            logger.error(f"Failed to archive appointments: {str(e)}")
+
+# Function to apply chat history retention limits
+def enforce_chat_retention(app):
+    with app.app_context():
+        try:
+            from services.chat_retention import enforce_retention
+            enforce_retention(**chat_retention_settings(app.config))
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Failed to enforce chat retention: {str(e)}")
+
+def chat_retention_settings(config):
+    return dict(
+        retention_days=config.get('CHAT_RETENTION_DAYS', 30),
+        max_messages=config.get('CHAT_MAX_MESSAGES_PER_USER', 500),
+        compress_after_hours=config.get('CHAT_COMPRESS_AFTER_HOURS', 24),
+        segment_size=config.get('CHAT_SEGMENT_SIZE', 200),
+        batch_size=config.get('CHAT_RETENTION_BATCH_SIZE', 1000)
+    )
+
+# Function to queue "appointment starting soon" notifications
+def send_upcoming_notices(app):
+    with app.app_context():
+        try:
+            from services.notifications import enqueue_upcoming_notices
+            count = enqueue_upcoming_notices(app, interval_minutes=1)
+            if count:
+                logger.info(f"Queued {count} upcoming appointment notices")
+        except Exception as e:
+            logger.error(f"Failed to queue upcoming appointment notices: {str(e)}")
+
+# Function to delete slot holds that were never converted into appointments
+def purge_expired_slot_holds(app):
+    with app.app_context():
+        try:
+            from services.slot_holds import purge_expired_holds
+            purge_expired_holds()
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Failed to purge expired slot holds: {str(e)}")
+
+# Function to delete expired Idempotency-Key records
+def purge_idempotency_keys(app):
+    with app.app_context():
+        try:
+            from services.idempotency import purge_expired_keys
+            purge_expired_keys()
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Failed to purge idempotency keys: {str(e)}")
+
+def create_scheduler(app, scheduler_class=None):
+    """
+    Build the scheduler for periodic maintenance jobs. Nothing is started here;
+    callers decide which process owns the jobs (see `flask run-jobs`).
+    """
+    if scheduler_class is None:
+        from apscheduler.schedulers.background import BackgroundScheduler
+        scheduler_class = BackgroundScheduler
+    
+    scheduler = scheduler_class()
+    scheduler.add_job(
+        cleanup_expired_appointments, 'interval',
+        hours=app.config.get('CLEANUP_INTERVAL_HOURS', 1),
+        args=[app], id='cleanup_expired_appointments'
+    )
+    scheduler.add_job(
+        archive_finished_appointments, 'interval',
+        hours=app.config.get('ARCHIVE_INTERVAL_HOURS', 24),
+        args=[app], id='archive_finished_appointments'
+    )
+    scheduler.add_job(
+        enforce_chat_retention, 'interval',
+        minutes=app.config.get('CHAT_RETENTION_INTERVAL_MINUTES', 60),
+        args=[app], id='enforce_chat_retention'
+    )
+    scheduler.add_job(
+        send_upcoming_notices, 'interval', minutes=1,
+        args=[app], id='send_upcoming_notices'
+    )
+    scheduler.add_job(
+        purge_expired_slot_holds, 'interval', minutes=1,
+        args=[app], id='purge_expired_slot_holds'
+    )
+    scheduler.add_job(
+        purge_idempotency_keys, 'interval', minutes=10,
+        args=[app], id='purge_idempotency_keys'
+    )
+    return scheduler
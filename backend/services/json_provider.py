@@ -0,0 +1,75 @@
+# json_provider.py
+"""
+JSON provider for Flask responses.
+
+Uses orjson when it is installed and falls back to the standard library
+otherwise. Both backends format dates and datetimes as ISO-8601 strings
+(e.g. "2025-06-08T14:00:00") instead of Flask's default RFC 822 HTTP dates,
+so clients see the same format whichever backend is active.
+
+Select the backend with the JSON_BACKEND config key: 'auto' (default),
+'orjson' or 'stdlib'.
+"""
+import dataclasses
+import decimal
+import json
+import uuid
+from datetime import date, datetime, time
+
+from flask.json.provider import JSONProvider
+
+try:
+    import orjson
+except ImportError:  # optional dependency
+    orjson = None
+
+def _default(o):
+    """Serialize types that neither backend handles natively."""
+    if isinstance(o, (datetime, date, time)):
+        return o.isoformat()
+    if isinstance(o, (decimal.Decimal, uuid.UUID)):
+        return str(o)
+    if dataclasses.is_dataclass(o) and not isinstance(o, type):
+        return dataclasses.asdict(o)
+    if hasattr(o, "__html__"):
+        return str(o.__html__())
+    raise TypeError(f"Object of type {type(o).__name__} is not JSON serializable")
+
+class FastJSONProvider(JSONProvider):
+    mimetype = "application/json"
+
+    def __init__(self, app):
+        super().__init__(app)
+        backend = app.config.get('JSON_BACKEND', 'auto')
+        if backend == 'orjson' and orjson is None:
+            raise RuntimeError("JSON_BACKEND is 'orjson' but orjson is not installed")
+        self.backend = 'orjson' if orjson is not None and backend != 'stdlib' else 'stdlib'
+
+    def dumps(self, obj, **kwargs):
+        if self.backend == 'orjson' and not kwargs:
+            return orjson.dumps(obj, default=_default, option=orjson.OPT_NON_STR_KEYS).decode()
+        kwargs.setdefault("default", _default)
+        return json.dumps(obj, **kwargs)
+
+    def loads(self, s, **kwargs):
+        if self.backend == 'orjson' and not kwargs:
+            return orjson.loads(s)
+        return json.loads(s, **kwargs)
+
+    def dumps_bytes(self, obj, pretty=False):
+        """Serialize straight to UTF-8 bytes, the form a response body needs."""
+        if self.backend == 'orjson':
+            option = orjson.OPT_NON_STR_KEYS | orjson.OPT_APPEND_NEWLINE
+            if pretty:
+                option |= orjson.OPT_INDENT_2
+            return orjson.dumps(obj, default=_default, option=option)
+        if pretty:
+            text = json.dumps(obj, default=_default, indent=2)
+        else:
+            text = json.dumps(obj, default=_default, separators=(",", ":"))
+        return (text + "\n").encode("ascii")
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        body = self.dumps_bytes(obj, pretty=self._app.debug)
+        return self._app.response_class(body, mimetype=self.mimetype)
@@ -0,0 +1,33 @@
+# metrics.py
+"""
+In-process counters and gauges, exposed at /api/metrics (X-Admin-Key required).
+
+Values are per worker process; aggregate across workers in the scraper.
+"""
+import threading
+from collections import defaultdict
+
+_lock = threading.Lock()
+_counters = defaultdict(int)
+_gauges = {}
+
+def incr(name, value=1):
+    with _lock:
+        _counters[name] += value
+
+def set_gauge(name, value):
+    with _lock:
+        _gauges[name] = value
+
+def get(name):
+    with _lock:
+        return _counters.get(name, 0)
+
+def snapshot():
+    with _lock:
+        return {"counters": dict(_counters), "gauges": dict(_gauges)}
+
+def reset():
+    with _lock:
+        _counters.clear()
+        _gauges.clear()
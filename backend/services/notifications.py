@@ -0,0 +1,336 @@
+# notifications.py
+"""
+Asynchronous notifications for appointment events.
+
+Handlers call `notify_appointment(kind, appointment)` before committing. The
+event is queued only after the transaction commits, so the request pays for a
+queue put and nothing else. Every configured sink is a channel with its own
+set of worker threads, each with a bounded queue. Events for one appointment
+always go to the same worker, so they are delivered in order. Workers drain
+events in batches (up to NOTIFY_BATCH_SIZE, or whatever arrives within
+NOTIFY_BATCH_WAIT_MS), resolve recipients with one query per batch, and
+deliver with exponential backoff between attempts.
+
+Delivery is best-effort. Queues live in worker memory only, so an event is
+lost when:
+
+- its queue is full (NOTIFY_QUEUE_SIZE) at enqueue time
+  (notifications.dropped.<channel>)
+- the process crashes, is killed, or exits with it still queued (a clean
+  exit waits up to 5 seconds for the queues to drain)
+- its batch still fails after NOTIFY_MAX_ATTEMPTS attempts
+  (notifications.failed.<channel>)
+
+A batch whose sink fails partway through is retried whole, so some
+recipients may get a message twice.
+
+Sinks: 'log', 'file' (JSON lines; a local stand-in for a mail server) and
+'smtp'. Add others with `register_sink`.
+
+Throughput and lag are exported through /api/metrics:
+notifications.sent.<channel>, notifications.lag_ms_total (divide by sent for
+the mean), notifications.last_lag_ms and notifications.queue_depth.<channel>.
+"""
+import atexit
+import json
+import logging
+import os
+import queue
+import random
+import smtplib
+import threading
+import time
+from collections import namedtuple
+from datetime import datetime, timedelta
+from email.message import EmailMessage
+
+from flask import current_app, has_app_context
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from database import db
+from services import metrics
+
+logger = logging.getLogger(__name__)
+
+NotificationEvent = namedtuple(
+    'NotificationEvent', ['kind', 'appointment_id', 'user_id', 'doctor_id', 'time', 'enqueued_at']
+)
+
+SUBJECTS = {
+    'booked': 'Appointment confirmed',
+    'cancelled': 'Appointment cancelled',
+    'rescheduled': 'Appointment rescheduled',
+    'completed': 'Appointment completed',
+    'upcoming': 'Your appointment starts soon',
+}
+
+class LogSink:
+    def __init__(self, config):
+        pass
+
+    def send_batch(self, messages):
+        for message in messages:
+            logger.info("Notification to %s: %s", message['to'], message['subject'])
+
+class FileSink:
+    """Appends one JSON line per message; stands in for a mail server locally."""
+
+    def __init__(self, config):
+        self.path = config.get('NOTIFY_FILE_PATH') or 'notifications.log'
+        self._lock = threading.Lock()
+
+    def send_batch(self, messages):
+        lines = ''.join(json.dumps(message, default=str) + '\n' for message in messages)
+        with self._lock, open(self.path, 'a', encoding='utf-8') as fh:
+            fh.write(lines)
+
+class SMTPSink:
+    """Sends a batch over a single SMTP connection."""
+
+    def __init__(self, config):
+        self.host = config.get('NOTIFY_SMTP_HOST', 'localhost')
+        self.port = config.get('NOTIFY_SMTP_PORT', 1025)
+        self.username = config.get('NOTIFY_SMTP_USERNAME')
+        self.password = config.get('NOTIFY_SMTP_PASSWORD')
+        self.use_tls = config.get('NOTIFY_SMTP_TLS', False)
+        self.sender = config.get('NOTIFY_FROM', 'no-reply@wellnesscare.local')
+
+    def send_batch(self, messages):
+        with smtplib.SMTP(self.host, self.port, timeout=10) as smtp:
+            if self.use_tls:
+                smtp.starttls()
+            if self.username:
+                smtp.login(self.username, self.password)
+            for message in messages:
+                email = EmailMessage()
+                email['From'] = self.sender
+                email['To'] = message['to']
+                email['Subject'] = message['subject']
+                email.set_content(message['body'])
+                smtp.send_message(email)
+
+SINKS = {'log': LogSink, 'file': FileSink, 'smtp': SMTPSink}
+
+def register_sink(name, factory):
+    """Make a sink available to NOTIFY_SINKS. `factory(config)` returns an object with send_batch(messages)."""
+    SINKS[name] = factory
+
+def render(events):
+    """Turn events into messages, looking up recipients once per batch."""
+    from models.doctor import Doctor
+    from models.user import User
+
+    user_ids = {e.user_id for e in events}
+    doctor_ids = {e.doctor_id for e in events}
+    emails = dict(db.session.query(User.id, User.email).filter(User.id.in_(user_ids)).all())
+    doctors = dict(db.session.query(Doctor.id, Doctor.name).filter(Doctor.id.in_(doctor_ids)).all())
+
+    messages = []
+    for e in events:
+        if e.user_id not in emails:
+            continue
+        when = e.time.strftime('%Y-%m-%d %H:%M') if isinstance(e.time, datetime) else e.time
+        doctor = doctors.get(e.doctor_id, 'your doctor')
+        messages.append({
+            "to": emails[e.user_id],
+            "subject": SUBJECTS.get(e.kind, 'Appointment update'),
+            "body": f"{SUBJECTS.get(e.kind, 'Appointment update')}: {doctor} on {when} (appointment #{e.appointment_id}).",
+            "event": e.kind,
+            "appointment_id": e.appointment_id,
+        })
+    return messages
+
+class _Channel:
+    def __init__(self, name, sink, workers, queue_size):
+        self.name = name
+        self.sink = sink
+        self.queues = [queue.Queue(queue_size) for _ in range(workers)]
+
+    def depth(self):
+        return sum(q.qsize() for q in self.queues)
+
+class Notifier:
+    def __init__(self, app, sinks, workers=2, batch_size=50, batch_wait=0.2,
+                 max_attempts=5, retry_base=0.5, queue_size=10000):
+        self.app = app
+        self.sinks = sinks
+        self.workers = workers
+        self.batch_size = batch_size
+        self.batch_wait = batch_wait
+        self.max_attempts = max_attempts
+        self.retry_base = retry_base
+        self.queue_size = queue_size
+        self.upcoming_horizon = None
+        self._lock = threading.Lock()
+        self._pid = None
+        self._channels = {}
+        self._threads = []
+        self._stopping = threading.Event()
+
+    def _ensure_started(self):
+        # Threads do not survive fork, so a forked worker starts its own pool
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._stopping = threading.Event()
+            self._channels = {name: _Channel(name, sink, self.workers, self.queue_size)
+                              for name, sink in self.sinks.items()}
+            self._threads = []
+            for channel in self._channels.values():
+                for n, q in enumerate(channel.queues):
+                    thread = threading.Thread(target=self._work, args=(channel, q),
+                                              name=f'notify-{channel.name}-{n}', daemon=True)
+                    thread.start()
+                    self._threads.append(thread)
+            self._pid = os.getpid()
+
+    def enqueue(self, notification):
+        self._ensure_started()
+        for channel in self._channels.values():
+            try:
+                channel.queues[notification.appointment_id % len(channel.queues)].put_nowait(notification)
+            except queue.Full:
+                metrics.incr(f'notifications.dropped.{channel.name}')
+                logger.warning("Notification queue full for %s, dropping %s", channel.name, notification.kind)
+        metrics.incr('notifications.enqueued')
+
+    def _next_batch(self, q):
+        try:
+            batch = [q.get(timeout=0.5)]
+        except queue.Empty:
+            return []
+        deadline = time.monotonic() + self.batch_wait
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(q.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _work(self, channel, q):
+        while not (self._stopping.is_set() and q.empty()):
+            batch = self._next_batch(q)
+            if not batch:
+                continue
+            try:
+                self._deliver(channel, batch)
+            finally:
+                for _ in batch:
+                    q.task_done()
+
+    def _deliver(self, channel, batch):
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                with self.app.app_context():
+                    messages = render(batch)
+                channel.sink.send_batch(messages)
+                break
+            except Exception as e:
+                if attempt == self.max_attempts:
+                    metrics.incr(f'notifications.failed.{channel.name}', len(batch))
+                    logger.error("Giving up on %d %s notifications: %s", len(batch), channel.name, str(e))
+                    return
+                delay = self.retry_base * 2 ** (attempt - 1) * (0.5 + random.random())
+                metrics.incr(f'notifications.retries.{channel.name}')
+                logger.warning("Notification delivery via %s failed (attempt %d), retrying in %.1fs: %s",
+                               channel.name, attempt, delay, str(e))
+                time.sleep(delay)
+
+        lags = [(time.time() - n.enqueued_at) * 1000 for n in batch]
+        metrics.incr(f'notifications.sent.{channel.name}', len(batch))
+        metrics.incr('notifications.batches')
+        metrics.incr('notifications.lag_ms_total', int(sum(lags)))
+        metrics.set_gauge('notifications.last_lag_ms', round(max(lags), 1))
+        metrics.set_gauge(f'notifications.queue_depth.{channel.name}', channel.depth())
+
+    def flush(self, timeout=None):
+        """Wait until everything queued so far has been delivered or given up on."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while any(q.unfinished_tasks for c in self._channels.values() for q in c.queues):
+            if deadline is not None and time.monotonic() > deadline:
+                return False
+            time.sleep(0.01)
+        return True
+
+    def shutdown(self, timeout=5):
+        if self._pid != os.getpid():
+            return
+        self.flush(timeout)
+        self._stopping.set()
+        for thread in self._threads:
+            thread.join(timeout=1)
+        self._pid = None
+
+def appointment_event(kind, appointment):
+    return NotificationEvent(kind, appointment.id, appointment.user_id, appointment.doctor_id,
+                             appointment.time, time.time())
+
+def notify_appointment(kind, appointment):
+    """Queue a notification about `appointment` once the current transaction commits."""
+    notifier = current_app.extensions.get('notifications') if has_app_context() else None
+    if notifier is None:
+        return
+    db.session.info.setdefault('pending_notifications', []).append(
+        (notifier, appointment_event(kind, appointment))
+    )
+
+def _enqueue_after_commit(session):
+    for notifier, notification in session.info.pop('pending_notifications', ()):
+        notifier.enqueue(notification._replace(enqueued_at=time.time()))
+
+def _discard_on_rollback(session):
+    session.info.pop('pending_notifications', None)
+
+def enqueue_upcoming_notices(app, interval_minutes=1):
+    """
+    Queue notices for scheduled appointments entering the NOTIFY_UPCOMING_MINUTES
+    window since the previous run. Uses the (status, time) index on appointments.
+    """
+    from models.appointment import Appointment
+
+    notifier = app.extensions.get('notifications')
+    if notifier is None:
+        return 0
+    horizon = datetime.now() + timedelta(minutes=app.config.get('NOTIFY_UPCOMING_MINUTES', 15))
+    start = notifier.upcoming_horizon or horizon - timedelta(minutes=interval_minutes)
+    upcoming = db.session.query(
+        Appointment.id, Appointment.user_id, Appointment.doctor_id, Appointment.time
+    ).filter(
+        Appointment.status == 'Scheduled',
+        Appointment.time > start,
+        Appointment.time <= horizon
+    ).all()
+    notifier.upcoming_horizon = horizon
+    for row in upcoming:
+        notifier.enqueue(NotificationEvent('upcoming', row.id, row.user_id, row.doctor_id, row.time, time.time()))
+    return len(upcoming)
+
+def init_notifications(app):
+    if not app.config.get('NOTIFY_ENABLED', True):
+        return None
+    sinks = {}
+    for name in filter(None, (s.strip() for s in app.config.get('NOTIFY_SINKS', 'log').split(','))):
+        if name not in SINKS:
+            raise ValueError(f"Unknown notification sink: {name}")
+        sinks[name] = SINKS[name](app.config)
+    notifier = Notifier(
+        app, sinks,
+        workers=app.config.get('NOTIFY_WORKERS', 2),
+        batch_size=app.config.get('NOTIFY_BATCH_SIZE', 50),
+        batch_wait=app.config.get('NOTIFY_BATCH_WAIT_MS', 200) / 1000,
+        max_attempts=app.config.get('NOTIFY_MAX_ATTEMPTS', 5),
+        retry_base=app.config.get('NOTIFY_RETRY_BASE_SECONDS', 0.5),
+        queue_size=app.config.get('NOTIFY_QUEUE_SIZE', 10000),
+    )
+    app.extensions['notifications'] = notifier
+    atexit.register(notifier.shutdown)
+    if not event.contains(Session, 'after_commit', _enqueue_after_commit):
+        event.listen(Session, 'after_commit', _enqueue_after_commit)
+        event.listen(Session, 'after_rollback', _discard_on_rollback)
+    return notifier
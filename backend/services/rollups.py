@@ -0,0 +1,195 @@
+# rollups.py
+"""
+Daily appointment rollups for analytics.
+
+`appointment_daily_stat` holds one count per (day of appointment time,
+doctor, status). Every ORM flush that inserts, deletes or changes the
+status, time or doctor of an Appointment applies the matching +1/-1 deltas
+in the same transaction, so the rollup commits or rolls back with the write.
+Archival moves rows between tables without changing the counts; analytics
+cover archived appointments too.
+
+Bulk loads that bypass the ORM (services/datagen.py) need
+`flask backfill-rollups`; `flask check-rollups` compares the rollup with
+the raw tables and can repair differences.
+"""
+import logging
+from collections import Counter
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import delete, event, func, inspect, insert, select, union_all, update
+from sqlalchemy.orm import Session
+
+from database import db
+from models.appointment import Appointment
+from models.appointment_archive import AppointmentArchive
+from models.appointment_daily_stat import AppointmentDailyStat
+from models.doctor import Doctor
+from services import metrics
+
+logger = logging.getLogger(__name__)
+
+_TRACKED = ('status', 'time', 'doctor_id')
+
+def _day(value):
+    return value.date() if isinstance(value, datetime) else value
+
+def _previous(obj, attr):
+    history = inspect(obj).attrs[attr].history
+    if history.deleted:
+        return history.deleted[0]
+    return getattr(obj, attr)
+
+def _collect_deltas(session):
+    deltas = Counter()
+    for obj in session.new:
+        if isinstance(obj, Appointment):
+            deltas[(_day(obj.time), obj.doctor_id, obj.status or 'Scheduled')] += 1
+    for obj in session.deleted:
+        if isinstance(obj, Appointment):
+            deltas[(_day(_previous(obj, 'time')), _previous(obj, 'doctor_id'), _previous(obj, 'status'))] -= 1
+    for obj in session.dirty:
+        if isinstance(obj, Appointment) and obj not in session.deleted:
+            state = inspect(obj)
+            if any(state.attrs[attr].history.has_changes() for attr in _TRACKED):
+                deltas[(_day(_previous(obj, 'time')), _previous(obj, 'doctor_id'), _previous(obj, 'status'))] -= 1
+                deltas[(_day(obj.time), obj.doctor_id, obj.status)] += 1
+    return {key: n for key, n in deltas.items() if n}
+
+def apply_deltas(connection, deltas):
+    """Add `deltas` ({(day, doctor_id, status): n}) to the rollup with one statement."""
+    rows = [{"day": day, "doctor_id": doctor_id, "status": status, "count": n}
+            for (day, doctor_id, status), n in deltas.items()]
+    dialect = connection.dialect.name
+    if dialect in ('sqlite', 'postgresql'):
+        if dialect == 'sqlite':
+            from sqlalchemy.dialects.sqlite import insert as upsert
+        else:
+            from sqlalchemy.dialects.postgresql import insert as upsert
+        statement = upsert(AppointmentDailyStat)
+        connection.execute(statement.on_conflict_do_update(
+            index_elements=['day', 'doctor_id', 'status'],
+            set_={'count': AppointmentDailyStat.count + statement.excluded.count}
+        ), rows)
+        return
+    for row in rows:
+        key = (AppointmentDailyStat.day == row['day'], AppointmentDailyStat.doctor_id == row['doctor_id'],
+               AppointmentDailyStat.status == row['status'])
+        result = connection.execute(update(AppointmentDailyStat).where(*key)
+                                    .values(count=AppointmentDailyStat.count + row['count']))
+        if not result.rowcount:
+            connection.execute(insert(AppointmentDailyStat).values(**row))
+
+def _update_rollups(session, flush_context):
+    deltas = _collect_deltas(session)
+    if deltas:
+        apply_deltas(session.connection(), deltas)
+        metrics.incr('rollups.deltas', len(deltas))
+
+def _raw_counts(start=None, end=None):
+    """Grouped counts from the hot and archive tables: {(day, doctor_id, status): n}"""
+    parts = []
+    for model in (Appointment, AppointmentArchive):
+        query = select(model.time.label('time'), model.doctor_id.label('doctor_id'), model.status.label('status'))
+        if start is not None:
+            query = query.where(model.time >= datetime.combine(start, datetime.min.time()))
+        if end is not None:
+            query = query.where(model.time < datetime.combine(end + timedelta(days=1), datetime.min.time()))
+        parts.append(query)
+    combined = union_all(*parts).subquery()
+    day = func.date(combined.c.time)
+    rows = db.session.execute(
+        select(day, combined.c.doctor_id, combined.c.status, func.count())
+        .group_by(day, combined.c.doctor_id, combined.c.status)
+    ).all()
+    return {(_as_date(d), doctor_id, status): n for d, doctor_id, status, n in rows}
+
+def _as_date(value):
+    if isinstance(value, str):
+        return date.fromisoformat(value)
+    return _day(value)
+
+def _rollup_counts(start=None, end=None):
+    query = select(AppointmentDailyStat.day, AppointmentDailyStat.doctor_id,
+                   AppointmentDailyStat.status, AppointmentDailyStat.count)
+    if start is not None:
+        query = query.where(AppointmentDailyStat.day >= start)
+    if end is not None:
+        query = query.where(AppointmentDailyStat.day <= end)
+    return {(d, doctor_id, status): n for d, doctor_id, status, n in db.session.execute(query).all() if n}
+
+def backfill(start=None, end=None):
+    """Recompute the rollup for [start, end] (inclusive dates; None = unbounded). Returns rows written."""
+    counts = _raw_counts(start, end)
+    statement = delete(AppointmentDailyStat)
+    if start is not None:
+        statement = statement.where(AppointmentDailyStat.day >= start)
+    if end is not None:
+        statement = statement.where(AppointmentDailyStat.day <= end)
+    try:
+        db.session.execute(statement)
+        if counts:
+            db.session.execute(insert(AppointmentDailyStat), [
+                {"day": d, "doctor_id": doctor_id, "status": status, "count": n}
+                for (d, doctor_id, status), n in counts.items()
+            ])
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    logger.info("Backfilled %d rollup rows (%s to %s)", len(counts), start or 'start', end or 'end')
+    return len(counts)
+
+def check(start=None, end=None):
+    """Differences between the rollup and the raw tables: [(day, doctor_id, status, rollup, actual)]."""
+    expected = _raw_counts(start, end)
+    stored = _rollup_counts(start, end)
+    mismatches = [
+        (key[0], key[1], key[2], stored.get(key, 0), expected.get(key, 0))
+        for key in sorted(set(expected) | set(stored), key=lambda k: (k[0], k[1], k[2] or ''))
+        if stored.get(key, 0) != expected.get(key, 0)
+    ]
+    metrics.set_gauge('rollups.mismatches', len(mismatches))
+    return mismatches
+
+def daily_counts(start, end, doctor_id=None, group_by='doctor'):
+    """
+    Counts per day between two dates (inclusive), grouped by doctor or
+    specialization: [{"date", "doctor_id" | "specialization", "Scheduled", ...}]
+    """
+    group_column = Doctor.specialization if group_by == 'specialization' else AppointmentDailyStat.doctor_id
+    query = select(
+        AppointmentDailyStat.day, group_column, AppointmentDailyStat.status, func.sum(AppointmentDailyStat.count)
+    ).where(AppointmentDailyStat.day >= start, AppointmentDailyStat.day <= end)
+    if group_by == 'specialization':
+        query = query.join(Doctor, Doctor.id == AppointmentDailyStat.doctor_id)
+    if doctor_id is not None:
+        query = query.where(AppointmentDailyStat.doctor_id == doctor_id)
+    query = query.group_by(AppointmentDailyStat.day, group_column, AppointmentDailyStat.status) \
+        .order_by(AppointmentDailyStat.day, group_column)
+
+    label = 'specialization' if group_by == 'specialization' else 'doctor_id'
+    series = {}
+    for day, group, status, count in db.session.execute(query).all():
+        if not count:
+            continue
+        entry = series.setdefault((day, group), {"date": day.isoformat(), label: group,
+                                                 "Scheduled": 0, "Completed": 0, "Cancelled": 0})
+        entry[status] = entry.get(status, 0) + int(count)
+    return list(series.values())
+
+def parse_range(args, default_days=30, max_days=366):
+    """(start, end) dates from ?from=&to= (YYYY-MM-DD, inclusive); raises ValueError."""
+    end = datetime.strptime(args['to'], '%Y-%m-%d').date() if args.get('to') else date.today()
+    start = datetime.strptime(args['from'], '%Y-%m-%d').date() if args.get('from') else end - timedelta(days=default_days - 1)
+    if start > end:
+        raise ValueError("'from' must not be after 'to'")
+    if (end - start).days >= max_days:
+        raise ValueError(f"Date range is limited to {max_days} days")
+    return start, end
+
+def init_rollups(app):
+    if not app.config.get('ROLLUPS_ENABLED', True):
+        return
+    if not event.contains(Session, 'after_flush', _update_rollups):
+        event.listen(Session, 'after_flush', _update_rollups)
@@ -0,0 +1,84 @@
+# slot_holds.py
+"""
+Short-lived slot holds for the chatbot booking flow.
+
+When a patient picks a time, `place_hold` reserves (doctor, time) for
+SLOT_HOLD_TTL_SECONDS. The unique constraint on slot_hold makes the
+reservation atomic across workers. `book_appointment` turns the patient's own
+hold into the appointment and rejects slots held by someone else; reschedules
+respect holds too. Each patient has at most one hold, so the table stays
+bounded by the number of patients mid-booking. Expired holds stop counting
+immediately and are deleted by the scheduler.
+
+Metrics: slot_holds.placed, .conflicts, .converted, .released, .expired.
+"""
+import logging
+from datetime import datetime, timedelta
+
+from sqlalchemy import and_, delete, or_, select
+from sqlalchemy.exc import IntegrityError
+
+from database import db
+from models.appointment import Appointment
+from models.slot_hold import SlotHold
+from services import metrics
+
+logger = logging.getLogger(__name__)
+
+def place_hold(user_id, doctor_id, time, ttl_seconds=300):
+    """
+    Hold the slot for `user_id`, replacing any hold they already had.
+    Returns (expires_at, None) on success or (None, 'booked' | 'held').
+    """
+    now = datetime.now()
+    try:
+        released = db.session.execute(delete(SlotHold).where(or_(
+            SlotHold.user_id == user_id,
+            and_(SlotHold.doctor_id == doctor_id, SlotHold.time == time, SlotHold.expires_at <= now)
+        ))).rowcount
+        booked = db.session.execute(select(Appointment.id).where(
+            Appointment.doctor_id == doctor_id, Appointment.time == time, Appointment.status == 'Scheduled'
+        ).limit(1)).first()
+        if booked:
+            db.session.commit()
+            metrics.incr('slot_holds.conflicts')
+            return None, 'booked'
+        expires_at = now + timedelta(seconds=ttl_seconds)
+        db.session.add(SlotHold(doctor_id=doctor_id, time=time, user_id=user_id, expires_at=expires_at))
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()
+        metrics.incr('slot_holds.conflicts')
+        return None, 'held'
+    except Exception:
+        db.session.rollback()
+        raise
+    if released:
+        metrics.incr('slot_holds.released', released)
+    metrics.incr('slot_holds.placed')
+    logger.info("Slot held for user %s: doctor %s at %s until %s", user_id, doctor_id, time, expires_at)
+    return expires_at, None
+
+def active_hold(doctor_id, time):
+    """(hold id, user id) of the unexpired hold on the slot, or None."""
+    return db.session.execute(select(SlotHold.id, SlotHold.user_id).where(
+        SlotHold.doctor_id == doctor_id, SlotHold.time == time, SlotHold.expires_at > datetime.now()
+    )).first()
+
+def convert_hold(hold_id):
+    """Delete a hold as part of the caller's booking transaction. The caller commits."""
+    db.session.execute(delete(SlotHold).where(SlotHold.id == hold_id))
+    metrics.incr('slot_holds.converted')
+
+def release_holds(user_id):
+    released = db.session.execute(delete(SlotHold).where(SlotHold.user_id == user_id)).rowcount
+    db.session.commit()
+    if released:
+        metrics.incr('slot_holds.released', released)
+
+def purge_expired_holds():
+    expired = db.session.execute(delete(SlotHold).where(SlotHold.expires_at <= datetime.now())).rowcount
+    db.session.commit()
+    if expired:
+        metrics.incr('slot_holds.expired', expired)
+    return expired
@@ -0,0 +1,169 @@
+# user_cache.py
+"""
+Per-user cache of serialized /api/appointments/my and /api/reminders/my
+responses, also behind the same sections of /api/bootstrap.
+
+Entries are JSON bodies keyed by (kind, user id) and evicted least recently
+used once their total size passes USER_CACHE_MAX_BYTES. Any committed ORM
+change to a user's Appointment or Reminder rows (booking, cancelling,
+deleting, rescheduling, completing, reminder create/delete, the expiry
+cleanup job) publishes 'appointments' or 'reminders' with that user id on the
+invalidation bus, which drops the entry in every worker. Bulk Core writes
+(archival) publish explicitly.
+
+A response computed while an invalidation was in flight is not stored, so a
+slow read cannot put stale data back after a write.
+
+Without a cross-process INVALIDATION_BACKEND, events reach only the
+publishing process: another web worker or the `flask run-jobs` expiry job
+writing a user's rows leaves this worker's entry in place. Entries therefore
+also expire after USER_CACHE_TTL_SECONDS, which bounds how stale a response
+can be; gunicorn.conf.py defaults a host-local backend for multi-worker runs.
+
+Metrics: user_cache.hits, .misses, .evictions, .expirations, .invalidations and gauges
+user_cache.bytes, user_cache.entries, user_cache.hit_ratio.
+"""
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+from flask import current_app
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from services import metrics
+from services.invalidation import bus
+
+logger = logging.getLogger(__name__)
+
+TOPICS = ('appointments', 'reminders')
+
+class ResponseCache:
+    def __init__(self, max_bytes=16 * 1024 * 1024, name='user_cache', ttl=None):
+        self.max_bytes = max_bytes
+        self.name = name  # metrics prefix
+        self.ttl = ttl  # seconds an entry is served; None keeps it until invalidated
+        self.enabled = True
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._epoch = 0
+
+    def epoch(self):
+        """Token to pass to `put`; the put is dropped if anything was invalidated in between."""
+        return self._epoch
+
+    def get(self, kind, user_id):
+        if not self.enabled:
+            return None
+        key = (kind, user_id)
+        body = None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                body, expires = entry
+                if expires is not None and expires <= time.monotonic():
+                    del self._entries[key]
+                    self._bytes -= len(body)
+                    body = None
+                    metrics.incr(f'{self.name}.expirations')
+                    self._update_gauges()
+                else:
+                    self._entries.move_to_end(key)
+        metrics.incr(f'{self.name}.hits' if body is not None else f'{self.name}.misses')
+        hits, misses = metrics.get(f'{self.name}.hits'), metrics.get(f'{self.name}.misses')
+        metrics.set_gauge(f'{self.name}.hit_ratio', round(hits / (hits + misses), 4))
+        return body
+
+    def put(self, kind, user_id, body, epoch):
+        if not self.enabled or len(body) > self.max_bytes:
+            return
+        key = (kind, user_id)
+        with self._lock:
+            if epoch != self._epoch:
+                return
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= len(old[0])
+            expires = None if self.ttl is None else time.monotonic() + self.ttl
+            self._entries[key] = (body, expires)
+            self._bytes += len(body)
+            while self._bytes > self.max_bytes:
+                _, (evicted, _) = self._entries.popitem(last=False)
+                self._bytes -= len(evicted)
+                metrics.incr(f'{self.name}.evictions')
+            self._update_gauges()
+
+    def invalidate(self, kind, user_id=None):
+        """Drop one user's entry, or every entry of `kind` when user_id is None."""
+        with self._lock:
+            self._epoch += 1
+            keys = [k for k in self._entries if k[0] == kind] if user_id is None else [(kind, user_id)]
+            for key in keys:
+                entry = self._entries.pop(key, None)
+                if entry is not None:
+                    self._bytes -= len(entry[0])
+            self._update_gauges()
+        metrics.incr(f'{self.name}.invalidations')
+
+    def clear(self):
+        with self._lock:
+            self._epoch += 1
+            self._entries.clear()
+            self._bytes = 0
+            self._update_gauges()
+
+    def _update_gauges(self):
+        metrics.set_gauge(f'{self.name}.bytes', self._bytes)
+        metrics.set_gauge(f'{self.name}.entries', len(self._entries))
+
+response_cache = ResponseCache()
+
+def cached_body(kind, user_id, load):
+    """JSON bytes of `load(user_id)`, served from and stored in `response_cache`."""
+    body = response_cache.get(kind, user_id)
+    if body is None:
+        epoch = response_cache.epoch()
+        body = current_app.json.dumps_bytes(load(user_id))
+        response_cache.put(kind, user_id, body, epoch)
+    return body
+
+def publish_user_change(kind, user_id):
+    bus.publish(kind, key=None if user_id is None else str(user_id))
+
+def _track_user_changes(session, flush_context):
+    from models.appointment import Appointment
+    from models.reminder import Reminder
+    changed = session.info.setdefault('user_cache_changes', set())
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, Appointment):
+            changed.add(('appointments', obj.user_id))
+        elif isinstance(obj, Reminder):
+            changed.add(('reminders', obj.user_id))
+
+def _publish_after_commit(session):
+    for kind, user_id in session.info.pop('user_cache_changes', ()):
+        publish_user_change(kind, user_id)
+
+def _forget_on_rollback(session):
+    session.info.pop('user_cache_changes', None)
+
+def _subscriber(kind):
+    def on_change(key):
+        response_cache.invalidate(kind, None if key is None else int(key))
+    on_change.__name__ = f'_on_{kind}_changed'
+    return on_change
+
+_subscribers = {kind: _subscriber(kind) for kind in TOPICS}
+
+def init_user_cache(app):
+    response_cache.max_bytes = app.config.get('USER_CACHE_MAX_BYTES', 16 * 1024 * 1024)
+    response_cache.enabled = app.config.get('USER_CACHE_ENABLED', True)
+    response_cache.ttl = app.config.get('USER_CACHE_TTL_SECONDS', 30)
+    for kind, callback in _subscribers.items():
+        bus.subscribe(kind, callback)
+    if not event.contains(Session, 'after_flush', _track_user_changes):
+        event.listen(Session, 'after_flush', _track_user_changes)
+        event.listen(Session, 'after_commit', _publish_after_commit)
+        event.listen(Session, 'after_rollback', _forget_on_rollback)
@@ -67,6 +67,44 @@ export default function Dashboard() {
     }
   }, [navigate]);
 
+  // Appointments and reminders in one round trip for the initial load and polling
+  const fetchDashboard = useCallback(async () => {
+    try {
+      setLoading(true);
+      const token = localStorage.getItem('token');
+      if (!token) {
+        throw new Error('No token found');
+      }
+      const response = await API.get("/bootstrap", { params: { fields: 'appointments,reminders' } });
+      setAppointments(response.data.appointments);
+      setReminders(response.data.reminders);
+      setError('');
+    } catch (err) {
+      console.error("Dashboard fetch error:", err.response || err);
+      if (err.message === 'No token found' || err.response?.status === 401 || err.response?.status === 422) {
+        setError('Unauthorized. Please log in again.');
+        localStorage.removeItem('token');
+        localStorage.removeItem('user_id');
+        navigate('/login');
+      } else {
+        setError(err.response?.data?.msg || "Failed to fetch dashboard");
+      }
+    } finally {
+      setLoading(false);
+    }
+  }, [navigate]);
+
+  // Opens the calendar app with a subscription to the appointments feed
+  const handleSubscribeCalendar = async () => {
+    try {
+      const response = await API.get("/calendar/feed-url");
+      window.location.href = response.data.webcal_url;
+    } catch (err) {
+      console.error("Calendar feed error:", err.response || err);
+      setError(err.response?.data?.msg || "Failed to get calendar link");
+    }
+  };
+
   const handleCancelAppointment = async (appointmentId) => {
     if (!window.confirm('Are you sure you want to cancel this appointment?')) {
       return;
@@ -192,8 +230,7 @@ export default function Dashboard() {
     if (!token) {
       navigate('/login');
     } else {
-      fetchAppointments();
-      fetchReminders();
+      fetchDashboard();
       if (location.state?.showOnboardingPrompt) {
         setChatbotOpen(true);
         setTimeout(() => {
@@ -207,22 +244,20 @@ export default function Dashboard() {
     // Set up polling to refresh appointments every 5 minutes
     const pollingInterval = setInterval(() => {
       console.log('Polling for updated appointments and reminders');
-      fetchAppointments();
-      fetchReminders();
+      fetchDashboard();
     }, 5 * 60 * 1000); // 5 minutes
 
     setTimeout(() => setFadeIn(true), 100);
 
     // Cleanup polling interval on unmount
     return () => clearInterval(pollingInterval);
-  }, [navigate, location.state, fetchAppointments, fetchReminders, setChatbotOpen]);
+  }, [navigate, location.state, fetchDashboard, setChatbotOpen]);
 
   useEffect(() => {
     if (location.state?.refresh) {
-      fetchAppointments();
-      fetchReminders();
+      fetchDashboard();
     }
-  }, [location.state, fetchAppointments, fetchReminders]);
+  }, [location.state, fetchDashboard]);
 
   const LoadingSpinner = () => (
     <div className="loading-container">
@@ -299,6 +334,13 @@ export default function Dashboard() {
           <span className="btn-icon">+</span>
           Book New Appointment
         </button>
+        <button
+          className="book-appointment-btn"
+          onClick={handleSubscribeCalendar}
+        >
+          <span className="btn-icon">📅</span>
+          Add to Calendar
+        </button>
       </div>
 
       {loading && <LoadingSpinner />}
@@ -16,13 +16,10 @@ export default function DoctorDashboard() {
       setLoading(true);
       setError(''); // Clear previous errors
       
-      // Fetch doctor info
-      const doctorResponse = await API.get('/doctor/me');
-      setDoctorInfo(doctorResponse.data);
-
-      // Fetch appointments
-      const appointmentsResponse = await API.get('/doctor/appointments');
-      setAppointments(appointmentsResponse.data);
+      // Doctor info and appointments in one round trip
+      const response = await API.get('/doctor/bootstrap');
+      setDoctorInfo(response.data.me);
+      setAppointments(response.data.appointments);
       
     } catch (err) {
       console.error('Fetch error:', err.response || err);
@@ -79,6 +76,16 @@ export default function DoctorDashboard() {
     }
   };
 
+  const handleSubscribeCalendar = async () => {
+    try {
+      const response = await API.get('/calendar/feed-url');
+      window.location.href = response.data.webcal_url;
+    } catch (err) {
+      console.error('Calendar feed error:', err);
+      alert(err.response?.data?.msg || 'Failed to get calendar link');
+    }
+  };
+
   const handleLogout = () => {
     localStorage.removeItem('doctor_token');
     localStorage.removeItem('doctor_id');
@@ -152,6 +159,9 @@ export default function DoctorDashboard() {
             </div>
           </div>
         </div>
+        <button onClick={handleSubscribeCalendar} className="card-action-btn secondary">
+          Add to Calendar
+        </button>
         <button onClick={handleLogout} className="card-action-btn danger">
           Logout
         </button>